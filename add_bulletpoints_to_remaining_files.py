@@ -1,8 +1,10 @@
-import json
 import os
 import random
 import glob
 
+import json_codec
+from snapshot_store import save_json
+
 # Constants
 SOURCE_FILE = "test_courses.json"
 # List of files that still need bullet points
@@ -23,7 +25,7 @@ def load_bullet_points(source_file):
     """Load bullet points from the source file."""
     try:
         with open(source_file, 'r', encoding='utf-8') as f:
-            source_data = json.load(f)
+            source_data = json_codec.load(f)
         
         bullet_points = []
         for course in source_data:
@@ -44,29 +46,22 @@ def process_file(file_path, bullet_points):
     try:
         # Load the file
         with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+            data = json_codec.load(f)
         
         course_count = len(data)
         print(f"Found {course_count} courses in {file_path}")
         
-        # Create a backup
-        backup_path = f"{file_path}.bak"
-        with open(backup_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
-        print(f"Created backup at {backup_path}")
-        
         # Update each course with a random set of bullet points
         for course in data:
             bp_set = random.choice(bullet_points)
             course["bulletpoints"] = bp_set
         
-        # Save the updated file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        # Save the updated file (the previous version goes to the snapshot store)
+        save_json(file_path, data)
         
         print(f"Updated all {course_count} courses in {file_path}")
         return True
-    except json.JSONDecodeError as e:
+    except json_codec.DecodeError as e:
         print(f"JSON error processing {file_path}: {e}")
         return False
     except Exception as e:
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of generated course bullet points.
+
+Bullet points are stored in SQLite under the SHA-256 of everything that
+determines the model's output: the model name, the prompt templates and the
+course text as sent, i.e. after trimming to the token budget. A course is only sent to the model when no bullets exist for
+that exact input, so:
+
+- re-running a generator costs no API calls
+- a course whose description changes is regenerated (its key changes)
+- courses with identical text share one generation
+
+The cache also records which input key each course's current bullets came
+from. Bullets already in the course files when the cache was introduced are
+adopted for the course's current text rather than regenerated, unless they
+were extracted locally after an API failure (record_extracted()).
+
+Entries are evicted by age (time since last use) and by count, least
+recently used first.
+
+Usage:
+    python3 bullet_cache.py                   # Cache statistics
+    python3 bullet_cache.py --evict           # Apply the default size/age limits
+    python3 bullet_cache.py --evict --max-entries 10000 --max-age-days 90
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Dict, Optional
+
+# Default location of the cache database
+BULLET_CACHE_PATH = ".bullet_cache.sqlite"
+
+# Recorded as a course's input key when its bullets were extracted locally after
+# the API failed, so lookup_course() never adopts them as model output
+EXTRACTED = "extracted"
+
+# Default eviction limits
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_MAX_AGE_DAYS = 180
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bullets (
+    key TEXT PRIMARY KEY,
+    bullets TEXT NOT NULL,
+    model TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bullets_last_used ON bullets (last_used);
+CREATE TABLE IF NOT EXISTS course_inputs (
+    code TEXT PRIMARY KEY,
+    key TEXT NOT NULL
+);
+"""
+
+
+def cache_key(model: str, system_prompt: str, user_template: str, text: str) -> str:
+    """SHA-256 identifying one generation input."""
+    digest = hashlib.sha256()
+    for part in (model, system_prompt, user_template, text):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class BulletCache:
+    """SQLite-backed bullet point cache."""
+
+    def __init__(self, path: str = BULLET_CACHE_PATH):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT bullets FROM bullets WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with self._db:
+            self._db.execute("UPDATE bullets SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put(self, key: str, bullets: str, model: str = ""):
+        now = time.time()
+        with self._db:
+            self._db.execute(
+                "INSERT INTO bullets (key, bullets, model, created, last_used) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET bullets = excluded.bullets, last_used = excluded.last_used",
+                (key, bullets, model, now, now))
+
+    def course_key(self, code: str) -> Optional[str]:
+        """Key of the input the course's current bullets were generated from."""
+        row = self._db.execute("SELECT key FROM course_inputs WHERE code = ?", (code,)).fetchone()
+        return row[0] if row else None
+
+    def record_course(self, code: str, key: str):
+        if not code:
+            return
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO course_inputs (code, key) VALUES (?, ?)", (code, key))
+
+    def lookup_course(self, code: str, key: str, existing: Optional[str] = None, model: str = "") -> Optional[str]:
+        """
+        Bullets for a course that can be used without calling the model.
+
+        Args:
+            code (str): Course code
+            key (str): cache_key() of the course's current input
+            existing (str): Bullets currently stored in the course file, if any
+            model (str): Model name, stored with adopted entries
+
+        Returns:
+            str: Reusable bullets, or None if the course needs generating
+        """
+        bullets = self.get(key)
+        if bullets is None and existing and self.course_key(code) in (None, key):
+            # Bullets from before the cache existed (or whose entry was evicted)
+            # still describe the current text, so keep them
+            self.put(key, existing, model)
+            bullets = existing
+        if bullets is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.record_course(code, key)
+        return bullets
+
+    def store_course(self, code: str, key: str, bullets: str, model: str = ""):
+        """Store freshly generated bullets for a course."""
+        self.put(key, bullets, model)
+        self.record_course(code, key)
+
+    def record_extracted(self, code: str):
+        """Note that the course's bullets are an extractive fallback, to be regenerated on the next run."""
+        self.record_course(code, EXTRACTED)
+
+    def evict(self, max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+              max_age_days: Optional[float] = DEFAULT_MAX_AGE_DAYS) -> int:
+        """
+        Remove entries unused for more than max_age_days, then the least
+        recently used entries beyond max_entries.
+
+        Returns:
+            int: Number of entries removed
+        """
+        removed = 0
+        with self._db:
+            if max_age_days is not None:
+                cutoff = time.time() - max_age_days * 24 * 3600
+                removed += self._db.execute("DELETE FROM bullets WHERE last_used < ?", (cutoff,)).rowcount
+            if max_entries is not None:
+                removed += self._db.execute(
+                    "DELETE FROM bullets WHERE key IN "
+                    "(SELECT key FROM bullets ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (max_entries,)).rowcount
+        if removed:
+            self._db.execute("VACUUM")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(bullets)), 0) FROM bullets").fetchone()
+        courses = self._db.execute("SELECT COUNT(*) FROM course_inputs").fetchone()[0]
+        return {
+            "entries": entries,
+            "bullet_bytes": size,
+            "courses": courses,
+            "file_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or prune the bullet point cache")
+    parser.add_argument("--path", default=BULLET_CACHE_PATH)
+    parser.add_argument("--evict", action="store_true", help="Remove old and excess entries")
+    parser.add_argument("--max-entries", type=int, default=DEFAULT_MAX_ENTRIES)
+    parser.add_argument("--max-age-days", type=float, default=DEFAULT_MAX_AGE_DAYS)
+    args = parser.parse_args()
+
+    with BulletCache(args.path) as cache:
+        if args.evict:
+            removed = cache.evict(args.max_entries, args.max_age_days)
+            print(f"Evicted {removed} entries")
+        for key, value in cache.stats().items():
+            print(f"{key.replace('_', ' ').capitalize()}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Precompute back-to-back classes that need a change of campus or building.
+
+For every pair of timetabled courses this finds slots where a class of one
+course ends and a class of the other starts shortly afterwards (within a
+configurable gap) in a different building, in at least one shared week.
+Transfers between campuses (e.g. Central -> King's Buildings) are flagged
+separately from moves between buildings on the same campus.
+
+Hundreds of classes end and start on the hour across the university, so the
+pair search is vectorised with NumPy and the result is stored as a sparse,
+sorted pair index (CSR style): each course pair with at least one transfer
+maps to a run of (from activity, to activity) entries. Checking a basket of
+courses is one binary search per pair. The index is written to a compressed
+.npz artifact and rebuilt when the CSV or the gap changes.
+
+Usage:
+    python3 campus_transfers.py INFR08025 MATH08057             # Transfers within a basket
+    python3 campus_transfers.py INFR08025 MATH08057 --gap 15    # Use a 15 minute gap
+    python3 campus_transfers.py                                 # Index summary
+"""
+
+import os
+import sys
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+from timetable import DAYS, TT_CSV_PATH, Timetable, _file_signature, format_time, load_timetable
+from timetable_weeks import parse_weeks, week_label
+
+# Default location of the precomputed index
+TRANSFERS_PATH = "campus_transfers.npz"
+
+# Classes starting up to this many minutes after another ends count as back-to-back
+DEFAULT_GAP_MINUTES = 30
+
+
+class Transfer(NamedTuple):
+    """One back-to-back pair of classes in different buildings."""
+    from_course: str
+    from_activity: str
+    to_course: str
+    to_activity: str
+    day: int                 # Index into DAYS
+    end: int                 # Minutes since midnight when the first class ends
+    start: int               # Minutes since midnight when the second class starts
+    from_building: str
+    to_building: str
+    from_campus: str
+    to_campus: str
+    weeks: int               # Bitmask of weeks in which both classes run
+
+    @property
+    def changes_campus(self) -> bool:
+        return self.from_campus != self.to_campus
+
+
+def _factorize(values: List[str]):
+    """Map strings to integer codes, returning (codes, sorted distinct strings)."""
+    labels = sorted(set(values))
+    lookup = {value: i for i, value in enumerate(labels)}
+    return np.array([lookup[v] for v in values], dtype=np.int32), np.array(labels, dtype=str)
+
+
+def build_transfers(timetable: Timetable, gap_minutes: int = DEFAULT_GAP_MINUTES) -> Dict[str, np.ndarray]:
+    """
+    Find all back-to-back transfers between different courses.
+
+    Args:
+        timetable (Timetable): The loaded timetable
+        gap_minutes (int): Maximum minutes between one class ending and the next starting
+
+    Returns:
+        dict: Arrays describing the activities and the sparse pair index
+    """
+    courses = timetable.course_codes()
+    rows = []
+    for course_index, code in enumerate(courses):
+        for activity in timetable.activities(code):
+            if not activity.is_scheduled or not activity.buildings:
+                continue
+            try:
+                weeks = parse_weeks(activity.weeks)
+            except ValueError:
+                continue
+            rows.append((course_index, activity.day, activity.start, activity.end, weeks, activity.name,
+                         activity.buildings[0], activity.campuses[0] if activity.campuses else ""))
+
+    # Activities sorted by (day, start) so every "starts within the gap" window is contiguous
+    rows.sort(key=lambda row: (row[1], row[2]))
+    course, day, start, end, weeks = (np.array([row[i] for row in rows], dtype=dtype)
+                                      for i, dtype in enumerate((np.int32, np.int32, np.int32, np.int32, np.uint64)))
+    names, name_labels = _factorize([row[5] for row in rows])
+    building, building_labels = _factorize([row[6] for row in rows])
+    campus, campus_labels = _factorize([row[7] for row in rows])
+
+    # For each activity, the window of activities starting within the gap after it ends
+    sort_key = day.astype(np.int64) * 24 * 60 + start
+    low = np.searchsorted(sort_key, day.astype(np.int64) * 24 * 60 + end, side='left')
+    high = np.searchsorted(sort_key, day.astype(np.int64) * 24 * 60 + end + gap_minutes, side='right')
+    counts = high - low
+
+    first = np.repeat(np.arange(len(rows)), counts)
+    second = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(low, counts)
+
+    keep = ((course[first] != course[second])
+            & (building[first] != building[second])
+            & ((weeks[first] & weeks[second]) != 0))
+    first, second = first[keep], second[keep]
+
+    # Group entries by unordered course pair: key = low_course * N + high_course
+    course_count = len(courses)
+    pair_low = np.minimum(course[first], course[second]).astype(np.int64)
+    pair_high = np.maximum(course[first], course[second]).astype(np.int64)
+    keys = pair_low * course_count + pair_high
+    order = np.argsort(keys, kind='stable')
+    keys, first, second = keys[order], first[order], second[order]
+    pair_keys, pair_starts = np.unique(keys, return_index=True)
+    pair_offsets = np.append(pair_starts, len(keys))
+
+    name, size_bytes, mtime = timetable.source or ("", 0, 0)
+    return {
+        'courses': np.array(courses, dtype=str),
+        'activity_course': course,
+        'activity_day': day.astype(np.int8),
+        'activity_start': start.astype(np.int16),
+        'activity_end': end.astype(np.int16),
+        'activity_weeks': weeks,
+        'activity_name': names,
+        'activity_building': building,
+        'activity_campus': campus,
+        'names': name_labels,
+        'buildings': building_labels,
+        'campuses': campus_labels,
+        'pair_keys': pair_keys,
+        'pair_offsets': pair_offsets,
+        'entry_from': first.astype(np.int32),
+        'entry_to': second.astype(np.int32),
+        'gap_minutes': np.array(gap_minutes),
+        'source': np.array([name, str(size_bytes), str(mtime)]),
+    }
+
+
+class TransferIndex:
+    """Sparse index of campus/building transfers between course pairs."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        self._courses = {code: i for i, code in enumerate(arrays['courses'])}
+
+    @classmethod
+    def load(cls, path: str = TRANSFERS_PATH) -> "TransferIndex":
+        with np.load(path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def save(self, path: str = TRANSFERS_PATH):
+        np.savez_compressed(path, **self.arrays)
+
+    @property
+    def gap_minutes(self) -> int:
+        return int(self.arrays['gap_minutes'])
+
+    @property
+    def source(self):
+        name, size_bytes, mtime = self.arrays['source']
+        return (str(name), int(size_bytes), int(mtime))
+
+    def __len__(self) -> int:
+        return len(self.arrays['pair_keys'])
+
+    def campus_pair_count(self) -> int:
+        """Number of course pairs with at least one change of campus."""
+        a = self.arrays
+        changes = a['activity_campus'][a['entry_from']] != a['activity_campus'][a['entry_to']]
+        pair_of_entry = np.repeat(np.arange(len(a['pair_keys'])), np.diff(a['pair_offsets']))
+        return len(np.unique(pair_of_entry[changes]))
+
+    def _transfer(self, first: int, second: int) -> Transfer:
+        a = self.arrays
+        return Transfer(
+            from_course=str(a['courses'][a['activity_course'][first]]),
+            from_activity=str(a['names'][a['activity_name'][first]]),
+            to_course=str(a['courses'][a['activity_course'][second]]),
+            to_activity=str(a['names'][a['activity_name'][second]]),
+            day=int(a['activity_day'][first]),
+            end=int(a['activity_end'][first]),
+            start=int(a['activity_start'][second]),
+            from_building=str(a['buildings'][a['activity_building'][first]]),
+            to_building=str(a['buildings'][a['activity_building'][second]]),
+            from_campus=str(a['campuses'][a['activity_campus'][first]]),
+            to_campus=str(a['campuses'][a['activity_campus'][second]]),
+            weeks=int(a['activity_weeks'][first] & a['activity_weeks'][second]),
+        )
+
+    def pair(self, first: str, second: str, campus_only: bool = False) -> List[Transfer]:
+        """Transfers between two courses, in either direction."""
+        if first not in self._courses or second not in self._courses:
+            return []
+        low, high = sorted((self._courses[first], self._courses[second]))
+        key = low * len(self._courses) + high
+        a = self.arrays
+        position = np.searchsorted(a['pair_keys'], key)
+        if position == len(a['pair_keys']) or a['pair_keys'][position] != key:
+            return []
+        entries = range(a['pair_offsets'][position], a['pair_offsets'][position + 1])
+        transfers = [self._transfer(a['entry_from'][i], a['entry_to'][i]) for i in entries]
+        if campus_only:
+            transfers = [t for t in transfers if t.changes_campus]
+        return transfers
+
+    def check_basket(self, codes: Iterable[str], campus_only: bool = False) -> List[Transfer]:
+        """
+        All transfers between courses in a basket.
+
+        Args:
+            codes (iterable): Course codes in the basket
+            campus_only (bool): Only report moves between campuses
+
+        Returns:
+            list: Transfers ordered by day and time
+        """
+        codes = sorted(set(codes))
+        found = []
+        for i, first in enumerate(codes):
+            for second in codes[i + 1:]:
+                found.extend(self.pair(first, second, campus_only))
+        return sorted(found, key=lambda t: (t.day, t.end, t.start, t.from_course))
+
+
+def load_transfer_index(gap_minutes: int = DEFAULT_GAP_MINUTES, csv_path: str = TT_CSV_PATH,
+                        path: Optional[str] = TRANSFERS_PATH) -> TransferIndex:
+    """
+    Load the transfer index, rebuilding it if the CSV or gap has changed.
+    """
+    if path and os.path.exists(path):
+        try:
+            index = TransferIndex.load(path)
+            if index.source == _file_signature(csv_path) and index.gap_minutes == gap_minutes:
+                return index
+        except (OSError, ValueError, KeyError):
+            pass  # Stale or unreadable index, rebuild below
+
+    index = TransferIndex(build_transfers(load_timetable(csv_path), gap_minutes))
+    if path:
+        try:
+            index.save(path)
+        except OSError as e:
+            print(f"Warning: Could not write transfer index {path}: {e}")
+    return index
+
+
+def main():
+    args = sys.argv[1:]
+    gap_minutes = DEFAULT_GAP_MINUTES
+    if "--gap" in args:
+        position = args.index("--gap")
+        try:
+            gap_minutes = int(args[position + 1])
+        except (IndexError, ValueError):
+            print("Error: --gap expects a number of minutes")
+            sys.exit(1)
+        del args[position:position + 2]
+
+    index = load_transfer_index(gap_minutes)
+
+    if not args:
+        print(f"{len(index)} course pairs have back-to-back classes in different buildings "
+              f"(gap <= {gap_minutes} min), {index.campus_pair_count()} of them across campuses")
+        return
+
+    transfers = index.check_basket(code.upper() for code in args)
+    if not transfers:
+        print("No back-to-back building changes in this basket")
+    for t in transfers:
+        kind = "CAMPUS CHANGE" if t.changes_campus else "building change"
+        weeks = [w for w in range(t.weeks.bit_length()) if t.weeks >> w & 1]
+        print(f"{DAYS[t.day]} {format_time(t.end)} -> {format_time(t.start)} [{kind}] "
+              f"{t.from_course} ({t.from_building}, {t.from_campus}) -> {t.to_course} ({t.to_building}, {t.to_campus})")
+        print(f"  {t.from_activity} -> {t.to_activity}")
+        print(f"  Weeks: {', '.join(week_label(w) for w in weeks)}")
+
+
+if __name__ == "__main__":
+    main()
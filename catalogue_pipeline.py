@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+One pass over the course files for all catalogue maintenance transforms.
+
+The maintenance scripts (filter_unavailable_courses.py,
+fix_bullet_points_field_name.py, hacktheburgh-edtech/clean_learning_activities.py
+and the copy_bulletpoints_* scripts) each load every school file, change it,
+back it up and rewrite it. Running them all meant about five full passes
+over the catalogue. Here each one is a registered per-record transform:
+
+- a file is read once and its courses stream through every selected
+  transform in registration order
+- a transform returns the course (changed in place or not), or None to
+  drop it, and counts what it did in its own counters
+- a file that any transform changed gets one snapshot (snapshot_store.py)
+  and one atomic write
+- files are processed in parallel by catalogue_runner.py
+
+The counters replace the scripts' per-course print statements:
+
+    filter_unavailable          removed=2232
+    enrichments                 joined=3211 bulletpoints=3211
+    fix_field_name              renamed=12
+    clean_learning_activities   cleaned=845
+
+Usage:
+    python3 catalogue_pipeline.py                       # Default transforms over every file
+    python3 catalogue_pipeline.py --dry-run             # Count changes without writing
+    python3 catalogue_pipeline.py --transforms filter_unavailable clean_learning_activities
+    python3 catalogue_pipeline.py --transforms copy_bulletpoints --copy-from test_courses.json \\
+        --files courses_School_of_Law.json              # Placeholder bullets for courses without any
+    python3 catalogue_pipeline.py --list                # Registered transforms
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+from collections import Counter
+from functools import partial
+from typing import Dict, List, Optional, Sequence
+
+from catalogue_runner import combine, run_files
+from enrichment_store import SUPERSEDED_FIELDS, open_stores, record_key, store_dir_for
+import json_codec
+from snapshot_store import save_json
+
+# Transform name -> class, in the order they run
+TRANSFORMS: Dict[str, type] = {}
+
+
+def register(cls):
+    """Class decorator adding a transform to the registry."""
+    TRANSFORMS[cls.name] = cls
+    return cls
+
+
+class Transform:
+    """A per-record catalogue transform; subclasses set name and implement apply()."""
+
+    name = ""
+    description = ""
+    # Whether the transform runs when none are chosen explicitly
+    default = True
+
+    def __init__(self, options: argparse.Namespace):
+        self.options = options
+        self.counts = Counter()
+
+    def start_file(self, file_path: str) -> bool:
+        """Called before a file's courses; False leaves the file to the other transforms."""
+        return True
+
+    def apply(self, course: dict) -> Optional[dict]:
+        """Return the course, changed in place if needed, or None to drop it."""
+        raise NotImplementedError
+
+
+@register
+class FilterUnavailable(Transform):
+    name = "filter_unavailable"
+    description = 'Drop courses whose period is "Not delivered this year"'
+
+    def apply(self, course):
+        if course.get("period", "") == "Not delivered this year":
+            self.counts["removed"] += 1
+            return None
+        return course
+
+
+@register
+class JoinEnrichments(Transform):
+    name = "enrichments"
+    description = "Join the enrichment stores (bullet points, cleaned fields) into the courses"
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.stores = None
+        self.file_path = None
+        self.seen = Counter()
+
+    def start_file(self, file_path):
+        if self.stores is None:
+            self.stores = open_stores(store_dir_for(os.path.dirname(os.path.abspath(file_path))))
+        self.file_path = file_path
+        self.seen = Counter()
+        return bool(self.stores)
+
+    def apply(self, course):
+        # Only undelivered courses are dropped before this transform, which leaves the keys unchanged
+        record = record_key(course, self.seen)
+        for store in self.stores:
+            if store.apply(self.file_path, [course], [record]):
+                self.counts["joined"] += 1
+                self.counts[store.field] += 1
+        return course
+
+
+@register
+class FixFieldName(Transform):
+    name = "fix_field_name"
+    description = 'Rename "bullet_points" to "bulletpoints"'
+
+    def apply(self, course):
+        for field, old_fields in SUPERSEDED_FIELDS.items():
+            for old in old_fields:
+                if old not in course:
+                    continue
+                value = course.pop(old)
+                if value and not course.get(field):
+                    course[field] = value
+                    self.counts["renamed"] += 1
+                else:
+                    self.counts["dropped_duplicate"] += 1
+        return course
+
+
+@register
+class CleanLearningActivities(Transform):
+    name = "clean_learning_activities"
+    description = "Collapse newlines and repeated spaces in learning_activities"
+
+    _SPACE = re.compile(r'\s+')
+
+    def apply(self, course):
+        original = course.get("learning_activities")
+        if isinstance(original, str):
+            cleaned = self._SPACE.sub(' ', original).strip()
+            if cleaned != original:
+                course["learning_activities"] = cleaned
+                self.counts["cleaned"] += 1
+        return course
+
+
+@register
+class CopyBulletpoints(Transform):
+    name = "copy_bulletpoints"
+    description = "Give courses without bullet points a placeholder set from --copy-from"
+    default = False
+
+    def __init__(self, options):
+        super().__init__(options)
+        source = getattr(options, "copy_from", None)
+        if not source:
+            raise ValueError("copy_bulletpoints needs --copy-from")
+        with open(source, 'r', encoding='utf-8') as f:
+            self.bullet_points = [c["bulletpoints"] for c in json_codec.load(f) if c.get("bulletpoints")]
+        if not self.bullet_points:
+            raise ValueError(f"No bullet points found in {source}")
+
+    def apply(self, course):
+        if not course.get("bulletpoints"):
+            # Seeded by course code, so reruns pick the same set
+            course["bulletpoints"] = random.Random(course.get("code", "")).choice(self.bullet_points)
+            self.counts["copied"] += 1
+        return course
+
+
+def build_transforms(names: Optional[Sequence[str]], options: argparse.Namespace) -> List[Transform]:
+    """Instantiate the named transforms (or the defaults) in registration order."""
+    if names:
+        unknown = [n for n in names if n not in TRANSFORMS]
+        if unknown:
+            raise ValueError(f"Unknown transforms: {', '.join(unknown)} (known: {', '.join(TRANSFORMS)})")
+        selected = [cls for name, cls in TRANSFORMS.items() if name in names]
+    else:
+        selected = [cls for cls in TRANSFORMS.values() if cls.default]
+    return [cls(options) for cls in selected]
+
+
+def run_file(file_path: str, transforms: List[Transform], dry_run: bool = False, snapshot: bool = True) -> Dict:
+    """
+    Stream one course file through the transforms, writing it once if anything changed.
+
+    Returns:
+        dict: courses_in, courses_out, changes (counter increments in this file) and written
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        courses = json_codec.load(f)
+    if not isinstance(courses, list):
+        raise ValueError(f"Expected a list of courses in {file_path}, got {type(courses).__name__}")
+
+    active = [t for t in transforms if t.start_file(file_path)]
+    before = sum(sum(t.counts.values()) for t in transforms)
+
+    kept = []
+    for course in courses:
+        for transform in active:
+            course = transform.apply(course)
+            if course is None:
+                break
+        else:
+            kept.append(course)
+
+    changes = sum(sum(t.counts.values()) for t in transforms) - before
+    written = bool(changes) and not dry_run
+    if written:
+        save_json(file_path, kept, snapshot=snapshot)
+    return {"courses_in": len(courses), "courses_out": len(kept), "changes": changes, "written": written}
+
+
+def _transform_file(file_path: str, names: List[str], options: argparse.Namespace,
+                    dry_run: bool, snapshot: bool) -> Dict:
+    """run_file() with its own transform instances, for a worker process."""
+    transforms = build_transforms(names, options)
+    result = run_file(file_path, transforms, dry_run, snapshot)
+    result["counts"] = {t.name: dict(t.counts) for t in transforms}
+    return result
+
+
+def run(courses_dir: str, transforms: List[Transform], files: Optional[Sequence[str]] = None,
+        dry_run: bool = False, snapshot: bool = True, workers: Optional[int] = None) -> Dict:
+    """
+    Run the transforms over the course files (all of them unless files is given).
+
+    Files are processed in parallel by catalogue_runner.py, each worker with
+    its own instances of the transforms; their counters are added to the
+    given transforms.
+
+    Returns:
+        dict: files_checked, files_changed, files_written, files_failed, courses_in and courses_out
+    """
+    if files:
+        names = [os.path.basename(f) for f in files]
+    else:
+        names = sorted(f for f in os.listdir(courses_dir) if f.endswith('.json'))
+    options = transforms[0].options if transforms else None
+    job = partial(_transform_file, names=[t.name for t in transforms], options=options,
+                  dry_run=dry_run, snapshot=snapshot)
+    results = run_files(job, [os.path.join(courses_dir, name) for name in names], workers, echo=False)
+
+    by_name = {t.name: t for t in transforms}
+    for result in results:
+        if result.error:
+            print(f"Error processing {os.path.basename(result.file_path)}: {result.error}")
+            continue
+        for name, counts in result.result["counts"].items():
+            by_name[name].counts.update(counts)
+        result.result["changed"] = bool(result.result["changes"])
+
+    totals = combine(results)
+    return {
+        "files_checked": totals["files"] - totals["failed"],
+        "files_changed": totals.get("changed", 0),
+        "files_written": totals.get("written", 0),
+        "files_failed": totals["failed"],
+        "courses_in": totals.get("courses_in", 0),
+        "courses_out": totals.get("courses_out", 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run catalogue maintenance transforms in one pass per file")
+    parser.add_argument("--transforms", nargs="+", help="Transforms to run (default: all default transforms)")
+    parser.add_argument("--files", nargs="+", help="Course file names to process (default: all)")
+    parser.add_argument("--copy-from", help="Course file with bullet points for copy_bulletpoints")
+    parser.add_argument("--dry-run", action="store_true", help="Count changes without writing files")
+    parser.add_argument("--no-snapshot", action="store_true", help="Do not snapshot rewritten files")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CATALOGUE_WORKERS or one per core)")
+    parser.add_argument("--list", action="store_true", help="List the registered transforms")
+    parser.add_argument("--courses", help="Courses directory (default: found from the working directory)")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, cls in TRANSFORMS.items():
+            print(f"{name:<28}{'' if cls.default else '(opt-in) '}{cls.description}")
+        return
+
+    courses_dir = args.courses
+    if not courses_dir:
+        from generate_bullet_points_batch import find_courses_directory
+
+        courses_dir = find_courses_directory()
+        if not courses_dir:
+            sys.exit(1)
+    try:
+        transforms = build_transforms(args.transforms, args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    summary = run(courses_dir, transforms, args.files, args.dry_run, not args.no_snapshot, args.workers)
+
+    for transform in transforms:
+        counts = " ".join(f"{key}={value}" for key, value in sorted(transform.counts.items())) or "no changes"
+        print(f"{transform.name:<28}{counts}")
+    action = "would rewrite" if args.dry_run else "rewrote"
+    failed = f", {summary['files_failed']} failed" if summary["files_failed"] else ""
+    print(f"Checked {summary['files_checked']} files ({summary.get('courses_in', 0)} -> "
+          f"{summary.get('courses_out', 0)} courses), {action} {summary['files_changed']}{failed}")
+
+
+if __name__ == "__main__":
+    main()
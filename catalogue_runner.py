@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Run per-file catalogue work on every core.
+
+The batch scripts looped over the school files one at a time, and
+filter_unavailable_courses.py even slept between them. Each file is
+independent, so run_files() gives them to a process pool:
+
+- results come back in input order, whichever worker finishes first
+- what a worker prints is captured and echoed with its file's result, so
+  output reads the same as a sequential run
+- an exception fails only its own file, and is reported with its result
+
+Per-file functions must be module-level (they are pickled to the
+workers) and should return their counts, not write shared state. For
+example, fix_bullet_points_field_name.py returns the fixes and lets the
+parent put them in the enrichment store. combine() adds up the numeric
+fields of dict results for the summary.
+
+CATALOGUE_WORKERS sets the number of processes (default: one per core,
+1 runs in-process).
+"""
+
+import contextlib
+import io
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+
+class FileResult(NamedTuple):
+    file_path: str
+    result: object
+    output: str
+    error: Optional[str]
+
+
+def default_workers() -> int:
+    try:
+        return max(1, int(os.environ.get("CATALOGUE_WORKERS", "")))
+    except ValueError:
+        return os.cpu_count() or 1
+
+
+def _call(func: Callable, file_path: str) -> FileResult:
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            result, error = func(file_path), None
+        except Exception as e:
+            result, error = None, f"{type(e).__name__}: {e}"
+            traceback.print_exc(file=output)
+    return FileResult(file_path, result, output.getvalue(), error)
+
+
+def run_files(func: Callable, file_paths: Sequence[str], workers: Optional[int] = None,
+              echo: bool = True) -> List[FileResult]:
+    """
+    Call func(file_path) for each file across a process pool.
+
+    Args:
+        func: Module-level function (or functools.partial of one) taking a file path
+        file_paths: Files to process; results keep this order
+        workers: Number of processes (default: default_workers())
+        echo: Print each file's captured output as its result is collected
+
+    Returns:
+        list: A FileResult per file
+    """
+    workers = min(workers or default_workers(), max(len(file_paths), 1))
+    call = partial(_call, func)
+    results = []
+    if workers == 1:
+        mapped = map(call, file_paths)
+        pool = contextlib.nullcontext()
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        mapped = pool.map(call, file_paths)
+    with pool:
+        for i, result in enumerate(mapped, 1):
+            if echo:
+                print(f"[{i}/{len(file_paths)}] {os.path.basename(result.file_path)}")
+                if result.output:
+                    print(result.output, end="" if result.output.endswith("\n") else "\n")
+                if result.error:
+                    print(f"Failed: {result.error}")
+            results.append(result)
+    return results
+
+
+def combine(results: Sequence[FileResult]) -> Dict[str, float]:
+    """Files, failures and the sum of each numeric field over dict results (True counts as 1)."""
+    summary = {"files": len(results), "failed": sum(1 for r in results if r.error)}
+    for r in results:
+        if isinstance(r.result, dict):
+            for key, value in r.result.items():
+                if isinstance(value, (int, float)):
+                    summary[key] = summary.get(key, 0) + value
+    return summary
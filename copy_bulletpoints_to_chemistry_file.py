@@ -1,9 +1,11 @@
-import json
 import os
 import random
 import re
 from pathlib import Path
 
+import json_codec
+from snapshot_store import SnapshotStore, save_json, snapshot_dir_for, write_atomic
+
 # Constants
 SOURCE_FILE = "test_courses.json"
 TARGET_FILE = "scraped_data/courses/courses_School_of_Chemistry.json"
@@ -12,7 +14,7 @@ def load_bullet_points(source_file):
     """Load bullet points from the source file."""
     try:
         with open(source_file, 'r', encoding='utf-8') as f:
-            source_data = json.load(f)
+            source_data = json_codec.load(f)
         
         bullet_points = []
         for course in source_data:
@@ -39,24 +41,18 @@ def fix_chemistry_json(file_path):
         if content.strip().endswith('"prohibited_combinations":'):
             fixed_content = content.strip() + ' ""' + '\n  }\n]'
             
-            # Create a backup
-            backup_path = f"{file_path}.broken"
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            print(f"Created backup of broken file at {backup_path}")
-            
-            # Write the fixed content
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(fixed_content)
+            # Keep the broken version in the snapshot store and write the fixed content
+            SnapshotStore(snapshot_dir_for(file_path)).snapshot(file_path)
+            write_atomic(file_path, fixed_content.encode('utf-8'))
             print(f"Fixed JSON syntax in {file_path}")
             
             # Verify the fixed content
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
-                    json.load(f)
+                    json_codec.load(f)
                 print("Successfully fixed the JSON file")
                 return True
-            except json.JSONDecodeError as e:
+            except json_codec.DecodeError as e:
                 print(f"File is still not valid JSON after fixing: {e}")
                 return False
         else:
@@ -76,25 +72,18 @@ def update_chemistry_file(target_file, bullet_points):
     try:
         # Now load the fixed file
         with open(target_file, 'r', encoding='utf-8') as f:
-            target_data = json.load(f)
+            target_data = json_codec.load(f)
         
         course_count = len(target_data)
         print(f"Found {course_count} courses in {target_file}")
         
-        # Create a backup of the fixed file
-        backup_path = f"{target_file}.bak"
-        with open(backup_path, 'w', encoding='utf-8') as f:
-            json.dump(target_data, f, indent=2)
-        print(f"Created backup at {backup_path}")
-        
         # Update each course with a random set of bullet points
         for course in target_data:
             bp_set = random.choice(bullet_points)
             course["bulletpoints"] = bp_set
         
-        # Save the updated file
-        with open(target_file, 'w', encoding='utf-8') as f:
-            json.dump(target_data, f, indent=2)
+        # Save the updated file (the fixed version goes to the snapshot store)
+        save_json(target_file, target_data)
         
         print(f"Updated all {course_count} courses in {target_file}")
     except Exception as e:
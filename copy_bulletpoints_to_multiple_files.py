@@ -5,16 +5,17 @@ Script to copy bullet points from test_courses.json to multiple school JSON file
 This script:
 1. Reads bullet points from test_courses.json
 2. Adds bullet points to each course in the specified target files
-3. Saves the updated files with backups
+3. Saves the updated files, keeping previous versions in the snapshot store
 
 Usage:
   python3 copy_bulletpoints_to_multiple_files.py
 """
 
 import os
-import json
 import random
-import shutil
+
+import json_codec
+from snapshot_store import save_json
 
 # Path to the test courses file with bullet points
 TEST_FILE = "test_courses.json"
@@ -31,7 +32,7 @@ def load_test_bullet_points():
     """Load bullet points from the test file."""
     try:
         with open(TEST_FILE, 'r', encoding='utf-8') as f:
-            test_courses = json.load(f)
+            test_courses = json_codec.load(f)
             
         # Extract bullet points from test courses
         bullet_points = [course.get("bulletpoints", "") for course in test_courses if "bulletpoints" in course]
@@ -63,7 +64,7 @@ def process_target_file(file_path, bullet_points):
             
         # Read the file
         with open(file_path, 'r', encoding='utf-8') as f:
-            courses = json.load(f)
+            courses = json_codec.load(f)
         
         if not isinstance(courses, list):
             print(f"Error: {file_path} does not contain a list of courses")
@@ -73,11 +74,6 @@ def process_target_file(file_path, bullet_points):
         total_courses = len(courses)
         print(f"Found {total_courses} courses in {file_path}")
         
-        # Create backup
-        backup_path = f"{file_path}.bak"
-        shutil.copy2(file_path, backup_path)
-        print(f"Created backup at {backup_path}")
-        
         # For each course, add bullet points
         for course in courses:
             # Randomly select bullet points from test file
@@ -86,9 +82,8 @@ def process_target_file(file_path, bullet_points):
             # Add the bullet points field
             course["bulletpoints"] = selected_bullet_points
         
-        # Save the updated file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(courses, f, indent=2, ensure_ascii=False)
+        # Save the updated file (the previous version goes to the snapshot store)
+        save_json(file_path, courses)
             
         print(f"Updated all {total_courses} courses in {file_path}")
         
@@ -5,16 +5,17 @@ Script to copy bullet points from test_courses.json to a specific school JSON fi
 This script:
 1. Reads bullet points from test_courses.json
 2. Adds bullet points to each course in the target file
-3. Saves the updated file with a backup
+3. Saves the updated file, keeping the previous version in the snapshot store
 
 Usage:
   python3 copy_bulletpoints_to_specific_file.py
 """
 
 import os
-import json
 import random
-import shutil
+
+import json_codec
+from snapshot_store import save_json
 
 # Path to the test courses file with bullet points
 TEST_FILE = "test_courses.json"
@@ -26,7 +27,7 @@ def load_test_bullet_points():
     """Load bullet points from the test file."""
     try:
         with open(TEST_FILE, 'r', encoding='utf-8') as f:
-            test_courses = json.load(f)
+            test_courses = json_codec.load(f)
             
         # Extract bullet points from test courses
         bullet_points = [course.get("bulletpoints", "") for course in test_courses if "bulletpoints" in course]
@@ -58,7 +59,7 @@ def process_target_file(bullet_points):
             
         # Read the file
         with open(TARGET_FILE, 'r', encoding='utf-8') as f:
-            courses = json.load(f)
+            courses = json_codec.load(f)
         
         if not isinstance(courses, list):
             print(f"Error: {TARGET_FILE} does not contain a list of courses")
@@ -68,11 +69,6 @@ def process_target_file(bullet_points):
         total_courses = len(courses)
         print(f"Found {total_courses} courses in {TARGET_FILE}")
         
-        # Create backup
-        backup_path = f"{TARGET_FILE}.bak"
-        shutil.copy2(TARGET_FILE, backup_path)
-        print(f"Created backup at {backup_path}")
-        
         # For each course, add bullet points
         for course in courses:
             # Randomly select bullet points from test file
@@ -81,9 +77,8 @@ def process_target_file(bullet_points):
             # Add the bullet points field
             course["bulletpoints"] = selected_bullet_points
         
-        # Save the updated file
-        with open(TARGET_FILE, 'w', encoding='utf-8') as f:
-            json.dump(courses, f, indent=2, ensure_ascii=False)
+        # Save the updated file (the previous version goes to the snapshot store)
+        save_json(TARGET_FILE, courses)
             
         print(f"Updated all {total_courses} courses in {TARGET_FILE}")
         
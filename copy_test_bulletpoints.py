@@ -7,16 +7,17 @@ This script:
 2. For each school JSON file in the scraped_data/courses directory:
    a. Reads the file
    b. For each course, adds the bullet points
-   c. Saves the updated file with a backup
+   c. Saves the updated file, keeping the previous version in the snapshot store
 
 Usage:
   python3 copy_test_bulletpoints.py
 """
 
 import os
-import json
 import random
-import shutil
+
+import json_codec
+from snapshot_store import save_json
 
 # Path to the test courses file with bullet points
 TEST_FILE = "test_courses.json"
@@ -28,7 +29,7 @@ def load_test_bullet_points():
     """Load bullet points from the test file."""
     try:
         with open(TEST_FILE, 'r', encoding='utf-8') as f:
-            test_courses = json.load(f)
+            test_courses = json_codec.load(f)
             
         # Extract bullet points from test courses
         bullet_points = [course.get("bulletpoints", "") for course in test_courses if "bulletpoints" in course]
@@ -53,7 +54,7 @@ def process_school_file(file_path, bullet_points):
     try:
         # Read the file
         with open(file_path, 'r', encoding='utf-8') as f:
-            courses = json.load(f)
+            courses = json_codec.load(f)
         
         if not isinstance(courses, list):
             print(f"Error: {file_path} does not contain a list of courses")
@@ -71,16 +72,10 @@ def process_school_file(file_path, bullet_points):
             course["bulletpoints"] = selected_bullet_points
             updated_count += 1
         
-        # Create backup
-        backup_path = f"{file_path}.bak"
-        shutil.copy2(file_path, backup_path)
-        
-        # Save the updated file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(courses, f, indent=2, ensure_ascii=False)
+        # Save the updated file (the previous version goes to the snapshot store)
+        save_json(file_path, courses)
             
         print(f"Updated {updated_count} courses in {file_path}")
-        print(f"Created backup at {backup_path}")
         
         return True
         
@@ -103,7 +98,7 @@ def main():
             print(f"Error: Courses directory not found at {COURSES_DIR}")
             return
             
-        files = [f for f in os.listdir(COURSES_DIR) if f.endswith('.json') and not f.endswith('.bak')]
+        files = [f for f in os.listdir(COURSES_DIR) if f.endswith('.json')]
         
         if not files:
             print(f"No JSON files found in {COURSES_DIR}")
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+TF-IDF vector index of the course catalogue, for similar courses and text search.
+
+The build job turns every scraped course's name, keywords, summary and
+description into a sparse TF-IDF vector. It uses sublinear term frequency,
+smoothed IDF and L2 normalisation, and drops terms in only one course or in
+more than half of them. The index is stored as plain .npy arrays in
+course_index/ that are memory-mapped on load:
+
+- doc_indptr / doc_terms / doc_weights: the vectors by course (CSR)
+- term_indptr / term_docs / term_weights: the same vectors by term, i.e. an
+  inverted index (CSC)
+
+A query adds up the postings of its terms with np.bincount, so only courses
+sharing a term with the query are touched. With --lsa K, the build also
+computes a K-dimensional LSA projection with a randomized truncated SVD, done
+with sparse products so the term matrix is never densified. Queries then use
+one dense matrix product over the projected courses.
+
+The build also precomputes the most similar courses of every course into
+course_index/similar_courses.json (compact JSON), so they can be looked up
+without loading the index. Variants sharing the course's name are left out,
+since they are other offerings of the same course.
+
+Usage:
+    python3 course_index.py                          # Build the index and its similar courses
+    python3 course_index.py --lsa 128                # ... with an LSA projection
+    python3 course_index.py --query "machine learning for biology"
+    python3 course_index.py --similar INFR11130
+"""
+
+import argparse
+import glob
+import math
+import os
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from enrichment_store import load_enriched, open_stores, store_dir_for
+import json_codec
+from token_budget import content_words
+
+INDEX_DIR = "course_index"
+
+# Precomputed per-course similar courses, kept with the (untracked) index
+SIMILAR_PATH = os.path.join(INDEX_DIR, "similar_courses.json")
+
+# Name and keywords say more about a course than any one sentence of its description
+FIELD_WEIGHTS = (("name", 3), ("keywords", 2), ("summary", 1), ("course_description", 1))
+
+# Terms in more than this share of courses say nothing about a course
+MAX_DOCUMENT_FREQUENCY = 0.5
+
+SIMILAR_COUNT = 10
+
+_ARRAYS = ("doc_indptr", "doc_terms", "doc_weights", "term_indptr", "term_docs", "term_weights")
+
+
+def course_terms(course: dict) -> List[str]:
+    """Index terms of a course, with the name and keywords repeated by weight."""
+    terms = []
+    for field, weight in FIELD_WEIGHTS:
+        value = course.get(field) or ""
+        if not isinstance(value, str) or value in ("Not entered", "None"):
+            continue
+        if field == "keywords":
+            value = value.replace(",", " ")
+        terms.extend(content_words(value) * weight)
+    return terms
+
+
+def load_catalogue(courses_dir: str, enriched: bool = False) -> List[dict]:
+    """
+    One course per code, first occurrence first, from every course file.
+
+    With enriched, unpublished enrichments (enrichment_store.py) are joined in.
+    """
+    stores = open_stores(store_dir_for(courses_dir)) if enriched else []
+    courses, seen = [], set()
+    for path in sorted(glob.glob(os.path.join(courses_dir, "*.json"))):
+        for course in load_enriched(path, stores):
+            code = course.get("code")
+            if code and code not in seen:
+                seen.add(code)
+                courses.append(course)
+    return courses
+
+
+def _sparse_dot(indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray, dense: np.ndarray,
+                chunk: int = 512) -> np.ndarray:
+    """Compressed sparse matrix times a dense matrix, `chunk` sparse rows at a time."""
+    rows = len(indptr) - 1
+    result = np.zeros((rows, dense.shape[1]), dtype=np.float64)
+    for first in range(0, rows, chunk):
+        last = min(first + chunk, rows)
+        start, stop = indptr[first], indptr[last]
+        if start == stop:
+            continue
+        products = weights[start:stop, None] * dense[indices[start:stop]]
+        offsets = np.asarray(indptr[first:last]) - start
+        sums = np.add.reduceat(products, np.minimum(offsets, len(products) - 1), axis=0)
+        # reduceat returns the entry at an empty row's offset, not zero
+        sums[np.diff(indptr[first:last + 1]) == 0] = 0
+        result[first:last] = sums
+    return result
+
+
+def posting_positions(indptr: np.ndarray, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions of every entry of the given rows of a compressed matrix, and each row's length."""
+    starts = np.asarray(indptr[ids])
+    lengths = np.asarray(indptr[ids + 1]) - starts
+    return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum()), lengths
+
+
+def _write_array(index_dir: str, name: str, array: np.ndarray):
+    fd, temp_path = tempfile.mkstemp(dir=index_dir, suffix=".npy.tmp")
+    with os.fdopen(fd, 'wb') as f:
+        np.save(f, array)
+    os.chmod(temp_path, 0o644)
+    os.replace(temp_path, os.path.join(index_dir, f"{name}.npy"))
+
+
+def build_index(courses: List[dict], index_dir: str = INDEX_DIR, lsa_components: int = 0) -> Dict[str, int]:
+    """Compute and store the TF-IDF (and optionally LSA) vectors of the courses."""
+    documents = [Counter(course_terms(course)) for course in courses]
+    document_frequency = Counter(term for counts in documents for term in counts)
+    limit = MAX_DOCUMENT_FREQUENCY * len(documents)
+    vocabulary = sorted(term for term, df in document_frequency.items() if 2 <= df <= limit)
+    term_ids = {term: i for i, term in enumerate(vocabulary)}
+    idf = np.array([math.log((1 + len(documents)) / (1 + document_frequency[t])) + 1 for t in vocabulary])
+
+    indptr, terms, weights = [0], [], []
+    for counts in documents:
+        row = sorted((term_ids[t], c) for t, c in counts.items() if t in term_ids)
+        ids = np.array([i for i, _ in row], dtype=np.int32)
+        values = (1 + np.log(np.array([c for _, c in row], dtype=np.float64))) * idf[ids] if row else np.zeros(0)
+        norm = np.linalg.norm(values)
+        terms.append(ids)
+        weights.append(values / norm if norm else values)
+        indptr.append(indptr[-1] + len(row))
+    doc_indptr = np.array(indptr, dtype=np.int64)
+    doc_terms = np.concatenate(terms) if terms else np.zeros(0, dtype=np.int32)
+    doc_weights = np.concatenate(weights).astype(np.float32) if weights else np.zeros(0, dtype=np.float32)
+
+    # The inverted index is the same matrix sorted by term
+    doc_of = np.repeat(np.arange(len(documents), dtype=np.int32), np.diff(doc_indptr))
+    order = np.argsort(doc_terms, kind="stable")
+    term_indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(doc_terms, minlength=len(vocabulary)), out=term_indptr[1:])
+
+    os.makedirs(index_dir, exist_ok=True)
+    arrays = {"doc_indptr": doc_indptr, "doc_terms": doc_terms, "doc_weights": doc_weights,
+              "term_indptr": term_indptr, "term_docs": doc_of[order], "term_weights": doc_weights[order],
+              "idf": idf.astype(np.float32)}
+    if lsa_components:
+        components, projected = _lsa(doc_indptr, doc_terms, doc_weights, len(vocabulary), lsa_components)
+        arrays["lsa_components"] = components
+        arrays["lsa_courses"] = projected
+    elif os.path.exists(os.path.join(index_dir, "lsa_courses.npy")):
+        for name in ("lsa_components", "lsa_courses"):
+            os.remove(os.path.join(index_dir, f"{name}.npy"))
+    for name, array in arrays.items():
+        _write_array(index_dir, name, array)
+
+    meta = {"codes": [c.get("code") for c in courses], "names": [c.get("name", "") for c in courses],
+            "vocabulary": vocabulary, "lsa_components": lsa_components}
+    with open(os.path.join(index_dir, "meta.json"), 'w', encoding='utf-8') as f:
+        json_codec.dump(meta, f, pretty=False)
+    return {"courses": len(courses), "terms": len(vocabulary), "entries": int(len(doc_terms))}
+
+
+def _lsa(indptr: np.ndarray, terms: np.ndarray, weights: np.ndarray, vocabulary_size: int,
+         components: int, power_iterations: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Randomized truncated SVD of the course x term matrix X.
+
+    Returns:
+        tuple: (components x terms projection, L2-normalised courses x components vectors)
+    """
+    rows = len(indptr) - 1
+    components = min(components, rows, vocabulary_size)
+    # X^T as a compressed matrix, for products with X^T
+    order = np.argsort(terms, kind="stable")
+    doc_of = np.repeat(np.arange(rows), np.diff(indptr))
+    t_indptr = np.zeros(vocabulary_size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(terms, minlength=vocabulary_size), out=t_indptr[1:])
+
+    def x_dot(dense):
+        return _sparse_dot(indptr, terms, weights, dense)
+
+    def xt_dot(dense):
+        return _sparse_dot(t_indptr, doc_of[order], weights[order], dense)
+
+    rng = np.random.RandomState(0)
+    basis, _ = np.linalg.qr(x_dot(rng.normal(size=(vocabulary_size, components + 10))))
+    for _ in range(power_iterations):
+        basis, _ = np.linalg.qr(xt_dot(basis))
+        basis, _ = np.linalg.qr(x_dot(basis))
+    small = xt_dot(basis).T  # (components + 10) x terms
+    u, s, vt = np.linalg.svd(small, full_matrices=False)
+    projection = vt[:components]
+    projected = basis @ u[:, :components] * s[:components]
+    norms = np.linalg.norm(projected, axis=1, keepdims=True)
+    projected = np.divide(projected, norms, out=np.zeros_like(projected), where=norms > 0)
+    return projection.astype(np.float32), projected.astype(np.float32)
+
+
+class CourseIndex:
+    """A built index, memory-mapped from disk."""
+
+    def __init__(self, index_dir: str = INDEX_DIR):
+        with open(os.path.join(index_dir, "meta.json"), 'r', encoding='utf-8') as f:
+            meta = json_codec.load(f)
+        self.codes: List[str] = meta["codes"]
+        self.names: List[str] = meta["names"]
+        self.term_ids = {term: i for i, term in enumerate(meta["vocabulary"])}
+        self.rows = {code: i for i, code in enumerate(self.codes)}
+        # Courses with the same name share an id, to leave other offerings out of similar()
+        name_ids: Dict[str, int] = {}
+        self.name_ids = np.array([name_ids.setdefault(n.strip().lower(), len(name_ids)) for n in self.names])
+        for name in _ARRAYS + ("idf",):
+            setattr(self, name, np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r"))
+        self.lsa_components = self.lsa_courses = None
+        if meta.get("lsa_components"):
+            self.lsa_components = np.load(os.path.join(index_dir, "lsa_components.npy"), mmap_mode="r")
+            self.lsa_courses = np.load(os.path.join(index_dir, "lsa_courses.npy"), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def vectorize(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Term ids and L2-normalised TF-IDF weights of free text."""
+        counts = Counter(t for t in content_words(text) if t in self.term_ids)
+        if not counts:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        ids = np.array([self.term_ids[t] for t in counts], dtype=np.int32)
+        values = (1 + np.log(np.array(list(counts.values()), dtype=np.float64))) * self.idf[ids]
+        return ids, (values / np.linalg.norm(values)).astype(np.float32)
+
+    def course_vector(self, code: str) -> Tuple[np.ndarray, np.ndarray]:
+        row = self.rows[code]
+        start, stop = self.doc_indptr[row], self.doc_indptr[row + 1]
+        return np.asarray(self.doc_terms[start:stop]), np.asarray(self.doc_weights[start:stop])
+
+    def scores(self, ids: np.ndarray, values: np.ndarray, lsa: bool = False) -> np.ndarray:
+        """Cosine similarity of a vector to every course."""
+        if lsa and self.lsa_courses is not None:
+            projected = self.lsa_components[:, ids] @ values
+            norm = np.linalg.norm(projected)
+            return self.lsa_courses @ (projected / norm) if norm else np.zeros(len(self.codes), dtype=np.float32)
+        # Every posting of the query's terms, gathered in one go
+        positions, lengths = posting_positions(self.term_indptr, ids)
+        return np.bincount(self.term_docs[positions], weights=self.term_weights[positions] * np.repeat(values, lengths),
+                           minlength=len(self.codes))
+
+    def top(self, scores: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        """The k best scoring courses with a positive score (ties broken by catalogue order)."""
+        if k < len(scores):
+            best = np.argpartition(-scores, k - 1)[:k]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.lexsort((best, -scores[best]))]
+        return [(self.codes[i], round(float(scores[i]), 4)) for i in best if scores[i] > 0]
+
+    def search(self, text: str, k: int = 10, lsa: bool = False) -> List[Tuple[str, float]]:
+        """Courses most similar to free text."""
+        return self.top(self.scores(*self.vectorize(text), lsa=lsa), k)
+
+    def similar(self, code: str, k: int = SIMILAR_COUNT, lsa: bool = False) -> List[Tuple[str, float]]:
+        """Courses most similar to a course, leaving out offerings with the same name."""
+        row = self.rows[code]
+        if lsa and self.lsa_courses is not None:
+            scores = self.lsa_courses @ np.asarray(self.lsa_courses[row])
+        else:
+            scores = self.scores(*self.course_vector(code))
+        scores[self.name_ids == self.name_ids[row]] = 0  # Includes the course itself
+        return self.top(scores, k)
+
+
+def write_similar(index: CourseIndex, path: str = SIMILAR_PATH, k: int = SIMILAR_COUNT) -> int:
+    """Precompute every course's similar courses."""
+    lsa = index.lsa_courses is not None
+    similar = {}
+    for code in index.codes:
+        similar[code] = [{"code": other, "name": index.names[index.rows[other]], "score": score}
+                         for other, score in index.similar(code, k, lsa)]
+    json_codec.dump(similar, path, pretty=False)
+    return len(similar)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TF-IDF course similarity index")
+    parser.add_argument("--lsa", type=int, default=0, metavar="K", help="Also build a K-dimensional LSA projection")
+    parser.add_argument("--query", help="Search the built index for free text")
+    parser.add_argument("--similar", metavar="CODE", help="Show the courses most similar to a course")
+    parser.add_argument("-k", type=int, default=SIMILAR_COUNT)
+    parser.add_argument("--courses", default=os.path.join("scraped_data", "courses"))
+    args = parser.parse_args()
+
+    if args.query or args.similar:
+        index = CourseIndex()
+        lsa = index.lsa_courses is not None
+        if args.similar and args.similar not in index.rows:
+            print(f"Course {args.similar} is not in the index")
+            return
+        results = index.search(args.query, args.k, lsa) if args.query else index.similar(args.similar, args.k, lsa)
+        for code, score in results:
+            print(f"{score:.3f}  {code}  {index.names[index.rows[code]]}")
+        return
+
+    started = time.perf_counter()
+    summary = build_index(load_catalogue(args.courses), lsa_components=args.lsa)
+    built = time.perf_counter()
+    count = write_similar(CourseIndex())
+    print(f"Indexed {summary['courses']} courses over {summary['terms']} terms "
+          f"({summary['entries']} non-zero weights{f', LSA {args.lsa}' if args.lsa else ''}) "
+          f"in {built - started:.1f}s")
+    print(f"Wrote similar courses for {count} courses to {SIMILAR_PATH} in {time.perf_counter() - built:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""
+Course query service for the course browser: api/courses filters over HTTP.
+
+api/courses.ts reads and parses every course file on each request, then
+narrows the list with one linear filter() per query parameter, each doing
+substring checks on every course. This service loads every record of every
+course file once and answers the same parameters, by the same rules, from
+in-memory indexes:
+
+- one boolean mask per course (a bitmap) for the courses available this
+  year and for those with additional_class_delivery_information (the
+  "online" delivery method; "in-person" is the rest)
+- a value column with posting lists for schools, matched against the
+  distinct school names rather than the courses
+- search terms are matched against the vocabulary of the name, code and
+  description and the courses read from the matching words' posting
+  lists. Each term's courses and their scores are cached, so a search is a
+  few array additions and a stable sort by score. Year mentions are
+  extracted once at load
+- courses are kept in file order and pre-encoded as JSON, so a response
+  is a mask, an index and a join
+
+    GET /courses?schools=Informatics,Law&search=machine+learning&page=1&pageSize=50
+    -> {"courses": [...], "total": 412, "page": 1, "pageSize": 50, "version": "3f9c2a41d07e"}
+
+    GET /health
+    -> {"courses": 6944, "version": "3f9c2a41d07e", "loaded_seconds": 1.9}
+
+Like api/courses.ts, the years filter only applies when years is repeated
+(years=1&years=2), and subjects, creditLevels, minCredits, maxCredits,
+courseLevel and visitingStudents are ignored. A search term is matched as
+literal text, where api/courses.ts builds a RegExp from it and fails on
+terms such as "c++".
+
+Without page or pageSize every match is returned, as api/courses.ts does
+(for the whole catalogue that is about 20 MB of JSON, so the time goes into
+the join; repeated queries come from a small response cache).
+Each response has an ETag of the data version and the normalised query, so
+a client sending it back as If-None-Match gets 304 Not Modified. The data
+version is a hash of the course and enrichment file names, sizes and
+modification times, checked every RELOAD_SECONDS. When it changes, a new
+index is built in a thread and swapped in; requests keep being answered
+from the old one meanwhile.
+
+The service is a single asyncio event loop on the stdlib streams API
+(HTTP/1.1 with keep-alive), so it has no dependencies beyond NumPy.
+
+Usage:
+    python3 course_query_service.py [--port 8766]
+    python3 course_query_service.py --benchmark     # Query latency percentiles without HTTP
+"""
+
+import argparse
+import asyncio
+import bisect
+import glob
+import hashlib
+import os
+import random
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from course_index import posting_positions
+from enrichment_store import load_enriched, open_stores, store_dir_for
+import json_codec
+
+DEFAULT_PORT = 8766
+
+# Seconds between checks of the data version
+RELOAD_SECONDS = 2.0
+
+MAX_PAGE_SIZE = 1000
+
+# Term matches and response bodies kept per index
+TERM_CACHE_SIZE = 4096
+RESPONSE_CACHE_SIZE = 256
+
+# Longest request head accepted (request line and headers)
+MAX_HEAD_BYTES = 16384
+
+NOT_DELIVERED = "Not delivered this year"
+
+# Word characters as JavaScript's \b sees them
+_WORD = re.compile(r'\w+', re.ASCII)
+_LEADING_INTEGER = re.compile(r'\s*([+-]?\d+)')
+
+# The year mentions api/courses.ts looks for ("year 2", "2nd year", "y2", ...). It
+# checks them as substrings, so "year 12" also counts as year 1 (a prefix of the
+# number) and "21 year" as year 1 (a suffix)
+_YEAR_PREFIXED = re.compile(r'y(?:ear ?)?(\d+)')
+_YEAR_SUFFIXED = re.compile(r'(\d+)(?:st|nd|rd|th)? year')
+
+_STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+                405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def data_version(courses_dir: str) -> str:
+    """Hash of the names, sizes and modification times of the course and enrichment files."""
+    digest = hashlib.sha1()
+    paths = sorted(glob.glob(os.path.join(courses_dir, "*.json")))
+    paths += sorted(glob.glob(os.path.join(store_dir_for(courses_dir), "*.jsonl")))
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue  # Replaced between the listing and the stat; the next check sees it
+        digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def _text(course: dict, field: str) -> str:
+    value = course.get(field)
+    return value.lower() if isinstance(value, str) else ""
+
+
+def parse_int(value: str) -> Optional[int]:
+    """The integer value starts with, as JavaScript's parseInt reads it, or None."""
+    match = _LEADING_INTEGER.match(value)
+    return int(match.group(1)) if match else None
+
+
+def year_mentions(text: str) -> set:
+    """Every year number text mentions by the api/courses.ts patterns."""
+    years = set()
+    for match in _YEAR_PREFIXED.finditer(text):
+        digits = match.group(1)
+        years.update(int(digits[:i]) for i in range(1, len(digits) + 1))
+    for match in _YEAR_SUFFIXED.finditer(text):
+        digits = match.group(1)
+        years.update(int(digits[i:]) for i in range(len(digits)))
+    return years
+
+
+class Segments:
+    """Strings joined into one, so the ones containing a term are found with str.find in C."""
+
+    def __init__(self, texts: List[str]):
+        # Terms never contain NUL, so no match can span two texts
+        self.text = "\0".join(texts)
+        self.starts = [0]
+        for text in texts:
+            self.starts.append(self.starts[-1] + len(text) + 1)
+
+    def __len__(self) -> int:
+        return len(self.starts) - 1
+
+    def containing(self, term: str) -> List[int]:
+        """Positions of the texts that contain term."""
+        found = []
+        position = self.text.find(term)
+        while position != -1:
+            found.append(bisect.bisect_right(self.starts, position) - 1)
+            position = self.text.find(term, self.starts[found[-1] + 1])
+        return found
+
+
+class TextColumn:
+    """
+    One lowercase text per course with an inverted index of its words.
+
+    A term made only of word characters is inside a text exactly when it is
+    inside one of the text's words, and between word boundaries exactly when
+    it is one of them. So it is matched against the vocabulary (a few hundred
+    KB) and the courses come from the words' posting lists, stored by word as
+    in course_index.py. Other terms scan the texts.
+    """
+
+    def __init__(self, texts: List[str]):
+        self.values = texts
+        self.texts = Segments(texts)
+        word_ids: Dict[str, int] = {}
+        courses, words = [], []
+        for course, text in enumerate(texts):
+            for word in set(_WORD.findall(text)):
+                words.append(word_ids.setdefault(word, len(word_ids)))
+                courses.append(course)
+        words = np.array(words, dtype=np.int64)
+        self.word_ids = word_ids
+        self.vocabulary = Segments(list(word_ids))
+        self.word_courses = np.array(courses, dtype=np.int32)[np.argsort(words, kind="stable")]
+        self.word_indptr = np.zeros(len(word_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(words, minlength=len(word_ids)), out=self.word_indptr[1:])
+
+    def contains(self, term: str) -> np.ndarray:
+        """Mask of the courses whose text contains term."""
+        mask = np.zeros(len(self.texts), dtype=bool)
+        if _WORD.fullmatch(term):
+            ids = np.array(self.vocabulary.containing(term), dtype=np.int64)
+            positions, _ = posting_positions(self.word_indptr, ids)
+            mask[self.word_courses[positions]] = True
+        else:
+            mask[self.texts.containing(term)] = True
+        return mask
+
+    def whole_word(self, term: str, containing: np.ndarray) -> np.ndarray:
+        """Mask of the courses whose text matches \\bterm\\b; containing is contains(term)."""
+        if not _WORD.fullmatch(term):
+            pattern = re.compile(rf"\b{re.escape(term)}\b", re.ASCII)
+            mask = containing.copy()
+            for position in np.flatnonzero(containing):
+                mask[position] = pattern.search(self.values[position]) is not None
+            return mask
+        mask = np.zeros(len(self.texts), dtype=bool)
+        word = self.word_ids.get(term)
+        if word is not None:
+            mask[self.word_courses[self.word_indptr[word]:self.word_indptr[word + 1]]] = True
+        return mask
+
+
+class CourseQueryIndex:
+    """The catalogue with its filter indexes, in file order and pre-encoded; read-only once built."""
+
+    def __init__(self, courses_dir: str):
+        started = time.perf_counter()
+        self.version = data_version(courses_dir)
+        # Every record of every file, as api/courses.ts lists them; codes repeat
+        stores = open_stores(store_dir_for(courses_dir))
+        courses = []
+        for path in sorted(glob.glob(os.path.join(courses_dir, "*.json"))):
+            courses.extend(load_enriched(path, stores))
+        self.size = len(courses)
+        self.encoded = [json_codec.encode(c) for c in courses]
+
+        self.available = np.array([c.get("period") != NOT_DELIVERED for c in courses], dtype=bool)
+        self.online = np.array([bool(c.get("additional_class_delivery_information")) for c in courses], dtype=bool)
+
+        schools = [c.get("school_name") or c.get("school") or "" for c in courses]
+        self.school_names, self.school_ids = np.unique(np.array(schools, dtype=object), return_inverse=True)
+        self.school_names = [name.lower() for name in self.school_names]
+
+        # Year -> courses: the code's level digits (08 is year 1) or a year mention
+        self.years: Dict[int, np.ndarray] = {}
+        for position, c in enumerate(courses):
+            code_year = parse_int(str(c.get("code") or "")[4:6])
+            years = {code_year - 7} if code_year is not None else set()
+            for field in ("name", "course_description", "credit_level", "level"):
+                years |= year_mentions(_text(c, field))
+            for year in years:
+                self.years.setdefault(year, np.zeros(self.size, dtype=bool))[position] = True
+
+        self.names = TextColumn([_text(c, "name") or _text(c, "title") for c in courses])
+        self.codes = TextColumn([_text(c, "code") for c in courses])
+        self.descriptions = TextColumn([_text(c, "course_description") for c in courses])
+
+        self._terms: "OrderedDict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]" = OrderedDict()
+        self.responses: "OrderedDict[str, bytes]" = OrderedDict()
+        self.load_seconds = time.perf_counter() - started
+
+    def _term(self, term: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The positions of the courses with term in their name, code or
+        description, their scores for it and the mask of the courses with it
+        in their name.
+        """
+        found = self._terms.get(term)
+        if found is not None:
+            self._terms.move_to_end(term)
+            return found
+        in_name = self.names.contains(term)
+        in_code = self.codes.contains(term)
+        in_description = self.descriptions.contains(term)
+        positions = np.flatnonzero(in_name | in_code | in_description)
+
+        # The api/courses.ts score: the best of an equal name (1000), a name
+        # starting with the term (500), the term as a word (200) or anywhere in
+        # the name (100), plus 50 for the code and 20 or 10 for the description
+        scores = np.where(self.descriptions.whole_word(term, in_description), 20, in_description * 10)
+        scores += in_code * 50
+        name_words = self.names.whole_word(term, in_name)
+        for position in np.flatnonzero(in_name):
+            name = self.names.values[position]
+            scores[position] += (1000 if name == term else 500 if name.startswith(term)
+                                 else 200 if name_words[position] else 100)
+        found = self._terms[term] = (positions, scores[positions], in_name)
+        if len(self._terms) > TERM_CACHE_SIZE:
+            self._terms.popitem(last=False)
+        return found
+
+    def query(self, params: Dict[str, object]) -> np.ndarray:
+        """Positions of the matching courses in response order, for parameters from parse_params()."""
+        mask = np.ones(self.size, dtype=bool) if params["showUnavailableCourses"] else self.available.copy()
+        if params["schools"]:
+            ids = [i for i, name in enumerate(self.school_names) if any(s in name for s in params["schools"])]
+            mask &= np.isin(self.school_ids, ids)
+        if params["years"] is not None:
+            years = np.zeros(self.size, dtype=bool)
+            for year in params["years"]:
+                if year in self.years:
+                    years |= self.years[year]
+            mask &= years
+        if params["deliveryMethod"] == "online":
+            mask &= self.online
+        elif params["deliveryMethod"] == "in-person":
+            mask &= ~self.online
+        if params["search"] is None:
+            return np.flatnonzero(mask)
+
+        # A course matches if any term is in its name, code or description, and
+        # the matches are sorted by score, keeping file order between equal scores
+        found = np.zeros(self.size, dtype=bool)
+        scores = np.zeros(self.size, dtype=np.int64)
+        in_every_name = np.ones(self.size, dtype=bool)
+        for term in params["search"]:
+            positions, term_scores, in_name = self._term(term)
+            found[positions] = True
+            scores[positions] += term_scores
+            in_every_name &= in_name
+        scores[in_every_name] += 300
+        matches = np.flatnonzero(mask & found)
+        return matches[np.argsort(-scores[matches], kind="stable")]
+
+    def response(self, params: Dict[str, object], key: str) -> bytes:
+        """The JSON body for parsed parameters, cached under their normalised key."""
+        body = self.responses.get(key)
+        if body is not None:
+            self.responses.move_to_end(key)
+            return body
+        matches = self.query(params)
+        page_size = params["pageSize"] or len(matches)
+        first = (params["page"] - 1) * page_size
+        selected = matches[first:first + page_size] if page_size else matches[:0]
+        body = b"".join((b'{"courses":[', b",".join(self.encoded[i] for i in selected), b"],",
+                         json_codec.encode({"total": len(matches), "page": params["page"],
+                                            "pageSize": page_size, "version": self.version})[1:]))
+        self.responses[key] = body
+        if len(self.responses) > RESPONSE_CACHE_SIZE:
+            self.responses.popitem(last=False)
+        return body
+
+
+def _first(query: Dict[str, List[str]], name: str) -> str:
+    return query.get(name, [""])[0]
+
+
+def _integer(query: Dict[str, List[str]], name: str, minimum: int = 0) -> Optional[int]:
+    value = _first(query, name).strip()
+    if not value:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+    if number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    return number
+
+
+def parse_params(query_string: str) -> Tuple[Dict[str, object], str]:
+    """
+    The api/courses query parameters, parsed and normalised.
+
+    Returns:
+        tuple: (parameters, key) where equal keys always give the same response
+
+    Raises:
+        ValueError: If page or pageSize is not a valid number
+    """
+    query = parse_qs(query_string)
+    schools = _first(query, "schools")
+    search = _first(query, "search")
+    years = query.get("years", [])
+    params = {
+        "schools": sorted({school.lower() for school in schools.split(",")}) if schools else [],
+        # A search of only spaces has no terms, so nothing matches it
+        "search": [term for term in search.lower().split(" ") if term] if search else None,
+        # api/courses.ts filters by year only when years is an array, i.e. repeated;
+        # values that are not numbers match no course
+        "years": sorted({parse_int(year) for year in years} - {None}) if len(years) > 1 else None,
+        "deliveryMethod": _first(query, "deliveryMethod").lower(),
+        "showUnavailableCourses": _first(query, "showUnavailableCourses") == "true",
+        "page": _integer(query, "page", minimum=1) or 1,
+        "pageSize": min(_integer(query, "pageSize", minimum=1) or 0, MAX_PAGE_SIZE),
+    }
+    return params, json_codec.dumps(params)
+
+
+class CourseQueryService:
+    """The current index and the HTTP/1.1 connection handler of the event loop."""
+
+    def __init__(self, courses_dir: str):
+        self.courses_dir = courses_dir
+        self.index = CourseQueryIndex(courses_dir)
+
+    async def watch(self, interval: float = RELOAD_SECONDS):
+        """Rebuild the index in a thread whenever the data version changes."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await loop.run_in_executor(None, data_version, self.courses_dir) == self.index.version:
+                    continue
+                index = await loop.run_in_executor(None, CourseQueryIndex, self.courses_dir)
+            except Exception as e:  # A file caught mid-write; the next check retries
+                print(f"Reload failed, still serving {self.index.version}: {type(e).__name__}: {e}")
+                continue
+            print(f"Reloaded {index.size} courses (version {index.version}) in {index.load_seconds:.1f}s")
+            self.index = index
+
+    def respond(self, method: str, target: str, headers: Dict[str, str]) -> Tuple[int, bytes, Dict[str, str]]:
+        """(status, body, extra headers) for one request."""
+        if method not in ("GET", "HEAD"):
+            return 405, json_codec.encode({"error": "Method not allowed"}), {"Allow": "GET, HEAD"}
+        url = urlsplit(target)
+        index = self.index
+        if url.path == "/health":
+            return 200, json_codec.encode({"courses": index.size, "version": index.version,
+                                           "loaded_seconds": round(index.load_seconds, 2)}), {}
+        if url.path not in ("/courses", "/api/courses"):
+            return 404, json_codec.encode({"error": f"Unknown path {url.path}"}), {}
+        try:
+            params, key = parse_params(url.query)
+        except ValueError as e:
+            return 400, json_codec.encode({"error": str(e)}), {}
+
+        etag = f'"{index.version}-{hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]}"'
+        extra = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in (tag.strip() for tag in headers.get("if-none-match", "").split(",")):
+            return 304, b"", extra
+        started = time.perf_counter()
+        body = index.response(params, key)
+        extra["Server-Timing"] = f"query;dur={(time.perf_counter() - started) * 1000:.2f}"
+        return 200, body, extra
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 400, json_codec.encode({"error": "Request head too large"}), {}, True)
+                    break
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break  # The client closed the connection
+
+                lines = head.decode("latin-1").split("\r\n")
+                request = lines[0].split(" ")
+                if len(request) != 3:
+                    await self._send(writer, 400, json_codec.encode({"error": "Malformed request line"}), {}, True)
+                    break
+                method, target, version = request
+                headers = {}
+                for line in lines[1:]:
+                    name, separator, value = line.partition(":")
+                    if separator:
+                        headers[name.strip().lower()] = value.strip()
+                length = headers.get("content-length", "0")
+                if length.isdigit() and int(length):
+                    await reader.readexactly(int(length))  # GET bodies are ignored
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                try:
+                    status, body, extra = self.respond(method, target, headers)
+                except Exception as e:
+                    status, body, extra = 500, json_codec.encode({"error": f"{type(e).__name__}: {e}"}), {}
+                await self._send(writer, status, body, extra, not keep_alive, method == "HEAD")
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, status: int, body: bytes, extra: Dict[str, str],
+                    close: bool, head_only: bool = False):
+        lines = [f"HTTP/1.1 {status} {_STATUS_TEXT[status]}"]
+        if status != 304:
+            lines += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in extra.items()]
+        if close:
+            lines.append("Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if status != 304 and not head_only:
+            writer.write(body)
+        await writer.drain()
+
+
+def benchmark(index: CourseQueryIndex, count: int = 2000, seed: int = 0) -> Dict[str, float]:
+    """
+    Latency percentiles in ms of parse, query and encode for random filter
+    combinations, one page each, without the response cache.
+    """
+    rng = random.Random(seed)
+    schools = [name for name in index.school_names if name]
+    words = [w for w in index.names.vocabulary.text.split("\0") if len(w) > 3]
+    choices = [
+        lambda: "schools=" + ",".join(rng.sample(schools, rng.randint(1, 3))),
+        lambda: "&".join(f"years={year}" for year in rng.sample(range(1, 6), 2)),
+        lambda: "deliveryMethod=" + rng.choice(["online", "in-person"]),
+        lambda: "showUnavailableCourses=true",
+        lambda: "search=" + "+".join(rng.sample(words, rng.randint(1, 2))),
+    ]
+    timings = []
+    for _ in range(count):
+        query = "&".join(choice() for choice in rng.sample(choices, rng.randint(1, 4)))
+        query += f"&pageSize={rng.choice([20, 50, 100])}"
+        started = time.perf_counter()
+        params, key = parse_params(query)
+        index.responses.pop(key, None)
+        index.response(params, key)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings = np.array(timings)
+    return {"p50": float(np.percentile(timings, 50)), "p99": float(np.percentile(timings, 99)),
+            "max": float(timings.max())}
+
+
+async def serve(service: CourseQueryService, host: str, port: int):
+    server = await asyncio.start_server(service.handle, host, port, limit=MAX_HEAD_BYTES)
+    print(f"Course query service listening on http://{host}:{port}/courses?...")
+    async with server:
+        watcher = asyncio.create_task(service.watch())
+        try:
+            await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Course browser query service")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--courses", default=os.path.join("scraped_data", "courses"))
+    parser.add_argument("--benchmark", action="store_true", help="Print query latency percentiles and exit")
+    args = parser.parse_args()
+
+    service = CourseQueryService(args.courses)
+    print(f"Indexed {service.index.size} courses (version {service.index.version}) "
+          f"in {service.index.load_seconds:.1f}s")
+    if args.benchmark:
+        results = benchmark(service.index)
+        print(f"p50 {results['p50']:.2f}ms   p99 {results['p99']:.2f}ms   max {results['max']:.2f}ms")
+        return
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
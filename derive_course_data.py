@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Derive course cohort and campus tables from the raw university exports.
+
+This replaces the "processCSV copy.Rmd" notebook, which produced
+courseCohortData.csv and courseLocationData.csv by hand for merge_data.py to
+read back. The same tables are derived here directly from:
+
+- the assessment-structure export (courseAssStructures.csv), for cohort sizes
+- the timetable export (the TT child-data CSV), for campuses
+
+Each derived table is cached together with the SHA-256 hashes of the files it
+was built from, so a table is only recomputed when one of its inputs changes.
+If the assessment-structure export is not available, the previously derived
+courseCohortData.csv is used as the cohort source instead.
+
+Usage:
+    python3 derive_course_data.py                # Derive (or reuse) the tables and summarise
+    python3 derive_course_data.py --write-csv    # Also write the CSVs the R notebook produced
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from timetable import TT_CSV_PATH, _MULTI_VALUE_SPLIT, course_code_from_module_id
+
+# Raw assessment-structure export (the R notebook read it as "courseAssStructures.cv")
+ASSESSMENT_CSV_PATH = "courseAssStructures.csv"
+
+# Previously derived cohort table, used when the raw export is not available
+COHORT_CSV_PATH = "courseCohortData.csv"
+LOCATION_CSV_PATH = "courseLocationData.csv"
+
+# Derived tables are cached here, one file per table
+DERIVED_CACHE_DIR = ".derived_cache"
+
+# Bump whenever the derivation logic changes so old caches are ignored
+DERIVATION_VERSION = 1
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_csv(path: str, usecols: List[str]) -> pd.DataFrame:
+    """Read selected CSV columns, trying the same encodings as merge_data.py."""
+    encodings = ['utf-8', 'latin1', 'cp1252']
+    for encoding in encodings:
+        try:
+            return pd.read_csv(path, usecols=usecols, encoding=encoding, dtype=str, keep_default_na=False)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Could not decode {path} with any of {encodings}")
+
+
+def _cached(table: str, inputs: List[str], derive):
+    """
+    Return a derived table, recomputing it only when its inputs have changed.
+
+    Args:
+        table (str): Name of the derived table
+        inputs (list): Paths of the files the table is derived from
+        derive (callable): Function that computes the table
+
+    Returns:
+        The derived table
+    """
+    key = hashlib.sha256(
+        "\n".join([str(DERIVATION_VERSION), table] + [file_hash(path) for path in inputs]).encode()
+    ).hexdigest()
+    cache_path = os.path.join(DERIVED_CACHE_DIR, f"{table}.pickle")
+
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('key') == key:
+                return cached['data']
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            pass  # Unreadable cache, derive again
+
+    print(f"Deriving {table} from {', '.join(inputs)}")
+    data = derive()
+    os.makedirs(DERIVED_CACHE_DIR, exist_ok=True)
+    with open(cache_path, 'wb') as f:
+        pickle.dump({'key': key, 'data': data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return data
+
+
+def derive_cohorts(assessment_csv: str = ASSESSMENT_CSV_PATH) -> Dict[str, Optional[int]]:
+    """
+    Cohort size per course from the assessment-structure export.
+
+    The export has one row per assessment component, so (course, cohort) pairs
+    are de-duplicated as the R notebook did with distinct().
+    """
+    if os.path.exists(assessment_csv):
+        frame = _read_csv(assessment_csv, ['Course Code', 'Course Cohort'])
+        frame.columns = ['courseCode', 'cohortSize']
+    else:
+        frame = _read_csv(COHORT_CSV_PATH, ['courseCode', 'cohortSize'])
+
+    frame = frame.drop_duplicates(subset='courseCode', keep='first')
+    sizes = pd.to_numeric(frame['cohortSize'], errors='coerce')
+    return {
+        code.strip(): (None if pd.isna(size) else int(size))
+        for code, size in zip(frame['courseCode'], sizes)
+        if code.strip()
+    }
+
+
+def derive_campuses(tt_csv: str = TT_CSV_PATH) -> Dict[str, List[str]]:
+    """
+    Campuses each course is taught on, from the timetable export.
+
+    Campus names lose their leading asterisk, multi-room bookings
+    ("*Easter Bush,*Easter Bush") are split and unallocated rooms ("0") dropped.
+    """
+    frame = _read_csv(tt_csv, ['Module ID', 'Campus']).drop_duplicates()
+    campuses = defaultdict(set)
+    for module_id, campus_cell in zip(frame['Module ID'], frame['Campus']):
+        code = course_code_from_module_id(module_id)
+        if not code:
+            continue
+        for campus in _MULTI_VALUE_SPLIT.split(campus_cell):
+            campus = campus.strip().lstrip('*')
+            if campus and campus != '0':
+                campuses[code].add(campus)
+    return {code: sorted(names) for code, names in campuses.items()}
+
+
+def _cohort_inputs() -> List[str]:
+    return [ASSESSMENT_CSV_PATH if os.path.exists(ASSESSMENT_CSV_PATH) else COHORT_CSV_PATH]
+
+
+def load_course_tables() -> Dict[str, dict]:
+    """
+    Derive (or reuse cached) cohort and campus tables.
+
+    Returns:
+        dict: {'cohorts': {code: cohort size}, 'campuses': {code: [campus, ...]}}
+    """
+    cohort_inputs = _cohort_inputs()
+    return {
+        'cohorts': _cached('cohorts', cohort_inputs, lambda: derive_cohorts()),
+        'campuses': _cached('campuses', [TT_CSV_PATH], lambda: derive_campuses()),
+    }
+
+
+def write_csvs(tables: Dict[str, dict]):
+    """Write the tables in the layout the R notebook produced."""
+    cohorts = tables['cohorts']
+    if os.path.exists(ASSESSMENT_CSV_PATH):
+        # Only overwrite the cohort CSV when it was not itself the source
+        pd.DataFrame({'courseCode': list(cohorts), 'cohortSize': list(cohorts.values())}) \
+            .to_csv(COHORT_CSV_PATH, index=False)
+        print(f"Wrote {COHORT_CSV_PATH}")
+
+    rows = [(code, cohorts[code], campus)
+            for code, campuses in tables['campuses'].items() if code in cohorts
+            for campus in campuses]
+    pd.DataFrame(rows, columns=['courseCode', 'cohortSize', 'Campus']).to_csv(LOCATION_CSV_PATH, index=False)
+    print(f"Wrote {LOCATION_CSV_PATH}")
+
+
+def main():
+    tables = load_course_tables()
+    cohorts, campuses = tables['cohorts'], tables['campuses']
+    print(f"Cohort sizes for {len(cohorts)} courses (from {_cohort_inputs()[0]})")
+    print(f"Campuses for {len(campuses)} courses (from {TT_CSV_PATH})")
+    split = sum(1 for names in campuses.values() if len(names) > 1)
+    print(f"Courses taught on more than one campus: {split}")
+
+    if "--write-csv" in sys.argv:
+        write_csvs(tables)
+
+
+if __name__ == "__main__":
+    main()
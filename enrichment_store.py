@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Sidecar stores for course enrichments, joined into the course files at publish time.
+
+Bullet points, cleaned learning_activities and renamed fields used to be
+written by rewriting a whole school file (several MB) together with a .bak
+copy, an fsync and a read-back to verify. One edited course cost the whole
+file twice. Instead, each enriched field now has its own append-only store
+in scraped_data/enrichments/<field>.jsonl, one line per course:
+
+    {"file": "school_of_physics.json", "code": "PHYS08016", "period": "Semester 1", "occurrence": 0,
+     "value": "..."}
+
+Some files hold several records with the same code (the same course page
+scraped twice, with different details), so a record is identified by its
+code, its period and how many earlier records in the file share both (see
+record_keys()). The last line for a record wins, so an edit costs a few
+hundred bytes. Readers that want the enriched view join the stores lazily with
+load_enriched(). publish() joins every store into the course files that the
+frontend reads. Only files whose content actually changes are rewritten,
+each with an atomic replace after a snapshot (snapshot_store.py).
+
+Course popularity already lives in a keyed sidecar, merged_course_data.json,
+which the course API joins on request. popularity_store.py keeps its history.
+
+Usage:
+    python3 enrichment_store.py              # List stores and their sizes
+    python3 enrichment_store.py --publish    # Join all stores into the course files
+    python3 enrichment_store.py --compact    # Drop superseded lines from the stores
+"""
+
+import os
+import sys
+import tempfile
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import json_codec
+from snapshot_store import save_json, write_atomic
+
+ENRICHMENT_DIR = os.path.join("scraped_data", "enrichments")
+
+# Fields made redundant when a store supplies a value (the old bullet point field name)
+SUPERSEDED_FIELDS = {"bulletpoints": ("bullet_points",)}
+
+
+# (code, period, occurrence) of a course record within its file
+RecordKey = Tuple[str, str, int]
+
+
+def record_key(course: dict, seen: Counter) -> RecordKey:
+    """The key of the next record of a file; seen counts the (code, period) pairs before it."""
+    code_period = (course.get("code") or "", course.get("period") or "")
+    occurrence = seen[code_period]
+    seen[code_period] += 1
+    return code_period + (occurrence,)
+
+
+def record_keys(courses: List[dict]) -> List[RecordKey]:
+    """
+    The key of each record of a course file, in order.
+
+    The period is part of the key so that dropping the courses not delivered
+    this year leaves the keys of the remaining records unchanged.
+    """
+    seen = Counter()
+    return [record_key(course, seen) for course in courses]
+
+
+def store_dir_for(courses_dir: str) -> str:
+    """The enrichment directory beside a courses directory (scraped_data/enrichments)."""
+    return os.path.join(os.path.dirname(os.path.abspath(courses_dir)), "enrichments")
+
+
+class EnrichmentStore:
+    """Values of one course field, keyed by course file name and record key."""
+
+    def __init__(self, field: str, store_dir: str = ENRICHMENT_DIR):
+        self.field = field
+        self.path = os.path.join(store_dir, f"{field}.jsonl")
+        self._values: Dict[Tuple[str, RecordKey], object] = {}
+        self.lines = 0
+        if os.path.exists(self.path):
+            # Skipping a line cut short by a crash
+            for entry in json_codec.iter_jsonl(self.path, skip_invalid=True):
+                self.lines += 1
+                if "occurrence" not in entry:
+                    continue  # Keyed by code alone, which can name several records; compact() drops it
+                record = (entry["code"], entry["period"], entry["occurrence"])
+                self._values[(entry["file"], record)] = entry["value"]
+        self._file = None  # Opened on the first put
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, file_path: str, record: RecordKey, default=None):
+        return self._values.get((os.path.basename(file_path), tuple(record)), default)
+
+    def put(self, file_path: str, record: RecordKey, value) -> bool:
+        """
+        Record a course's value, unless it is already stored.
+
+        Args:
+            file_path (str): Course file the record is in
+            record (tuple): The record's key from record_keys()
+            value: New value of the store's field
+
+        Returns:
+            bool: True if a line was appended
+        """
+        key = (os.path.basename(file_path), tuple(record))
+        if key in self._values and self._values[key] == value:
+            return False
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json_codec.dumps(self._entry(key, value)) + "\n")
+        self._file.flush()
+        self._values[key] = value
+        self.lines += 1
+        return True
+
+    @staticmethod
+    def _entry(key: Tuple[str, RecordKey], value) -> dict:
+        name, (code, period, occurrence) = key
+        return {"file": name, "code": code, "period": period, "occurrence": occurrence, "value": value}
+
+    def apply(self, file_path: str, courses: List[dict], records: Optional[List[RecordKey]] = None) -> int:
+        """
+        Join stored values into a file's courses.
+
+        Args:
+            file_path (str): Course file the courses are from
+            courses (list): The file's courses, or those left after dropping
+                undelivered ones
+            records (list): Their record keys, when courses is only part of
+                the file (default: record_keys(courses))
+
+        Returns:
+            int: Number of courses changed
+        """
+        name = os.path.basename(file_path)
+        changed = 0
+        for course, record in zip(courses, records or record_keys(courses)):
+            key = (name, record)
+            if key not in self._values:
+                continue
+            superseded = [f for f in SUPERSEDED_FIELDS.get(self.field, ()) if f in course]
+            if course.get(self.field) != self._values[key] or superseded:
+                course[self.field] = self._values[key]
+                for f in superseded:
+                    del course[f]
+                changed += 1
+        return changed
+
+    def sync(self):
+        """Force appended lines to disk."""
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+
+    def compact(self):
+        """Rewrite the store with one line per course."""
+        self.close()
+        if self.lines == len(self._values):
+            return
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for key, value in sorted(self._values.items()):
+                f.write(json_codec.dumps(self._entry(key, value)) + "\n")
+        os.replace(temp_path, self.path)
+        self.lines = len(self._values)
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+
+def open_stores(store_dir: str = ENRICHMENT_DIR) -> List[EnrichmentStore]:
+    """Every store in the directory, in field name order."""
+    if not os.path.isdir(store_dir):
+        return []
+    return [EnrichmentStore(name[:-len(".jsonl")], store_dir)
+            for name in sorted(os.listdir(store_dir)) if name.endswith(".jsonl")]
+
+
+def load_enriched(file_path: str, stores: Optional[List[EnrichmentStore]] = None) -> List[dict]:
+    """A course file's courses with every enrichment joined in."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        courses = json_codec.load(f)
+    if stores is None:
+        stores = open_stores(store_dir_for(os.path.dirname(file_path)))
+    for store in stores:
+        store.apply(file_path, courses)
+    return courses
+
+
+def write_json_atomic(file_path: str, data):
+    """Write JSON to a temporary file beside file_path and rename it into place."""
+    write_atomic(file_path, json_codec.encode(data, pretty=True))
+
+
+def publish(courses_dir: str, store_dir: Optional[str] = None) -> Dict[str, int]:
+    """
+    Join every store into the course files, rewriting only the files that change.
+
+    Returns:
+        dict: files_checked, files_written and courses_changed counts
+    """
+    stores = open_stores(store_dir or store_dir_for(courses_dir))
+    summary = {"files_checked": 0, "files_written": 0, "courses_changed": 0}
+    for name in sorted(os.listdir(courses_dir)):
+        if not name.endswith(".json"):
+            continue
+        file_path = os.path.join(courses_dir, name)
+        with open(file_path, 'r', encoding='utf-8') as f:
+            courses = json_codec.load(f)
+        summary["files_checked"] += 1
+        if not isinstance(courses, list):
+            continue
+        changed = sum(store.apply(file_path, courses) for store in stores)
+        if changed:
+            save_json(file_path, courses)
+            summary["files_written"] += 1
+            summary["courses_changed"] += changed
+    return summary
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ["--publish"]:
+        from generate_bullet_points_batch import find_courses_directory
+
+        courses_dir = find_courses_directory()
+        if not courses_dir:
+            sys.exit(1)
+        summary = publish(courses_dir)
+        print(f"Checked {summary['files_checked']} files, rewrote {summary['files_written']} "
+              f"({summary['courses_changed']} course fields updated)")
+        return
+
+    store_dir = ENRICHMENT_DIR
+    if not os.path.isdir(store_dir):
+        from generate_bullet_points_batch import find_courses_directory
+
+        courses_dir = find_courses_directory()
+        if courses_dir:
+            store_dir = store_dir_for(courses_dir)
+    stores = open_stores(store_dir)
+    if not stores:
+        print(f"No enrichment stores in {store_dir}")
+    for store in stores:
+        if args[:1] == ["--compact"]:
+            before = store.lines
+            store.compact()
+            print(f"{store.field}: {before} -> {store.lines} lines")
+        else:
+            print(f"{store.field}: {len(store)} courses ({store.lines} lines, "
+                  f"{os.path.getsize(store.path) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Offline extractive bullet points: three salient sentences from the course text.
+
+A zero-API alternative to the OpenAI generators. Each course's sentences are
+vectorised with TF-IDF (sentences as documents), ranked with TextRank over
+their cosine similarity graph, and the top sentences are picked greedily while
+skipping near-duplicates of those already chosen. The chosen sentences keep
+their original order and are shortened to bullet length.
+
+It is used as:
+- a backend of its own (BULLET_BACKEND=extractive, or --backend extractive
+  for generate_bullet_points_async.py), needing no API key
+- the per-course fallback when an API call fails, instead of writing the
+  "Error generating course information" placeholder
+
+Usage:
+    python3 extractive_bullets.py path/to/courses.json    # Print bullets for a file
+    python3 extractive_bullets.py --benchmark              # Time the whole catalogue
+"""
+
+import argparse
+import glob
+import os
+import re
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+import json_codec
+from llm_client import MISSING_POINT, select_course_text
+from token_budget import content_words, split_sentences
+
+# Bullets longer than this are cut at a word boundary
+MAX_BULLET_CHARS = 220
+
+# Sentences shorter than this many words are rarely informative ("Not entered.")
+MIN_SENTENCE_WORDS = 4
+
+# A candidate this similar to an already chosen sentence is skipped
+DUPLICATE_SIMILARITY = 0.5
+
+DAMPING = 0.85
+
+# Bullet characters and "1)" style numbering left over from the scraped layout
+_LEADING_NOISE = re.compile(r"^(?:[\s•*\-]+|\d+\)\s*)+")
+
+
+def _shorten(sentence: str, limit: int = MAX_BULLET_CHARS) -> str:
+    if len(sentence) <= limit:
+        return sentence
+    return sentence[:limit].rsplit(' ', 1)[0].rstrip(',;:') + "…"
+
+
+def rank_sentences(sentences: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """TextRank scores of sentences, plus their normalised TF-IDF vectors."""
+    words = [content_words(s) for s in sentences]
+    vocabulary = {w: i for i, w in enumerate(sorted({w for sentence_words in words for w in sentence_words}))}
+    counts = np.zeros((len(sentences), max(len(vocabulary), 1)))
+    for row, sentence_words in enumerate(words):
+        for w in sentence_words:
+            counts[row, vocabulary[w]] += 1
+
+    document_frequency = (counts > 0).sum(axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    vectors = counts * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+    weights = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, weights, out=np.full_like(similarity, 1.0 / len(sentences)),
+                           where=weights > 0)
+    scores = np.full(len(sentences), 1.0 / len(sentences))
+    for _ in range(30):
+        updated = (1 - DAMPING) / len(sentences) + DAMPING * transition.T @ scores
+        if np.abs(updated - scores).sum() < 1e-6:
+            scores = updated
+            break
+        scores = updated
+    return scores, vectors
+
+
+def extract_sentences(text: str, count: int = 3) -> List[str]:
+    """The `count` most salient, mutually distinct sentences of text, in original order."""
+    sentences = [_LEADING_NOISE.sub('', s).strip() for s in split_sentences(text or "")]
+    if len(sentences) < count:
+        # Short texts are often semicolon-separated topic lists
+        sentences = [part.strip() for s in sentences for part in s.split(';')]
+    sentences = [s for s in sentences if len(s.split()) >= MIN_SENTENCE_WORDS]
+    if len(sentences) <= count:
+        return sentences
+
+    scores, vectors = rank_sentences(sentences)
+    # Opening sentences usually say what the course is about
+    scores = scores * np.where(np.arange(len(sentences)) < 2, 1.2, 1.0)
+
+    chosen = []
+    for index in np.argsort(-scores):
+        if all(vectors[index] @ vectors[other] < DUPLICATE_SIMILARITY for other in chosen):
+            chosen.append(int(index))
+            if len(chosen) == count:
+                break
+    return [sentences[i] for i in sorted(chosen)]
+
+
+def extractive_bullets(text: str) -> str:
+    """Three "• " prefixed bullet points taken from the text, in the generators' format."""
+    points = [f"• {_shorten(s)}" for s in extract_sentences(text)]
+    while len(points) < 3:
+        points.append(MISSING_POINT)
+    return '\n'.join(points)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline extractive course bullet points")
+    parser.add_argument("file", nargs="?", help="Course JSON file to print bullets for")
+    parser.add_argument("--benchmark", action="store_true", help="Time bullet extraction over the whole catalogue")
+    parser.add_argument("--courses", default=os.path.join("scraped_data", "courses"))
+    args = parser.parse_args()
+
+    if args.benchmark:
+        texts = []
+        for path in sorted(glob.glob(os.path.join(args.courses, "*.json"))):
+            texts.extend(select_course_text(c) for c in json_codec.iter_records(path)
+                         if c.get("period") != "Not delivered this year")
+        started = time.perf_counter()
+        for text in texts:
+            extractive_bullets(text)
+        print(f"{len(texts)} courses in {time.perf_counter() - started:.2f}s")
+        return
+
+    if not args.file:
+        parser.error("give a course file or --benchmark")
+    for course in json_codec.iter_records(args.file):
+        if course.get("period") == "Not delivered this year":
+            continue
+        print(f"{course.get('code', '')} {course.get('name', '')}")
+        print(extractive_bullets(select_course_text(course)))
+        print()
+
+
+if __name__ == "__main__":
+    main()
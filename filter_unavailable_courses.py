@@ -8,6 +8,9 @@ This script:
 3. Saves the filtered courses back to the original files
 4. Reports statistics on how many courses were removed
 
+Files are processed in parallel (catalogue_runner.py; CATALOGUE_WORKERS sets
+the number of processes).
+
 Usage: 
   python3 filter_unavailable_courses.py
 
@@ -18,7 +21,9 @@ To process a single file:
 import os
 import json
 import sys
-import time
+
+from catalogue_pipeline import FilterUnavailable, run_file
+from catalogue_runner import run_files
 
 def find_courses_directory():
     """
@@ -50,6 +55,10 @@ def find_courses_directory():
 def filter_unavailable_courses(file_path):
     """
     Filter out courses with period "Not delivered this year"
+
+    Runs the filter_unavailable transform of catalogue_pipeline.py on its own;
+    run catalogue_pipeline.py to apply it together with the other maintenance
+    transforms in a single pass.
     
     Args:
         file_path (str): Path to the JSON file
@@ -57,77 +66,27 @@ def filter_unavailable_courses(file_path):
     Returns:
         tuple: (success, courses_removed)
     """
+    if not os.path.exists(file_path):
+        print(f"Error: File not found - {file_path}")
+        return False, 0
+
+    transform = FilterUnavailable(None)
     try:
-        # Check if file exists
-        if not os.path.exists(file_path):
-            print(f"Error: File not found - {file_path}")
-            return False, 0
-            
-        print(f"Reading file: {file_path}")
-        # Read the JSON file
-        with open(file_path, 'r', encoding='utf-8') as file:
-            try:
-                courses = json.load(file)
-            except json.JSONDecodeError as e:
-                print(f"Error: Invalid JSON format in {file_path} - {e}")
-                return False, 0
-        
-        # Ensure courses is a list
-        if not isinstance(courses, list):
-            print(f"Error: Expected a list of courses in {file_path}, but got {type(courses)}")
-            return False, 0
-        
-        total_courses_original = len(courses)
-        
-        # Filter out courses with period "Not delivered this year"
-        filtered_courses = []
-        removed_courses = 0
-        
-        for course in courses:
-            period = course.get("period", "")
-            if period == "Not delivered this year":
-                removed_courses += 1
-                # Print details for the first few removed courses as examples
-                if removed_courses <= 3 or removed_courses % 20 == 0:
-                    course_name = course.get('name', course.get('title', 'Unknown'))
-                    print(f"Removing non-delivered course: {course_name}")
-            else:
-                filtered_courses.append(course)
-        
-        # Only save if courses were removed
-        if removed_courses > 0:
-            print(f"\nFiltered out {removed_courses} courses that are not delivered this year from {file_path}")
-            print(f"Original course count: {total_courses_original}")
-            print(f"Remaining courses: {total_courses_original - removed_courses}")
-            
-            # Create a backup of the original file
-            backup_path = f"{file_path}.bak"
-            try:
-                with open(backup_path, 'w', encoding='utf-8') as backup_file:
-                    with open(file_path, 'r', encoding='utf-8') as original_file:
-                        backup_file.write(original_file.read())
-                print(f"Created backup file: {backup_path}")
-            except Exception as e:
-                print(f"Warning: Could not create backup file: {e}")
-                
-            # Write updated data back to the file (filtered courses only)
-            try:
-                with open(file_path, 'w', encoding='utf-8') as file:
-                    json.dump(filtered_courses, file, indent=2, ensure_ascii=False)
-                    file.flush()
-                    os.fsync(file.fileno())  # Force write to disk
-                print(f"File saved successfully!")
-            except Exception as e:
-                print(f"ERROR SAVING FILE: {e}")
-                return False, removed_courses
-        else:
-            print(f"No courses to remove from {file_path}")
-        
-        return True, removed_courses
-        
-    except Exception as e:
-        print(f"Unexpected error processing file: {e}")
+        result = run_file(file_path, [transform])
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON format in {file_path} - {e}")
         return False, 0
+    except (OSError, ValueError) as e:
+        print(f"Error processing {file_path}: {e}")
+        return False, transform.counts["removed"]
+
+    removed_courses = transform.counts["removed"]
+    if removed_courses > 0:
+        print(f"Filtered out {removed_courses} courses not delivered this year from {file_path} "
+              f"({result['courses_in']} -> {result['courses_out']}, previous version in the snapshot store)")
+    else:
+        print(f"No courses to remove from {file_path}")
+    return True, removed_courses
 
 def process_all_files():
     """
@@ -154,24 +113,11 @@ def process_all_files():
     print("===============")
     
     total_files = len(json_files)
-    successful_files = 0
-    total_courses_removed = 0
-    
-    for i, file in enumerate(json_files, 1):
-        file_path = os.path.join(courses_dir, file)
-        print(f"\nProcessing file {i}/{total_files}: {file}")
-        
-        success, courses_removed = filter_unavailable_courses(file_path)
-        
-        if success:
-            successful_files += 1
-            total_courses_removed += courses_removed
-        
-        print(f"File {i}/{total_files} completed: {courses_removed} courses removed")
-        
-        # Add a short delay between files for readability
-        if i < total_files:
-            time.sleep(0.2)
+    file_paths = [os.path.join(courses_dir, file) for file in sorted(json_files)]
+    results = run_files(filter_unavailable_courses, file_paths)
+
+    successful_files = sum(1 for r in results if r.result and r.result[0])
+    total_courses_removed = sum(r.result[1] for r in results if r.result)
     
     # Print summary
     print("\n===============")
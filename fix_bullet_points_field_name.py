@@ -4,8 +4,11 @@ Script to fix the field name in course JSON files, changing "bullet_points" to "
 
 This script:
 1. Processes one or all JSON files in the courses directory
-2. For each course with "bullet_points", moves the content to "bulletpoints"
-3. Saves the updated JSON files
+2. For each course with "bullet_points" but no "bulletpoints", records the
+   content as its "bulletpoints" in the enrichment store (enrichment_store.py);
+   files are read in parallel (catalogue_runner.py)
+3. Leaves the course files untouched; enrichment_store.py --publish writes
+   "bulletpoints" into them and drops the old field
 
 Usage:
     python3 fix_bullet_points_field_name.py [path/to/file.json]
@@ -13,16 +16,42 @@ Usage:
 If no file is specified, it will process all JSON files in the courses directory.
 """
 
-import json
 import os
 import sys
 
-def fix_field_name(file_path):
+from catalogue_runner import run_files
+from enrichment_store import EnrichmentStore, record_keys, store_dir_for
+import json_codec
+
+def pending_fixes(file_path):
+    """
+    Courses in a file with "bullet_points" but no "bulletpoints".
+
+    Reads the file only, so it can run in a worker process.
+
+    Returns:
+        list: (record key, bullet_points) pairs (see enrichment_store.record_keys)
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        courses = json_codec.load(file)
+    if not isinstance(courses, list):
+        raise ValueError(f"Expected a list of courses in {file_path}, but got {type(courses)}")
+    return [(record, course["bullet_points"]) for course, record in zip(courses, record_keys(courses))
+            if course.get("bullet_points") and not course.get("bulletpoints")]
+
+def record_fixes(file_path, fixes, store):
+    """Put fixes not already recorded into the store; returns the number recorded."""
+    return sum(1 for record, value in fixes
+               if store.get(file_path, record) is None and store.put(file_path, record, value))
+
+def fix_field_name(file_path, store=None):
     """
     Fix the field name in a JSON file, changing "bullet_points" to "bulletpoints".
     
     Args:
         file_path (str): Path to the JSON file
+        store (EnrichmentStore): "bulletpoints" store to record the fixes in
+            (defaults to the one beside the file's directory)
         
     Returns:
         tuple: (success, fixed_count)
@@ -34,80 +63,25 @@ def fix_field_name(file_path):
             return False, 0
             
         print(f"Reading file: {file_path}")
-        # Read the JSON file
-        with open(file_path, 'r', encoding='utf-8') as file:
-            try:
-                courses = json.load(file)
-            except json.JSONDecodeError as e:
-                print(f"Error: Invalid JSON format in {file_path} - {e}")
-                return False, 0
+        own_store = store is None
+        if own_store:
+            store = EnrichmentStore("bulletpoints", store_dir_for(os.path.dirname(os.path.abspath(file_path))))
         
-        # Ensure courses is a list
-        if not isinstance(courses, list):
-            print(f"Error: Expected a list of courses in {file_path}, but got {type(courses)}")
-            return False, 0
+        # Record the content as "bulletpoints"; publishing removes the old field
+        fixed_count = record_fixes(file_path, pending_fixes(file_path), store)
         
-        fixed_count = 0
-        
-        # Process each course
-        for course in courses:
-            # Check if course has "bullet_points" but not "bulletpoints"
-            if "bullet_points" in course and course["bullet_points"]:
-                if "bulletpoints" not in course or not course["bulletpoints"]:
-                    # Move content from "bullet_points" to "bulletpoints"
-                    course["bulletpoints"] = course["bullet_points"]
-                    # Remove the old field to avoid duplicates
-                    del course["bullet_points"]
-                    fixed_count += 1
-        
-        # Only save if we fixed any courses
+        if own_store:
+            store.close()
         if fixed_count > 0:
-            print(f"Fixed {fixed_count} courses in {file_path}")
-            
-            # Create a backup of the original file
-            backup_path = f"{file_path}.bak"
-            try:
-                with open(backup_path, 'w', encoding='utf-8') as backup_file:
-                    with open(file_path, 'r', encoding='utf-8') as original_file:
-                        backup_file.write(original_file.read())
-                print(f"Created backup file: {backup_path}")
-            except Exception as e:
-                print(f"Warning: Could not create backup file: {e}")
-                
-            # Write updated data back to the file
-            try:
-                with open(file_path, 'w', encoding='utf-8') as file:
-                    json.dump(courses, file, indent=2, ensure_ascii=False)
-                    file.flush()
-                    os.fsync(file.fileno())  # Force write to disk
-                print(f"File saved successfully!")
-            except Exception as e:
-                print(f"ERROR SAVING FILE: {e}")
-                return False, fixed_count
-                
-            # Verify the save worked
-            try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    verify_courses = json.load(file)
-                    
-                # Check if the field name was fixed
-                verified = True
-                for course in verify_courses:
-                    if "bullet_points" in course and "bulletpoints" not in course:
-                        verified = False
-                        break
-                
-                if verified:
-                    print("Verification successful: Field names were fixed correctly")
-                else:
-                    print("WARNING: Verification failed - Some courses still have the wrong field name")
-            except Exception as e:
-                print(f"Error during verification: {e}")
+            print(f"Recorded {fixed_count} fixes for {file_path} in {store.path}")
         else:
             print(f"No courses needed fixing in {file_path}")
             
         return True, fixed_count
         
+    except json_codec.DecodeError as e:
+        print(f"Error: Invalid JSON format in {file_path} - {e}")
+        return False, 0
     except Exception as e:
         print(f"Unexpected error processing file: {e}")
         return False, 0
@@ -168,24 +142,28 @@ def main():
         total_files = len(json_files)
         successful_files = 0
         total_fixed = 0
+        store = EnrichmentStore("bulletpoints", store_dir_for(courses_dir))
         
-        for i, file in enumerate(json_files, 1):
-            file_path = os.path.join(courses_dir, file)
-            print(f"\nProcessing file {i}/{total_files}: {file}")
-            
-            success, fixed_count = fix_field_name(file_path)
-            
-            if success:
-                successful_files += 1
-                total_fixed += fixed_count
-            
-            print(f"File {i}/{total_files} completed")
+        # Files are read in parallel; only this process writes to the store
+        file_paths = [os.path.join(courses_dir, file) for file in sorted(json_files)]
+        for result in run_files(pending_fixes, file_paths, echo=False):
+            if result.error:
+                print(f"Failed to read {os.path.basename(result.file_path)}: {result.error}")
+                continue
+            successful_files += 1
+            fixed_count = record_fixes(result.file_path, result.result, store)
+            total_fixed += fixed_count
+            if fixed_count:
+                print(f"Recorded {fixed_count} fixes for {os.path.basename(result.file_path)}")
+        
+        store.close()
         
         # Print summary
         print("\n=== SUMMARY ===")
         print(f"Total files processed: {total_files}")
         print(f"Successfully processed files: {successful_files}")
         print(f"Total courses fixed: {total_fixed}")
+        print("Run enrichment_store.py --publish to write the fixes into the course files")
         print("===============")
 
 if __name__ == "__main__":
@@ -2,6 +2,8 @@
 """
 Generate bullet points for courses in a JSON file using OpenAI API.
 Also filters out courses with "period" set to "Not delivered this year".
+Results are journaled as they arrive (see generation_log.py), so re-running
+after an interruption resumes where it stopped.
 
 Usage:
     python generate_bullet_points.py path/to/courses.json
@@ -10,61 +12,17 @@ Requirements:
     pip install openai
 """
 
-import json
 import os
 import sys
-from openai import OpenAI
 
-def generate_bullet_points(text):
-    """
-    Generate 3 bullet points about a course using OpenAI API.
-    
-    Args:
-        text (str): The course description or summary
-        
-    Returns:
-        str: Three bullet points as a single string
-    """
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-    
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {"role": "system", "content": "You are a helpful academic assistant that creates concise bullet points about university courses."},
-                {"role": "user", "content": f"Generate EXACTLY 3 bullet points that summarize the key aspects of this course. Return ONLY the 3 bullet points without any additional text or numbering. Each bullet point should be prefixed with '• ' and be on a new line.\n\nCourse information: {text}"}
-            ],
-            temperature=0.7,
-            max_tokens=300,
-        )
-        
-        # Extract the bullet points from the response
-        bullet_points = response.choices[0].message.content.strip()
-        
-        # Ensure we have exactly 3 bullet points
-        points = bullet_points.split('\n')
-        filtered_points = [p.strip() for p in points if p.strip()]
-        
-        # Add bullet prefix if not present
-        formatted_points = []
-        for point in filtered_points:
-            if not point.startswith('•'):
-                point = f"• {point}"
-            formatted_points.append(point)
-        
-        # Pad or truncate to exactly 3 bullet points
-        while len(formatted_points) < 3:
-            formatted_points.append("• Additional information not available")
-        
-        formatted_points = formatted_points[:3]  # Limit to 3 points
-        
-        return '\n'.join(formatted_points)
-        
-    except Exception as e:
-        print(f"Error calling OpenAI API: {e}")
-        return "• Error generating course information\n• Please try again later\n• Contact support if the problem persists"
+from bullet_cache import BulletCache
+from generation_log import GenerationLog, input_key
+import json_codec
+from llm_client import (BACKEND, NO_INFORMATION, cached_course_bullets, generate_recorded_bullets, metrics,
+                        record_run, select_course_text)
+from snapshot_store import save_json
 
-def process_json_file(file_path):
+def process_json_file(file_path, log=None, cache=None):
     """
     Process a JSON file containing course information:
     1. Filter out courses with period "Not delivered this year"
@@ -72,7 +30,12 @@ def process_json_file(file_path):
     
     Args:
         file_path (str): Path to the JSON file
+        log (GenerationLog): Journal of results not yet saved, if any
+        cache (BulletCache): Records which courses' bullets were extracted
+            locally, so they are retried (default: the shared bullet cache)
     """
+    if cache is None:
+        cache = BulletCache()
     try:
         # Check if file exists
         if not os.path.exists(file_path):
@@ -83,8 +46,8 @@ def process_json_file(file_path):
         # Read the JSON file
         with open(file_path, 'r', encoding='utf-8') as file:
             try:
-                courses = json.load(file)
-            except json.JSONDecodeError as e:
+                courses = json_codec.load(file)
+            except json_codec.DecodeError as e:
                 print(f"Error: Invalid JSON format in {file_path} - {e}")
                 sys.exit(1)
         
@@ -116,70 +79,68 @@ def process_json_file(file_path):
         updated_courses = 0
         skipped_courses = 0
         
+        # Restore results generated by an interrupted run but never saved
+        if log is not None:
+            resumed = log.replay(file_path, filtered_courses)
+            if resumed:
+                print(f"Resumed {resumed} courses from the generation log")
+                updated_courses += resumed
+        
         # Process each remaining course
         for i, course in enumerate(filtered_courses, 1):
             # Status update
             course_name = course.get('name', course.get('title', 'Unknown'))
             print(f"Processing course {i}/{total_courses}: {course_name}")
             
-            # Check if course already has bullet points
-            if "bullet_points" in course and course["bullet_points"]:
-                print(f"  - Skipping: Course already has bullet points")
-                skipped_courses += 1
+            # Check if course already has bullet points (locally extracted ones are retried)
+            cached = cached_course_bullets(course, course.get("bullet_points"), cache)
+            if cached is not None:
+                if cached != course.get("bullet_points"):
+                    course["bullet_points"] = cached
+                    print(f"  - Reusing cached bullet points")
+                    updated_courses += 1
+                else:
+                    print(f"  - Skipping: Course already has bullet points")
+                    skipped_courses += 1
                 continue
                 
             # Get text to analyze
-            course_description = course.get("course_description", "")
-            summary = course.get("summary", "")
-            
-            # Skip course description if it's "Not entered" or empty
-            if not course_description or course_description.strip() == "" or course_description == "Not entered":
-                text_to_analyze = summary
-            else:
-                text_to_analyze = course_description
+            text_to_analyze = select_course_text(course)
             
             # If no text available, set default message
             if not text_to_analyze or text_to_analyze.strip() == "":
-                course["bullet_points"] = "• No information available\n• Please check the course catalog\n• Contact the course administrator"
+                course["bullet_points"] = NO_INFORMATION
                 print(f"  - No description or summary available")
                 updated_courses += 1
                 continue
                 
             # Generate bullet points
             print(f"  - Generating bullet points...")
-            bullet_points = generate_bullet_points(text_to_analyze)
+            bullet_points = generate_recorded_bullets(text_to_analyze, course.get("code", ""), cache)
             
             # Add bullet points to course
             course["bullet_points"] = bullet_points
+            if log is not None:
+                log.record(file_path, course.get("code", ""), input_key(course), bullet_points, "bullet_points")
             updated_courses += 1
             print(f"  - Added bullet points: {bullet_points}")
         
         print(f"\nSaving changes to file: {file_path}")
-        # Create a backup of the original file
-        backup_path = f"{file_path}.bak"
-        try:
-            with open(backup_path, 'w', encoding='utf-8') as backup_file:
-                with open(file_path, 'r', encoding='utf-8') as original_file:
-                    backup_file.write(original_file.read())
-            print(f"Created backup file: {backup_path}")
-        except Exception as e:
-            print(f"Warning: Could not create backup file: {e}")
-            
-        # Write updated data back to the file (using filtered courses)
+        # Snapshot the original file and replace it atomically
         try:
-            with open(file_path, 'w', encoding='utf-8') as file:
-                json.dump(filtered_courses, file, indent=2, ensure_ascii=False)
-                file.flush()
-                os.fsync(file.fileno())  # Force write to disk
+            save_json(file_path, filtered_courses)
             print(f"File saved successfully!")
         except Exception as e:
             print(f"ERROR SAVING FILE: {e}")
             sys.exit(1)
+        if log is not None:
+            log.mark_saved(file_path)
+            log.compact()
             
         # Verify the save worked
         try:
             with open(file_path, 'r', encoding='utf-8') as file:
-                verify_courses = json.load(file)
+                verify_courses = json_codec.load(file)
                 
             # Check if the filtered number of courses matches
             if len(verify_courses) == total_courses:
@@ -196,16 +157,19 @@ def process_json_file(file_path):
         print(f"- Courses updated with bullet points: {updated_courses}")
         print(f"- Courses skipped (already had bullet points): {skipped_courses}")
         print(f"File saved: {file_path}")
+        metrics.report()
+        record_run("generate_bullet_points")
         
     except Exception as e:
         print(f"Unexpected error processing file: {e}")
         sys.exit(1)
 
 def main():
-    # Check if OpenAI API key is set
-    if not os.environ.get("OPENAI_API_KEY"):
+    # Check if OpenAI API key is set (the extractive backend runs without one)
+    if BACKEND == "openai" and not os.environ.get("OPENAI_API_KEY"):
         print("Error: OPENAI_API_KEY environment variable is not set.")
         print("Please set it by running: export OPENAI_API_KEY=your_api_key")
+        print("Or generate bullets offline with: export BULLET_BACKEND=extractive")
         sys.exit(1)
     
     # Check command line arguments
@@ -214,7 +178,7 @@ def main():
         sys.exit(1)
     
     file_path = sys.argv[1]
-    process_json_file(file_path)
+    process_json_file(file_path, GenerationLog())
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+Generate bullet points for every course file concurrently using asyncio.
+
+generate_bullet_points_batch.py calls the API one course at a time and sleeps
+between courses and files, so a full catalogue run spends most of its time
+waiting. This script sends many requests at once instead:
+
+1. Loads every course JSON file in the scraped_data/courses directory
+2. Queues every delivered course whose text has no cached bullet points
+   (see bullet_cache.py), so changed descriptions are regenerated and
+   unchanged ones cost nothing
+3. Generates bullet points with up to --concurrency requests in flight, while
+   a limiter keeps both requests-per-minute and tokens-per-minute under the
+   account limits
+   Courses whose texts are near-duplicates (see near_duplicates.py, over
+   --dedupe-threshold similarity) share one request, whose bullets are fanned
+   out to every member of the cluster
+   With --pack N, N courses share one request and the model answers with a
+   JSON object keyed by course code; courses missing from or malformed in
+   the answer are retried on their own
+4. Retries rate-limited and failed requests with exponential backoff, and
+   falls back to extractive bullets (extractive_bullets.py) for courses whose
+   requests still fail; --backend extractive skips the API altogether
+5. Records every result in the "bulletpoints" enrichment store
+   (enrichment_store.py) as it arrives, so an interrupted run resumes where
+   it stopped; `python3 enrichment_store.py --publish` joins the store into
+   the course files
+   With --in-place, each file is instead rewritten once all of its courses
+   are done, with results journaled to generation_log.py in the meantime
+
+Usage:
+  python3 generate_bullet_points_async.py [--concurrency 16] [--rpm 500] [--tpm 200000] [--pack 8]
+
+To test locally without API credit, start mock_openai_server.py and run:
+  OPENAI_API_KEY=test python3 generate_bullet_points_async.py --base-url http://localhost:8001/v1
+
+Requirements:
+  pip install openai
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import openai
+from openai import AsyncOpenAI
+
+from bullet_cache import BULLET_CACHE_PATH, BulletCache, cache_key
+from generate_bullet_points_batch import find_courses_directory
+from extractive_bullets import extractive_bullets
+from enrichment_store import EnrichmentStore, record_keys, store_dir_for
+from generation_log import GenerationLog
+import json_codec
+from llm_client import (BACKEND, BACKENDS, GENERATION_ERROR, MAX_COMPLETION_TOKENS, MODEL, NO_INFORMATION,
+                        PACKED_COMPLETION_TOKENS_PER_COURSE, PACKED_SYSTEM_PROMPT, PACKED_USER_PROMPT,
+                        SYSTEM_PROMPT, TEMPERATURE, USER_PROMPT, budgeted_text, build_messages,
+                        build_packed_messages, close_async_clients, format_bullet_points, get_async_client,
+                        is_placeholder, ledger, metrics, parse_packed_response, prepare_text, record_run,
+                        select_course_text)
+from near_duplicates import DEFAULT_THRESHOLD, cluster
+from snapshot_store import save_json
+from token_budget import count_tokens
+
+# Upper bound on course text per packed request, so a pack of long descriptions stays a sensible size
+MAX_PACK_CHARS = 24000
+
+# Errors worth retrying: rate limits, timeouts, dropped connections and 5xx responses
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError,
+                    openai.InternalServerError)
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter for requests per minute and tokens per minute.
+
+    Both buckets refill continuously. A request waits until one request slot
+    and its estimated token count are available; the estimate is corrected
+    with the real usage once the response arrives.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    async def acquire(self, tokens: int):
+        """Wait until a request using `tokens` tokens may be sent."""
+        tokens = min(tokens, self.tokens_per_minute)  # An oversized request still gets through eventually
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                wait = max((1 - self._requests) * 60 / self.requests_per_minute,
+                           (tokens - self._tokens) * 60 / self.tokens_per_minute)
+                await asyncio.sleep(wait)
+
+    def correct(self, estimated: int, actual: int):
+        """Return over-estimated tokens to the bucket (or charge under-estimates)."""
+        self._tokens = min(self.tokens_per_minute, self._tokens + estimated - actual)
+
+
+def estimate_tokens(text: str) -> int:
+    """Prompt tokens plus the completion budget of a single-course request."""
+    return count_tokens(SYSTEM_PROMPT + USER_PROMPT + text) + MAX_COMPLETION_TOKENS
+
+
+class AsyncBulletGenerator:
+    """Concurrent bullet point generation with bounded concurrency and rate limiting."""
+
+    def __init__(self, client: AsyncOpenAI, concurrency: int, limiter: RateLimiter, max_retries: int = 5):
+        self.client = client
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.stats = {"retries": 0, "course_failures": 0, "packed_requests": 0, "fallbacks": 0}
+
+    async def _complete(self, messages: List[dict], max_tokens: int, estimated: int, **options) -> Optional[str]:
+        """Send one chat completion request with rate limiting and retries; None if it fails."""
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self.limiter.acquire(estimated)
+                started = time.perf_counter()
+                try:
+                    response = await self.client.chat.completions.create(
+                        model=MODEL,
+                        messages=messages,
+                        temperature=TEMPERATURE,
+                        max_tokens=max_tokens,
+                        **options,
+                    )
+                except RETRYABLE_ERRORS as e:
+                    metrics.record(time.perf_counter() - started, failed=True)
+                    self.limiter.correct(estimated, 0)
+                    if attempt == self.max_retries:
+                        print(f"Error calling OpenAI API after {attempt + 1} attempts: {e}")
+                        return None
+                    self.stats["retries"] += 1
+                    await asyncio.sleep(min(2 ** attempt, 30))
+                    continue
+                except openai.OpenAIError as e:
+                    metrics.record(time.perf_counter() - started, failed=True)
+                    self.limiter.correct(estimated, 0)
+                    print(f"Error calling OpenAI API: {e}")
+                    return None
+
+                usage = response.usage
+                metrics.record(time.perf_counter() - started, usage)
+                if usage is not None:
+                    self.limiter.correct(estimated, usage.total_tokens)
+                return response.choices[0].message.content or ""
+        return None
+
+    async def generate(self, text: str) -> str:
+        content = await self._complete(build_messages(text), MAX_COMPLETION_TOKENS, estimate_tokens(text))
+        if content is None:
+            self.stats["course_failures"] += 1
+            return GENERATION_ERROR
+        return format_bullet_points(content)
+
+    async def generate_group(self, items: List[Tuple[str, str, str]]) -> Dict[str, str]:
+        """
+        Bullet points for (cache key, course code, text) items, packed into one request.
+
+        Courses missing from the packed answer or with malformed bullets are
+        retried with single-course requests.
+
+        Returns:
+            dict: Cache key -> bullet points
+        """
+        if len(items) == 1:
+            key, _, text = items[0]
+            return {key: await self.generate(text)}
+
+        # Course codes label the courses in the prompt and the JSON answer, so they must be unique
+        labels = []
+        for _, code, _ in items:
+            label, suffix = code or "COURSE", 1
+            while label in labels:
+                suffix += 1
+                label = f"{code or 'COURSE'}-{suffix}"
+            labels.append(label)
+
+        packed = [(label, text) for label, (_, _, text) in zip(labels, items)]
+        max_tokens = PACKED_COMPLETION_TOKENS_PER_COURSE * len(items)
+        estimated = (count_tokens(PACKED_SYSTEM_PROMPT + PACKED_USER_PROMPT)
+                     + sum(count_tokens(text) + 10 for _, text in packed) + max_tokens)
+        content = await self._complete(build_packed_messages(packed), max_tokens, estimated,
+                                       response_format={"type": "json_object"})
+        parsed = parse_packed_response(content, labels) if content is not None else {}
+        self.stats["packed_requests"] += 1
+
+        results = {key: parsed[label] for label, (key, _, _) in zip(labels, items) if label in parsed}
+        missing = [(key, text) for key, _, text in items if key not in results]
+        if missing:
+            self.stats["fallbacks"] += len(missing)
+            fallback = await asyncio.gather(*(self.generate(text) for _, text in missing))
+            results.update((key, bullets) for (key, _), bullets in zip(missing, fallback))
+        return results
+
+
+def pack_items(pending: Dict[str, Tuple[str, str]], pack_size: int,
+               max_chars: int = MAX_PACK_CHARS) -> List[List[Tuple[str, str, str]]]:
+    """Group pending (key -> (code, text)) inputs into packs of at most pack_size courses."""
+    groups, group, chars = [], [], 0
+    for key, (code, text) in pending.items():
+        if group and (len(group) >= pack_size or chars + len(text) > max_chars):
+            groups.append(group)
+            group, chars = [], 0
+        group.append((key, code, text))
+        chars += len(text)
+    if group:
+        groups.append(group)
+    return groups
+
+
+def load_courses(file_path: str) -> Optional[List[dict]]:
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            courses = json_codec.load(file)
+    except (OSError, json_codec.DecodeError) as e:
+        print(f"Error: Could not read {file_path} - {e}")
+        return None
+    if not isinstance(courses, list):
+        print(f"Error: Expected a list of courses in {file_path}, but got {type(courses)}")
+        return None
+    return courses
+
+
+def save_courses(file_path: str, courses: List[dict]) -> bool:
+    """Snapshot the original file and replace it with the updated courses."""
+    try:
+        save_json(file_path, courses)
+    except Exception as e:
+        print(f"ERROR SAVING FILE {file_path}: {e}")
+        return False
+    return True
+
+
+async def process_files(file_paths: List[str], generator: Optional[AsyncBulletGenerator],
+                        cache: Optional[BulletCache], pack_size: int = 1,
+                        log: Optional[GenerationLog] = None,
+                        store: Optional[EnrichmentStore] = None,
+                        dedupe_threshold: float = DEFAULT_THRESHOLD) -> Dict[str, int]:
+    """
+    Generate bullet points for all files, recording each course in the store.
+
+    Courses whose input is already in the cache are filled from it without an
+    API call; courses sharing identical text share one request. With
+    pack_size > 1, up to pack_size courses are sent per request. Texts at
+    least dedupe_threshold similar to an earlier pending text (0 disables
+    this) reuse its request. All remaining
+    requests are queued up front so requests for different files overlap.
+    Courses whose request fails get extractive bullets, which are marked as
+    extracted in the cache instead of stored, so the next run retries them.
+
+    Without a generator (the extractive backend), courses lacking bullet
+    points are filled locally and the cache is not used.
+
+    With a store, values already in it are joined in first and every
+    result is recorded in it as it arrives. Without one, each file is saved
+    once its courses are done; results are journaled to the generation log
+    as they arrive, and results left by an interrupted run are restored
+    before anything is queued.
+    """
+    loaded = {}
+    tasks = {}
+    pending = {}
+    in_flight = {}
+    summary = {"files_saved": 0, "files_failed": 0, "courses_updated": 0, "courses_cached": 0,
+               "courses_extracted": 0, "courses_resumed": 0, "courses_fanned_out": 0}
+    # Cache key of a near-duplicate text -> key of the text whose request it shares
+    aliases = {}
+    # id() of each loaded course -> its enrichment store record key
+    records = {}
+
+    async def fill(file_path: str, course: dict, key: str, text: str):
+        bullets = (await in_flight[key])[aliases.get(key, key)]
+        if key in aliases:
+            summary["courses_fanned_out"] += 1
+        if bullets == GENERATION_ERROR:
+            bullets = extractive_bullets(text)
+            metrics.record_fallback()
+            cache.record_extracted(course.get("code", ""))
+        else:
+            cache.store_course(course.get("code", ""), key, bullets, MODEL)
+            if log is not None and store is None:
+                log.record(file_path, course.get("code", ""), key, bullets)
+        course["bulletpoints"] = bullets
+        if store is not None:
+            store.put(file_path, records[id(course)], bullets)
+
+    for file_path in file_paths:
+        courses = load_courses(file_path)
+        if courses is None:
+            summary["files_failed"] += 1
+            continue
+        loaded[file_path] = courses
+        tasks[file_path] = []
+        records.update(zip(map(id, courses), record_keys(courses)))
+        if store is not None:
+            store.apply(file_path, courses)
+        elif log is not None:
+            resumed = log.replay(file_path, courses)
+            summary["courses_resumed"] += resumed
+            tasks[file_path].extend([None] * resumed)
+        for course in courses:
+            if course.get("period", "") == "Not delivered this year":
+                continue
+            existing = course.get("bulletpoints") or course.get("bullet_points")
+            text = select_course_text(course)
+            if not text.strip():
+                if existing != NO_INFORMATION:
+                    course["bulletpoints"] = NO_INFORMATION
+                    tasks[file_path].append(course)
+                continue
+            if is_placeholder(existing):
+                existing = None  # Placeholders never describe the current text
+            if generator is None:
+                if not existing:
+                    course["bulletpoints"] = extractive_bullets(text)
+                    summary["courses_extracted"] += 1
+                    tasks[file_path].append(course)
+                continue
+            key = cache_key(MODEL, SYSTEM_PROMPT, USER_PROMPT, budgeted_text(text))
+            bullets = cache.lookup_course(course.get("code", ""), key, existing, MODEL)
+            if bullets is not None:
+                summary["courses_cached"] += 1
+                if bullets != course.get("bulletpoints"):
+                    course["bulletpoints"] = bullets
+                    tasks[file_path].append(course)
+                continue
+            if key not in pending:
+                pending[key] = (course.get("code", ""), text)
+            tasks[file_path].append(asyncio.create_task(fill(file_path, course, key, text)))
+
+    # The fill tasks first run at the gather below, after every key has its request
+    distinct = len(pending)
+    if pending and 0 < dedupe_threshold:
+        representatives = cluster({key: text for key, (_, text) in pending.items()}, dedupe_threshold)
+        aliases.update((key, representative) for key, representative in representatives.items()
+                       if representative != key)
+        for key in aliases:
+            del pending[key]
+    summary["duplication_rate"] = round(len(aliases) / distinct, 4) if distinct else 0.0
+
+    # Trimmed (and counted in the token ledger) only for the texts actually sent
+    pending = {key: (code, prepare_text(text)) for key, (code, text) in pending.items()}
+    groups = pack_items(pending, pack_size)
+    for group in groups:
+        request = asyncio.ensure_future(generator.generate_group(group))
+        for key, _, _ in group:
+            in_flight[key] = request
+    for key, representative in aliases.items():
+        in_flight[key] = in_flight[representative]
+
+    total = sum(len(t) for t in tasks.values())
+    print(f"Queued {len(groups)} requests for {total} courses from {len(loaded)} files "
+          f"({summary['courses_cached']} courses served from cache, {len(aliases)} of {distinct} "
+          f"texts sharing a near-duplicate's request)")
+
+    for file_path, file_tasks in tasks.items():
+        if not file_tasks:
+            continue
+        await asyncio.gather(*(task for task in file_tasks if isinstance(task, asyncio.Task)))
+        if store is not None:
+            for course in file_tasks:
+                if isinstance(course, dict):
+                    store.put(file_path, records[id(course)], course["bulletpoints"])
+            store.sync()
+            summary["courses_updated"] += len(file_tasks)
+            print(f"Recorded {len(file_tasks)} courses from {os.path.basename(file_path)} "
+                  f"({summary['courses_updated']}/{total} done)")
+        elif save_courses(file_path, loaded[file_path]):
+            if log is not None:
+                log.mark_saved(file_path)
+            summary["files_saved"] += 1
+            summary["courses_updated"] += len(file_tasks)
+            print(f"Saved {len(file_tasks)} courses to {os.path.basename(file_path)} "
+                  f"({summary['courses_updated']}/{total} done)")
+        else:
+            summary["files_failed"] += 1
+    return summary
+
+
+async def run(args) -> Dict[str, int]:
+    if args.file:
+        file_paths = [args.file]
+        courses_dir = os.path.dirname(os.path.abspath(args.file))
+    else:
+        courses_dir = find_courses_directory()
+        if not courses_dir:
+            sys.exit(1)
+        file_paths = sorted(os.path.join(courses_dir, f) for f in os.listdir(courses_dir) if f.endswith('.json'))
+
+    ledger.budget = args.budget
+    generator = cache = log = store = None
+    if args.in_place:
+        log = GenerationLog()
+    else:
+        store = EnrichmentStore("bulletpoints", store_dir_for(courses_dir))
+    if args.backend == "openai":
+        client = get_async_client(args.base_url, max_retries=0)
+        generator = AsyncBulletGenerator(client, args.concurrency, RateLimiter(args.rpm, args.tpm))
+        cache = BulletCache(args.cache)
+    started = time.monotonic()
+    try:
+        summary = await process_files(file_paths, generator, cache, args.pack, log, store,
+                                      args.dedupe_threshold)
+        if cache is not None:
+            cache.evict()
+    finally:
+        await close_async_clients()
+        if cache is not None:
+            cache.close()
+        if log is not None:
+            log.compact()
+        if store is not None:
+            store.compact()
+    record_run("generate_bullet_points_async")
+    if generator is not None:
+        summary.update(generator.stats)
+    summary.update(ledger.summary())
+    summary.update(metrics.summary())
+    summary["seconds"] = round(time.monotonic() - started, 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate course bullet points concurrently")
+    parser.add_argument("file", nargs="?", help="Process a single course file instead of the whole directory")
+    parser.add_argument("--backend", choices=BACKENDS, default=BACKEND,
+                        help="'extractive' fills missing bullets locally without API calls")
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum requests in flight")
+    parser.add_argument("--rpm", type=int, default=500, help="Requests per minute limit")
+    parser.add_argument("--tpm", type=int, default=200000, help="Tokens per minute limit")
+    parser.add_argument("--base-url", default=os.environ.get("OPENAI_BASE_URL"),
+                        help="API base URL, e.g. http://localhost:8001/v1 for mock_openai_server.py")
+    parser.add_argument("--cache", default=BULLET_CACHE_PATH, help="Bullet point cache database")
+    parser.add_argument("--budget", type=int, default=ledger.budget,
+                        help="Token budget for each course's text; longer texts keep their most informative sentences")
+    parser.add_argument("--pack", type=int, default=1,
+                        help="Courses per request; above 1, courses are packed into one JSON-answered prompt")
+    parser.add_argument("--dedupe-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Similarity above which near-duplicate texts share one request (0 disables)")
+    parser.add_argument("--in-place", action="store_true",
+                        help="Rewrite the course files instead of recording bullets in the enrichment store")
+    args = parser.parse_args()
+
+    if args.backend == "openai" and not os.environ.get("OPENAI_API_KEY"):
+        print("Error: OPENAI_API_KEY environment variable is not set.")
+        print("Please set it by running: export OPENAI_API_KEY=your_api_key")
+        print("Or generate bullets offline with: --backend extractive")
+        sys.exit(1)
+
+    try:
+        summary = asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("\nInterrupted by user")
+        sys.exit(1)
+
+    print("\n===============")
+    print("ASYNC GENERATION COMPLETE")
+    print("===============")
+    for key, value in summary.items():
+        print(f"{key.replace('_', ' ').capitalize()}: {value}")
+    print("===============")
+
+
+if __name__ == "__main__":
+    main()
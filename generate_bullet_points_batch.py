@@ -4,11 +4,18 @@ Generate bullet points for all course files in the scraped_data directory.
 
 This script:
 1. Finds all course JSON files in the scraped_data directory
-2. Filters out courses with "period" set to "Not delivered this year"
+2. Skips courses with "period" set to "Not delivered this year"
+   (filter_unavailable_courses.py removes them from the files)
 3. Processes each remaining course in those files
 4. Generates 3 bullet points using OpenAI API for each course
-5. Adds those bullet points to the course data under the "bulletpoints" field
-6. Saves the updated JSON files with filtered courses only
+5. Records those bullet points in the "bulletpoints" enrichment store
+   (scraped_data/enrichments/bulletpoints.jsonl, see enrichment_store.py)
+   as soon as each one arrives, so an interrupted run resumes where it
+   stopped instead of paying for the same courses again
+
+The course files themselves are not rewritten; run
+  python3 enrichment_store.py --publish
+to join the stored bullet points into them.
 
 Usage: 
   python3 generate_bullet_points_batch.py
@@ -18,68 +25,28 @@ Requirements:
 """
 
 import os
-import json
 import sys
-from openai import OpenAI
 import time
 
-def generate_bullet_points(text):
-    """
-    Generate 3 bullet points about a course using OpenAI API.
-    
-    Args:
-        text (str): The course description or summary
-        
-    Returns:
-        str: Three bullet points as a single string
-    """
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-    
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {"role": "system", "content": "You are a helpful academic assistant that creates concise bullet points about university courses."},
-                {"role": "user", "content": f"Generate EXACTLY 3 bullet points that summarize the key aspects of this course. Return ONLY the 3 bullet points without any additional text or numbering. Each bullet point should be prefixed with '• ' and be on a new line.\n\nCourse information: {text}"}
-            ],
-            temperature=0.7,
-            max_tokens=300,
-        )
-        
-        # Extract the bullet points from the response
-        bullet_points = response.choices[0].message.content.strip()
-        
-        # Ensure we have exactly 3 bullet points
-        points = bullet_points.split('\n')
-        filtered_points = [p.strip() for p in points if p.strip()]
-        
-        # Add bullet prefix if not present
-        formatted_points = []
-        for point in filtered_points:
-            if not point.startswith('•'):
-                point = f"• {point}"
-            formatted_points.append(point)
-        
-        # Pad or truncate to exactly 3 bullet points
-        while len(formatted_points) < 3:
-            formatted_points.append("• Additional information not available")
-        
-        formatted_points = formatted_points[:3]  # Limit to 3 points
-        
-        return '\n'.join(formatted_points)
-        
-    except Exception as e:
-        print(f"Error calling OpenAI API: {e}")
-        return "• Error generating course information\n• Please try again later\n• Contact support if the problem persists"
+from bullet_cache import BulletCache, cache_key
+from extractive_bullets import extractive_bullets
+from enrichment_store import EnrichmentStore, record_keys, store_dir_for
+import json_codec
+from llm_client import (BACKEND, MODEL, NO_INFORMATION, SYSTEM_PROMPT, USER_PROMPT, budgeted_text,
+                        generate_bullet_points, is_placeholder, metrics, record_run, select_course_text)
 
-def process_json_file(file_path):
+def process_json_file(file_path, cache=None, store=None):
     """
     Process a JSON file containing course information:
-    1. Filter out courses with period "Not delivered this year"
-    2. Add bullet points to remaining courses
+    1. Skip courses with period "Not delivered this year"
+    2. Record bullet points for remaining courses in the enrichment store
     
     Args:
         file_path (str): Path to the JSON file
+        cache (BulletCache): Bullet point cache; courses whose text is cached are
+            skipped, courses whose text changed are regenerated
+        store (EnrichmentStore): "bulletpoints" store results are recorded in as
+            they are generated (defaults to the one beside the file's directory)
         
     Returns:
         tuple: (success, courses_updated, courses_skipped, courses_removed)
@@ -94,8 +61,8 @@ def process_json_file(file_path):
         # Read the JSON file
         with open(file_path, 'r', encoding='utf-8') as file:
             try:
-                courses = json.load(file)
-            except json.JSONDecodeError as e:
+                courses = json_codec.load(file)
+            except json_codec.DecodeError as e:
                 print(f"Error: Invalid JSON format in {file_path} - {e}")
                 return False, 0, 0, 0
         
@@ -123,105 +90,91 @@ def process_json_file(file_path):
         
         # Report on filtered courses
         total_courses = len(filtered_courses)
-        print(f"\nFiltered out {removed_courses} courses that are not delivered this year from {file_path}")
+        print(f"\nSkipping {removed_courses} courses that are not delivered this year in {file_path}")
         print(f"Processing {total_courses} remaining courses...")
         
         updated_courses = 0
         skipped_courses = 0
         
+        # Join bullet points recorded by earlier (possibly interrupted) runs
+        own_store = store is None
+        if own_store:
+            store = EnrichmentStore("bulletpoints", store_dir_for(os.path.dirname(os.path.abspath(file_path))))
+        records = record_keys(filtered_courses)
+        store.apply(file_path, filtered_courses, records)
+        
         # Process each remaining course
-        for i, course in enumerate(filtered_courses, 1):
+        for i, (course, record) in enumerate(zip(filtered_courses, records), 1):
             # Status update for every 10th course or first/last
             if i % 10 == 0 or i == 1 or i == total_courses:
                 course_name = course.get('name', course.get('title', 'Unknown'))
                 print(f"Processing course {i}/{total_courses}: {course_name}")
             
-            # Check if course already has bullet points (check both field names)
-            if ("bulletpoints" in course and course["bulletpoints"]) or ("bullet_points" in course and course["bullet_points"]):
+            existing = course.get("bulletpoints") or course.get("bullet_points")
+            if cache is None and existing:
                 skipped_courses += 1
                 continue
                 
             # Get text to analyze
-            course_description = course.get("course_description", "")
-            summary = course.get("summary", "")
-            
-            # Skip course description if it's "Not entered" or empty
-            if not course_description or course_description.strip() == "" or course_description == "Not entered":
-                text_to_analyze = summary
-            else:
-                text_to_analyze = course_description
+            text_to_analyze = select_course_text(course)
             
             # If no text available, set default message
             if not text_to_analyze or text_to_analyze.strip() == "":
-                course["bulletpoints"] = "• No information available\n• Please check the course catalog\n• Contact the course administrator"
-                updated_courses += 1
+                if existing == NO_INFORMATION:
+                    skipped_courses += 1
+                else:
+                    course["bulletpoints"] = NO_INFORMATION
+                    store.put(file_path, record, NO_INFORMATION)
+                    updated_courses += 1
                 continue
+            
+            # Reuse cached bullet points when this exact text has been seen before
+            key = cache_key(MODEL, SYSTEM_PROMPT, USER_PROMPT, budgeted_text(text_to_analyze))
+            if cache is not None:
+                if is_placeholder(existing):
+                    existing = None
+                cached = cache.lookup_course(course.get("code", ""), key, existing, MODEL)
+                if cached is not None:
+                    if cached == course.get("bulletpoints"):
+                        skipped_courses += 1
+                    else:
+                        course["bulletpoints"] = cached
+                        store.put(file_path, record, cached)
+                        updated_courses += 1
+                    continue
                 
             # Generate bullet points
-            bullet_points = generate_bullet_points(text_to_analyze)
+            bullet_points = generate_bullet_points(text_to_analyze, fallback=False)
+            if is_placeholder(bullet_points):
+                # Extracted locally and marked as such, so the next run retries the API
+                bullet_points = extractive_bullets(text_to_analyze)
+                metrics.record_fallback()
+                if cache is not None:
+                    cache.record_extracted(course.get("code", ""))
+            elif cache is not None:
+                cache.store_course(course.get("code", ""), key, bullet_points, MODEL)
             
-            # Add bullet points to course with the correct field name that the frontend expects
+            # Record bullet points under the field name that the frontend expects
             course["bulletpoints"] = bullet_points
+            store.put(file_path, record, bullet_points)
             updated_courses += 1
             
             # Add a small delay to avoid rate limiting
             if i % 5 == 0:
                 time.sleep(0.5)
         
-        # Always save to update the file with filtered courses
-        print(f"Saving changes to file: {file_path}")
-        # Create a backup of the original file
-        backup_path = f"{file_path}.bak"
-        try:
-            with open(backup_path, 'w', encoding='utf-8') as backup_file:
-                with open(file_path, 'r', encoding='utf-8') as original_file:
-                    backup_file.write(original_file.read())
-            print(f"Created backup file: {backup_path}")
-        except Exception as e:
-            print(f"Warning: Could not create backup file: {e}")
-            
-        # Write updated data back to the file (filtered courses only)
-        try:
-            with open(file_path, 'w', encoding='utf-8') as file:
-                json.dump(filtered_courses, file, indent=2, ensure_ascii=False)
-                file.flush()
-                os.fsync(file.fileno())  # Force write to disk
-            print(f"File saved successfully!")
-        except Exception as e:
-            print(f"ERROR SAVING FILE: {e}")
-            return False, updated_courses, skipped_courses, removed_courses
-            
-        # Verify the save worked
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                verify_courses = json.load(file)
-                
-            # Verify the count first
-            if len(verify_courses) != total_courses:
-                print(f"WARNING: Verification found {len(verify_courses)} courses, expected {total_courses}")
-            else:
-                print(f"Verification successful: Saved {total_courses} courses (removed {removed_courses})")
-                
-            # Then check if bullet points are present
-            verified = False
-            for course in verify_courses:
-                if "bulletpoints" in course and course["bulletpoints"]:
-                    verified = True
-                    break
-            
-            if verified:
-                print("Verification successful: Bullet points were saved correctly")
-            else:
-                print("WARNING: Verification failed - Could not find bullet points in the saved file")
-        except Exception as e:
-            print(f"Error during verification: {e}")
+        if own_store:
+            store.close()
+        else:
+            store.sync()
+        print(f"Recorded bullet points in {store.path}")
             
         print(f"Summary for {file_path}:")
         print(f"- Original course count: {total_courses_original}")
-        print(f"- Courses removed (not delivered): {removed_courses}")
-        print(f"- Remaining courses: {total_courses}")
+        print(f"- Courses skipped (not delivered): {removed_courses}")
+        print(f"- Delivered courses: {total_courses}")
         print(f"- Courses updated with bullet points: {updated_courses}")
-        print(f"- Courses skipped (already had bullet points): {skipped_courses}")
+        print(f"- Courses skipped (bullet points up to date): {skipped_courses}")
         
         return True, updated_courses, skipped_courses, removed_courses
         
@@ -257,10 +210,11 @@ def find_courses_directory():
     return None
 
 def main():
-    # Check if OpenAI API key is set
-    if not os.environ.get("OPENAI_API_KEY"):
+    # Check if OpenAI API key is set (the extractive backend runs without one)
+    if BACKEND == "openai" and not os.environ.get("OPENAI_API_KEY"):
         print("Error: OPENAI_API_KEY environment variable is not set.")
         print("Please set it by running: export OPENAI_API_KEY=your_api_key")
+        print("Or generate bullets offline with: export BULLET_BACKEND=extractive")
         sys.exit(1)
     
     # Find the courses directory
@@ -281,7 +235,7 @@ def main():
             print(f"  ... and {len(json_files) - 3} more")
     
     # Ask for confirmation before proceeding
-    response = input("\nDo you want to process all these files? This will filter out non-delivered courses and add bullet points. (y/n): ")
+    response = input("\nDo you want to process all these files? This will generate bullet points for delivered courses. (y/n): ")
     if response.lower() != 'y':
         print("Operation cancelled by user.")
         sys.exit(0)
@@ -296,12 +250,15 @@ def main():
     total_courses_updated = 0
     total_courses_skipped = 0
     total_courses_removed = 0
+    # The cache holds model output; extractive bullets are cheap to recompute
+    cache = BulletCache() if BACKEND == "openai" else None
+    store = EnrichmentStore("bulletpoints", store_dir_for(courses_dir))
     
     for i, file in enumerate(json_files, 1):
         file_path = os.path.join(courses_dir, file)
         print(f"\nProcessing file {i}/{total_files}: {file}")
         
-        success, courses_updated, courses_skipped, courses_removed = process_json_file(file_path)
+        success, courses_updated, courses_skipped, courses_removed = process_json_file(file_path, cache, store)
         
         if success:
             successful_files += 1
@@ -309,13 +266,18 @@ def main():
             total_courses_skipped += courses_skipped
             total_courses_removed += courses_removed
         
-        print(f"File {i}/{total_files} completed: {courses_updated} courses updated, {courses_skipped} courses skipped, {courses_removed} courses removed")
+        print(f"File {i}/{total_files} completed: {courses_updated} courses updated, {courses_skipped} courses skipped, {courses_removed} courses not delivered")
         
         # Add a delay between files to avoid overwhelming the API
         if i < total_files:
             print("Waiting 2 seconds before next file...")
             time.sleep(2)
     
+    if cache is not None:
+        cache.evict()
+        cache.close()
+    store.compact()
+    
     # Print summary
     print("\n===============")
     print("BATCH PROCESSING COMPLETE")
@@ -325,7 +287,11 @@ def main():
     print(f"Failed: {total_files - successful_files}")
     print(f"Total courses updated: {total_courses_updated}")
     print(f"Total courses skipped: {total_courses_skipped}")
-    print(f"Total courses removed: {total_courses_removed}")
+    print(f"Total courses skipped (not delivered): {total_courses_removed}")
+    metrics.report()
+    record_run("generate_bullet_points_batch")
+    print(f"Bullet points recorded in {store.path}")
+    print("Run enrichment_store.py --publish to write them into the course files")
     print("===============")
 
 if __name__ == "__main__":
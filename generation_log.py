@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Append-only log of generated bullet points, for resuming interrupted runs.
+
+The generators only write a school's course file after its last course, so
+a crash or Ctrl-C part way through a large school used to lose every bullet
+generated so far. Now each result is appended to bullet_generation_log.jsonl
+(and fsynced) as soon as it arrives:
+
+    {"file": "/abs/path/courses/x.json", "code": "ACCN08007", "key": "<input hash>",
+     "field": "bulletpoints", "bullets": "..."}
+
+When the course file has been saved, a {"file": ..., "saved": true} marker is
+appended. On the next run, entries after a file's last marker are replayed
+into its courses before anything is generated. Replay only happens when the
+entry's input key still matches the course text, so the run resumes exactly
+where the previous one stopped. A clean finish compacts the log, removing
+everything already saved.
+
+Usage:
+    python3 generation_log.py            # Show results not yet saved to course files
+    python3 generation_log.py --replay   # Write them into the course files now
+"""
+
+import os
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from bullet_cache import cache_key
+import json_codec
+from llm_client import MODEL, SYSTEM_PROMPT, USER_PROMPT, budgeted_text, select_course_text
+
+GENERATION_LOG_PATH = "bullet_generation_log.jsonl"
+
+
+def input_key(course: dict) -> str:
+    """The bullet cache key of the course's current text."""
+    return cache_key(MODEL, SYSTEM_PROMPT, USER_PROMPT, budgeted_text(select_course_text(course)))
+
+
+class GenerationLog:
+    """Durable journal of generated bullets not yet written to their course files."""
+
+    def __init__(self, path: str = GENERATION_LOG_PATH):
+        self.path = path
+        # file -> {(code, input key): (field, bullets)}, for entries after the file's last "saved" marker
+        self._pending: Dict[str, Dict[Tuple[str, str], Tuple[str, str]]] = defaultdict(dict)
+        if os.path.exists(path):
+            # Skipping a line cut short by a crash
+            for entry in json_codec.iter_jsonl(path, skip_invalid=True):
+                self._apply(entry)
+        self._file = None  # Opened on the first append
+
+    def _apply(self, entry: dict):
+        if entry.get("saved"):
+            self._pending.pop(entry["file"], None)
+        else:
+            self._pending[entry["file"]][(entry["code"], entry["key"])] = (entry["field"], entry["bullets"])
+
+    def _append(self, entry: dict):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json_codec.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._apply(entry)
+
+    def record(self, file_path: str, code: str, key: str, bullets: str, field: str = "bulletpoints"):
+        """Durably log one generated result."""
+        self._append({"file": os.path.abspath(file_path), "code": code, "key": key, "field": field,
+                      "bullets": bullets})
+
+    def mark_saved(self, file_path: str):
+        """Note that the course file now contains everything logged for it."""
+        if os.path.abspath(file_path) in self._pending:
+            self._append({"file": os.path.abspath(file_path), "saved": True})
+
+    def pending(self, file_path: str) -> Dict[Tuple[str, str], Tuple[str, str]]:
+        return self._pending.get(os.path.abspath(file_path), {})
+
+    def pending_files(self) -> List[str]:
+        return [file for file, entries in self._pending.items() if entries]
+
+    def replay(self, file_path: str, courses: List[dict]) -> int:
+        """
+        Restore logged bullets into a file's courses.
+
+        Returns:
+            int: Number of courses restored
+        """
+        entries = self.pending(file_path)
+        if not entries:
+            return 0
+        restored = 0
+        for course in courses:
+            entry = entries.get((course.get("code", ""), input_key(course)))
+            if entry is not None and course.get(entry[0]) != entry[1]:
+                course[entry[0]] = entry[1]
+                restored += 1
+        return restored
+
+    def compact(self):
+        """Rewrite the log with only the entries not yet saved (removing it if there are none)."""
+        self.close()
+        entries = [{"file": file, "code": code, "key": key, "field": field, "bullets": bullets}
+                   for file, pending in self._pending.items() for (code, key), (field, bullets) in pending.items()]
+        if not entries:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        else:
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json_codec.dumps(entry) + "\n")
+            os.replace(temp_path, self.path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def main():
+    log = GenerationLog()
+    files = log.pending_files()
+    if not files:
+        print(f"No unsaved results in {GENERATION_LOG_PATH}")
+        return
+
+    for file in files:
+        print(f"{file}: {len(log.pending(file))} unsaved results")
+
+    if "--replay" in sys.argv:
+        from generate_bullet_points_async import load_courses, save_courses
+
+        for file in files:
+            courses = load_courses(file)
+            if courses is None:
+                continue
+            restored = log.replay(file, courses)
+            if save_courses(file, courses):
+                log.mark_saved(file)
+                print(f"Restored {restored} courses into {os.path.basename(file)}")
+        log.compact()
+    log.close()
+
+
+if __name__ == "__main__":
+    main()
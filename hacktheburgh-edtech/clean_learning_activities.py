@@ -1,11 +1,21 @@
 import os
-import json
 import re
+import sys
+from pathlib import Path
+
+# enrichment_store.py and json_codec.py live in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import json_codec
+from enrichment_store import EnrichmentStore, record_keys, store_dir_for
 
 def clean_learning_activities():
     """
     Iterates over JSON files in the /courses directory and cleans 
     learning_activities fields by removing newline characters and extra spaces.
+
+    Cleaned values are recorded in the learning_activities enrichment store
+    rather than rewriting the course files; run enrichment_store.py --publish
+    to write them into the files.
     """
     # Get the directory path - updated to use the correct path from config
     current_dir = os.getcwd()
@@ -15,6 +25,8 @@ def clean_learning_activities():
     if not os.path.exists(courses_dir):
         print(f"Error: {courses_dir} directory not found.")
         return
+
+    store = EnrichmentStore("learning_activities", store_dir_for(courses_dir))
     
     # Count files processed
     total_files = 0
@@ -35,13 +47,13 @@ def clean_learning_activities():
         try:
             # Read the JSON file
             with open(file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
+                data = json_codec.load(file)
             
             # Check if data is a list of courses or a single course
             courses = data if isinstance(data, list) else [data]
             
             # Process each course in the file
-            for course in courses:
+            for course, record in zip(courses, record_keys(courses)):
                 if "learning_activities" in course:
                     original = course["learning_activities"]
                     
@@ -50,29 +62,28 @@ def clean_learning_activities():
                         # Remove newlines and normalize spaces
                         cleaned = re.sub(r'\s+', ' ', original).strip()
                         
-                        # Update only if changed
-                        if cleaned != original:
-                            course["learning_activities"] = cleaned
+                        # Record only if changed (and not already recorded)
+                        if cleaned != original and store.put(file_path, record, cleaned):
                             file_modified = True
                             updated_courses += 1
                             print(f"  Cleaned learning_activities for course {course.get('code', 'unknown')}:")
                             print(f"    Before: {original}")
                             print(f"    After:  {cleaned}")
             
-            # Write back to the file if modified
             if file_modified:
-                with open(file_path, 'w', encoding='utf-8') as file:
-                    json.dump(data, file, indent=2, ensure_ascii=False)
                 updated_files += 1
                 
         except Exception as e:
             print(f"Error processing {filename}: {str(e)}")
     
+    store.close()
+
     # Print summary
     print("\nSummary:")
     print(f"Total JSON files processed: {total_files}")
-    print(f"Files updated: {updated_files}")
+    print(f"Files with cleaned courses: {updated_files}")
     print(f"Courses with cleaned learning_activities: {updated_courses}")
+    print(f"Recorded in {store.path}; run enrichment_store.py --publish to update the course files")
 
 if __name__ == "__main__":
     clean_learning_activities() 
\ No newline at end of file
@@ -21,9 +21,15 @@ import json
 import time
 import sys
 from pathlib import Path
-import openai
 from tqdm import tqdm
 
+# llm_client.py, bullet_cache.py and snapshot_store.py live in the repository root
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+from bullet_cache import BULLET_CACHE_PATH, BulletCache
+from llm_client import cached_course_bullets, generate_course_bullets, metrics, record_run
+from snapshot_store import save_json
+
 # Set your OpenAI API key from environment variable or directly
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
@@ -47,8 +53,8 @@ if not OPENAI_API_KEY:
     print("Please set the OPENAI_API_KEY environment variable or add it to .env.local")
     sys.exit(1)
 
-# Configure OpenAI
-openai.api_key = OPENAI_API_KEY
+# The shared client in llm_client.py reads the key from the environment
+os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
 
 # Path to the scraped data directory - UPDATED to correct path
 COURSES_DIR = Path("../hacktheburghEdTech/scraped_data/courses").resolve()
@@ -60,77 +66,6 @@ processed_files = 0
 updated_files = 0
 errors = 0
 
-def generate_course_bullets(summary, course_description):
-    """
-    Generates 3 bullet points for a course based on its description or summary.
-    
-    Args:
-        summary (str): The summary of the course
-        course_description (str): The detailed description of the course
-        
-    Returns:
-        list: A list of 3 bullet points
-    """
-    # Use course_description if it's not empty or "Not entered", otherwise use summary
-    text_to_analyze = course_description if course_description and course_description.strip() and course_description != "Not entered" else summary
-    
-    # If both inputs are empty, return placeholder bullets
-    if not text_to_analyze or not text_to_analyze.strip():
-        return [
-            "• No course information available",
-            "• Please check the course catalog for details",
-            "• Contact the course administrator for more information"
-        ]
-    
-    try:
-        # Call the OpenAI API with specific instructions
-        response = openai.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful academic assistant that creates concise bullet points about university courses."
-                },
-                {
-                    "role": "user",
-                    "content": f"""Generate EXACTLY 3 bullet points that summarize the key aspects of this course. 
-                    Format each bullet point with a bullet character at the start (•).
-                    Be concise and focus on what students will learn, key skills, or course highlights.
-                    Return ONLY the 3 bullet points without any additional text or numbering.
-                    
-                    Course information: {text_to_analyze}"""
-                }
-            ],
-            temperature=0.7,
-            max_tokens=300,
-        )
-        
-        # Extract the bullet points from the response
-        content = response.choices[0].message.content.strip()
-        
-        # Split by newlines and filter out any empty lines
-        bullets = [line.strip() for line in content.split('\n') if line.strip()]
-        
-        # Ensure each bullet starts with the bullet character
-        bullets = [bullet if bullet.startswith('•') else f"• {bullet}" for bullet in bullets]
-        
-        # If we somehow got more or less than 3 bullets, pad or truncate
-        while len(bullets) < 3:
-            bullets.append("• Additional course information not available")
-        
-        # Take only the first 3 if we somehow got more
-        bullets = bullets[:3]
-        
-        return bullets
-        
-    except Exception as e:
-        print(f"Error calling OpenAI API: {e}")
-        return [
-            "• Error generating course information",
-            "• Please try again later",
-            "• Contact support if the problem persists"
-        ]
-
 def process_course_files():
     """
     Main function to process all course files.
@@ -138,6 +73,8 @@ def process_course_files():
     global total_courses, courses_with_bullets, processed_files, updated_files, errors
     
     print(f"🔍 Scanning for course files in: {COURSES_DIR}")
+    # Shared with the generators in the repository root
+    cache = BulletCache(str(REPO_ROOT / BULLET_CACHE_PATH))
     
     try:
         # Check if directory exists
@@ -165,24 +102,19 @@ def process_course_files():
                 for course in tqdm(courses, desc=f"Courses in {file_path.name}", leave=False):
                     total_courses += 1
                     
-                    # Skip if the course already has bullet points
-                    if "bulletpoints" in course and course["bulletpoints"]:
+                    # Skip if the course already has bullet points, unless they were extracted locally
+                    cached = cached_course_bullets(course, course.get("bulletpoints"), cache)
+                    if cached is not None:
+                        if cached != course.get("bulletpoints"):
+                            course["bulletpoints"] = cached
+                            file_updated = True
                         courses_with_bullets += 1
                         continue
                     
                     try:
-                        # Get summary and description for the course
-                        summary = course.get("title", "") or course.get("name", "")
-                        description = course.get("course_description", "")
-                        
-                        # Generate bullet points
-                        bullet_points_list = generate_course_bullets(summary, description)
-                        
-                        # Convert the list to a single string with newlines
-                        bulletpoints_string = "\n".join(bullet_points_list)
                         
-                        # Add bullet points to the course as a single string
-                        course["bulletpoints"] = bulletpoints_string
+                        # Generate bullet points as a single string with newlines
+                        course["bulletpoints"] = generate_course_bullets(course, cache)
                         
                         # Mark file as updated
                         file_updated = True
@@ -191,15 +123,15 @@ def process_course_files():
                         # Add small delay to avoid rate limiting
                         time.sleep(0.1)
                         
-                        print(f"✅ Generated bullet points for {course.get('code', 'unknown')}: {summary}")
+                        print(f"✅ Generated bullet points for {course.get('code', 'unknown')}: "
+                              f"{course.get('title', '') or course.get('name', '')}")
                     except Exception as e:
                         print(f"❌ Error generating bullet points for {course.get('code', 'unknown')}: {e}")
                         errors += 1
                 
                 # If any course in this file was updated, save the file
                 if file_updated:
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        json.dump(courses, f, indent=2, ensure_ascii=False)
+                    save_json(file_path, courses)
                     updated_files += 1
                     print(f"💾 Saved updated file: {file_path.name}")
             except Exception as e:
@@ -213,6 +145,8 @@ def process_course_files():
         print(f"   Total courses: {total_courses}")
         print(f"   Courses with bullet points: {courses_with_bullets}")
         print(f"   Errors: {errors}")
+        metrics.report()
+        record_run("generate_course_bullets")
         
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
@@ -29,8 +29,47 @@ type Course = {
   [key: string]: any; // For additional fields
 };
 
+// Local retrieval service (retrieval_service.py in the repository root)
+const RETRIEVAL_SERVICE_URL = process.env.RETRIEVAL_SERVICE_URL || 'http://127.0.0.1:8765';
+
+// Candidates fetched per message; filterCourses ranks them and the prompt uses the top 7
+const RETRIEVAL_CANDIDATES = 200;
+
+/**
+ * Fetch the courses most relevant to a query from the retrieval service,
+ * which keeps a BM25 index of the catalogue in memory. Each result carries
+ * the description sentence that best matches the query as its description.
+ * Returns null when the service is not running, so the caller can fall back
+ * to loading every course file.
+ */
+async function retrieveCourses(query: string, k: number = RETRIEVAL_CANDIDATES): Promise<Course[] | null> {
+  const controller = new AbortController();
+  const timeout = setTimeout(() => controller.abort(), 2000);
+  try {
+    const url = `${RETRIEVAL_SERVICE_URL}/search?q=${encodeURIComponent(query)}&k=${k}`;
+    const response = await fetch(url, { signal: controller.signal });
+    if (!response.ok) {
+      console.error(`Retrieval service returned ${response.status}`);
+      return null;
+    }
+    const data = await response.json();
+    console.log(`Retrieval service returned ${data.results.length} courses in ${data.took_ms}ms`);
+    return data.results.map((result: any) => ({
+      ...result,
+      course_description: result.snippet || result.summary || '',
+      level: result.level || result.credit_level || '',
+    }));
+  } catch (error) {
+    console.warn('Retrieval service unavailable, loading all course files instead:', error);
+    return null;
+  } finally {
+    clearTimeout(timeout);
+  }
+}
+
 /**
  * Load all courses from JSON files in the scraped_data/courses directory
+ * (fallback when the retrieval service is not running)
  */
 async function loadAllCourses(): Promise<Course[]> {
   let allCourses: Course[] = [];
@@ -52,7 +91,7 @@ async function loadAllCourses(): Promise<Course[]> {
             const courses = JSON.parse(fileContent);
             
             if (Array.isArray(courses)) {
-              allCourses = [...allCourses, ...courses];
+              allCourses.push(...courses);
               console.log(`Found ${courses.length} matching courses in ${file}`);
             }
           } catch (error) {
@@ -78,7 +117,7 @@ async function loadAllCourses(): Promise<Course[]> {
               const courses = JSON.parse(fileContent);
               
               if (Array.isArray(courses)) {
-                allCourses = [...allCourses, ...courses];
+                allCourses.push(...courses);
                 console.log(`Found ${courses.length} matching courses in ${file}`);
               }
             } catch (error) {
@@ -711,13 +750,15 @@ export default async function handler(
     
     console.log(`Extracted interests: "${interestsText}"`);
     
-    // Load all courses with improved logging
+    // Retrieve the relevant courses, loading every course file only if the retrieval service is down
     console.log(`Start loading courses (year: ${year || 'Not specified'}, interests: "${interestsText}")`);
     const startTime = Date.now();
-    const courses = await loadAllCourses();
+    const retrieved = await retrieveCourses(interestsText);
+    const courses = retrieved ?? await loadAllCourses();
     const endTime = Date.now();
     
-    if (courses.length === 0) {
+    // An empty retrieval just means nothing matched; filtering below handles that
+    if (courses.length === 0 && retrieved === null) {
       console.error('No courses loaded - check directory paths and file access');
       
       // Generate a friendly response for the database error
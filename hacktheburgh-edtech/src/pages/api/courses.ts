@@ -22,6 +22,49 @@ type ResponseData = {
   error?: string;
 };
 
+// Course query service (course_query_service.py in the repository root)
+const COURSE_QUERY_SERVICE_URL = process.env.COURSE_QUERY_SERVICE_URL || 'http://127.0.0.1:8766';
+
+/**
+ * Answer the request from the course query service, which keeps the catalogue
+ * and an index per filter in memory and applies the same filters as below.
+ * The service's ETag is passed on, so unchanged results cost a 304.
+ * Returns false when the service is not running, so the caller can fall back
+ * to reading every course file.
+ */
+async function queryCourseService(req: NextApiRequest, res: NextApiResponse<ResponseData>): Promise<boolean> {
+  const controller = new AbortController();
+  const timeout = setTimeout(() => controller.abort(), 2000);
+  try {
+    const query = (req.url || '').split('?')[1] || '';
+    const headers: Record<string, string> = {};
+    if (req.headers['if-none-match']) {
+      headers['If-None-Match'] = String(req.headers['if-none-match']);
+    }
+    const response = await fetch(`${COURSE_QUERY_SERVICE_URL}/courses?${query}`, { headers, signal: controller.signal });
+    if (response.status !== 200 && response.status !== 304) {
+      console.error(`Course query service returned ${response.status}`);
+      return false;
+    }
+    const etag = response.headers.get('etag');
+    if (etag) {
+      res.setHeader('ETag', etag);
+    }
+    if (response.status === 304) {
+      res.status(304).end();
+      return true;
+    }
+    res.setHeader('Content-Type', 'application/json');
+    res.status(200).send(await response.text() as any);
+    return true;
+  } catch (error) {
+    console.warn('Course query service unavailable, reading the course files instead:', error);
+    return false;
+  } finally {
+    clearTimeout(timeout);
+  }
+}
+
 export default async function handler(
   req: NextApiRequest,
   res: NextApiResponse<ResponseData>
@@ -30,6 +73,10 @@ export default async function handler(
     return res.status(405).json({ error: 'Method not allowed' });
   }
 
+  if (await queryCourseService(req, res)) {
+    return;
+  }
+
   try {
     const { 
       schools, 
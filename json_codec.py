@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Fast JSON encoding and decoding for the catalogue files and stores.
+
+Everything used stdlib json.dump(..., indent=2) and json.load. On the
+61 MB catalogue that was a large share of each run. This module uses the
+fastest installed backend, in this order:
+
+- orjson (written in Rust)
+- ujson
+- the stdlib json module, which is always available
+
+Output matches json.dump(..., indent=2, ensure_ascii=False) in pretty mode
+(UTF-8, two-space indent) and has no spaces in compact mode (JSONL lines,
+HTTP responses). Set JSON_BACKEND=json (or ujson/orjson) to pick one.
+Values the fast backends reject (integers beyond 64 bits, non-string
+keys with ujson) fall back to the stdlib encoder.
+
+iter_records() yields the courses of a file one at a time, so filters and
+validators run in constant memory however large the files grow:
+
+- JSON array files are parsed incrementally with ijson when it is
+  installed, otherwise by decoding one element at a time from a buffer
+  refilled in CHUNK_SIZE reads
+- .jsonl files are decoded line by line
+
+    from json_codec import dump, load
+    courses = load("scraped_data/courses/courses_School_of_Law.json")
+    dump(courses, path)                      # pretty
+    line = dumps(entry)                      # compact str
+    for course in iter_records(path): ...    # one record at a time
+
+Usage:
+    python3 json_codec.py --benchmark        # Load/save timings per backend on the course files
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import re
+import time
+from typing import Dict, Iterator, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+BACKENDS = [name for name, module in (("orjson", orjson), ("ujson", ujson)) if module is not None] + ["json"]
+BACKEND = os.environ.get("JSON_BACKEND", BACKENDS[0])
+if BACKEND not in BACKENDS:
+    BACKEND = "json"
+
+# Raised for malformed input by every backend (each one's error subclasses ValueError)
+DecodeError = ValueError
+
+# Characters read at a time by the incremental array reader
+CHUNK_SIZE = 1 << 16
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_DELIMITER = re.compile(r"[ \t\n\r,\]]")
+
+
+def _encode_stdlib(obj, pretty: bool) -> bytes:
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode(obj, pretty: bool = False, backend: str = None) -> bytes:
+    """Serialise obj to UTF-8 JSON bytes."""
+    backend = backend or BACKEND
+    try:
+        if backend == "orjson":
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0))
+        if backend == "ujson":
+            return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False,
+                               indent=2 if pretty else 0).encode("utf-8")
+    except (TypeError, OverflowError):
+        pass  # Not supported by the fast backend; the stdlib handles it
+    return _encode_stdlib(obj, pretty)
+
+
+def dumps(obj, pretty: bool = False, backend: str = None) -> str:
+    """Serialise obj to a JSON string (compact by default)."""
+    return encode(obj, pretty, backend).decode("utf-8")
+
+
+def loads(data: Union[bytes, str], backend: str = None):
+    """Parse JSON from bytes or str."""
+    backend = backend or BACKEND
+    if backend == "orjson":
+        return orjson.loads(data)
+    if backend == "ujson":
+        return ujson.loads(data)
+    return json.loads(data)
+
+
+def load(source, backend: str = None):
+    """Parse a JSON file, given its path or an open file object."""
+    if hasattr(source, "read"):
+        return loads(source.read(), backend)
+    with open(source, 'rb') as f:
+        return loads(f.read(), backend)
+
+
+def dump(obj, target, pretty: bool = True, backend: str = None):
+    """Write obj as JSON to a path or an open file object (text or binary)."""
+    data = encode(obj, pretty, backend)
+    if not hasattr(target, "write"):
+        with open(target, 'wb') as f:
+            f.write(data)
+    elif isinstance(target, io.TextIOBase):
+        target.write(data.decode("utf-8"))
+    else:
+        target.write(data)
+
+
+def _open_text(source):
+    if not hasattr(source, "read"):
+        return open(source, 'r', encoding='utf-8')
+    if isinstance(source, io.TextIOBase):
+        return contextlib.nullcontext(source)
+    return contextlib.nullcontext(io.TextIOWrapper(source, encoding='utf-8'))
+
+
+def iter_array(source, chunk_size: int = CHUNK_SIZE) -> Iterator:
+    """
+    Yield the elements of a file holding one JSON array, without loading it whole.
+
+    Args:
+        source: Path or open file (text or binary)
+        chunk_size (int): Characters read at a time when ijson is not installed
+
+    Raises:
+        DecodeError: If the file is not a JSON array or is malformed; elements
+            before the error have already been yielded
+    """
+    if ijson is not None:
+        if hasattr(source, "read"):
+            yield from ijson.items(source, "item", use_float=True)
+        else:
+            with open(source, 'rb') as f:
+                yield from ijson.items(f, "item", use_float=True)
+        return
+
+    with _open_text(source) as f:
+        buffer, position, eof = "", 0, False
+
+        def fill():
+            nonlocal buffer, position, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+
+        def skip_whitespace():
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in _WHITESPACE:
+                    position += 1
+                if position < len(buffer) or eof:
+                    return
+                fill()
+
+        def finish():
+            """Check that only whitespace follows the closing bracket, as json.load does."""
+            skip_whitespace()
+            if position < len(buffer):
+                raise DecodeError(f"Extra data after the JSON array at {buffer[position:position + 20]!r}")
+
+        skip_whitespace()
+        if buffer[position:position + 1] != "[":
+            raise DecodeError("Expected a JSON array")
+        position += 1
+        skip_whitespace()
+        if buffer[position:position + 1] == "]":
+            position += 1
+            finish()
+            return
+        while True:
+            skip_whitespace()
+            if position == len(buffer):
+                raise DecodeError("Unterminated JSON array")
+            if buffer[position] in ",]":
+                raise DecodeError(f"Expected an array element at {buffer[position:position + 20]!r}")
+            try:
+                element, end = _DECODER.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()  # The element continues past the buffer
+                continue
+            delimiter = end
+            while delimiter < len(buffer) and buffer[delimiter] in _WHITESPACE:
+                delimiter += 1
+            if not eof and (delimiter == len(buffer) or _DELIMITER.search(buffer, end) is None):
+                # "2." or "1e" cut at a chunk boundary decode as 2 and 1, so an
+                # element only counts once the delimiter after it is read
+                fill()
+                continue
+            if delimiter == len(buffer):
+                raise DecodeError("Unterminated JSON array")
+            if buffer[delimiter] not in ",]":
+                raise DecodeError(f"Expected ',' or ']' at {buffer[delimiter:delimiter + 20]!r}")
+            closed = buffer[delimiter] == "]"
+            position = delimiter + 1
+            yield element
+            if closed:
+                finish()
+                return
+
+
+def iter_jsonl(source, skip_invalid: bool = False) -> Iterator:
+    """
+    Yield the values of a JSON Lines file, one per non-blank line.
+
+    Args:
+        source: Path or open file (text or binary)
+        skip_invalid (bool): Skip lines that do not parse (such as a last line
+            cut short by a crash) instead of raising DecodeError
+    """
+    with _open_text(source) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield loads(line)
+            except DecodeError:
+                if not skip_invalid:
+                    raise
+
+
+def iter_records(path: str) -> Iterator:
+    """The records of a .jsonl file or a JSON array file, one at a time."""
+    if path.endswith(".jsonl"):
+        return iter_jsonl(path)
+    return iter_array(path)
+
+
+def benchmark(courses_dir: str, repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """Best-of-repeat seconds to load and to pretty-encode every course file, per backend."""
+    blobs = []
+    for path in sorted(glob.glob(os.path.join(courses_dir, "*.json"))):
+        with open(path, 'rb') as f:
+            blobs.append(f.read())
+    results = {}
+    for backend in BACKENDS:
+        load_times, save_times = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            parsed = [loads(blob, backend) for blob in blobs]
+            load_times.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            for data in parsed:
+                encode(data, True, backend)
+            save_times.append(time.perf_counter() - started)
+        results[backend] = {"load": min(load_times), "save": min(save_times)}
+    results["megabytes"] = sum(len(b) for b in blobs) / 1e6
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON backend in use and its speed on the course files")
+    parser.add_argument("--benchmark", action="store_true", help="Time load and save with each installed backend")
+    parser.add_argument("--courses", default=os.path.join("scraped_data", "courses"))
+    args = parser.parse_args()
+
+    print(f"Backend: {BACKEND} (installed: {', '.join(BACKENDS)})")
+    if not args.benchmark:
+        return
+    results = benchmark(args.courses)
+    megabytes = results.pop("megabytes")
+    baseline = results["json"]
+    print(f"{megabytes:.1f} MB of course files, best of 3:")
+    for backend, times in results.items():
+        print(f"  {backend:<8} load {times['load']:.3f}s ({baseline['load'] / times['load']:.1f}x)   "
+              f"save {times['save']:.3f}s ({baseline['save'] / times['save']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Shared OpenAI client, prompts and output handling for the bullet point scripts.
+
+generate_bullet_points.py, generate_bullet_points_batch.py,
+generate_bullet_points_async.py and both copies of generate_course_bullets.py
+all generate the same three course bullet points. This module holds the one
+copy of:
+
+- the model, prompt templates and placeholder texts
+- the choice of course text and the normalisation of model output
+- a long-lived client per process, so every course reuses the client's
+  pooled keep-alive HTTPS connections instead of building a client (and a
+  TLS session) per call
+- per-call latency and token metrics, and input trimming to a token budget
+  (see token_budget.py) recorded in a per-run ledger
+
+Usage:
+    from llm_client import generate_bullet_points, metrics
+    bullets = generate_bullet_points(text)
+    metrics.report()
+    record_run("my_script")
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from openai import AsyncOpenAI, OpenAI
+
+from bullet_cache import BulletCache, cache_key
+from token_budget import TokenLedger, count_tokens, fit_to_budget
+
+# "openai" calls the API; "extractive" picks sentences locally (extractive_bullets.py) with no API key
+BACKENDS = ("openai", "extractive")
+BACKEND = os.environ.get("BULLET_BACKEND", "openai")
+
+MODEL = "gpt-4o-mini-2024-07-18"
+TEMPERATURE = 0.7
+MAX_COMPLETION_TOKENS = 300
+
+SYSTEM_PROMPT = "You are a helpful academic assistant that creates concise bullet points about university courses."
+USER_PROMPT = ("Generate EXACTLY 3 bullet points that summarize the key aspects of this course. "
+               "Return ONLY the 3 bullet points without any additional text or numbering. "
+               "Each bullet point should be prefixed with '• ' and be on a new line.\n\n"
+               "Course information: {text}")
+
+# Packed mode: several courses per request, answered as one JSON object keyed by course code.
+# Bullets from either mode are cached under the single-course templates above, since both
+# ask for the same three bullets about the same text.
+PACKED_SYSTEM_PROMPT = SYSTEM_PROMPT + " You always answer with a single JSON object."
+PACKED_USER_PROMPT = ("For EACH course below, generate EXACTLY 3 bullet points that summarize the key aspects "
+                      "of the course. Return a JSON object whose keys are the course codes exactly as given and "
+                      "whose values are arrays of 3 strings, each prefixed with '• '.\n\n{courses}")
+PACKED_COMPLETION_TOKENS_PER_COURSE = 200
+
+NO_INFORMATION = "• No information available\n• Please check the course catalog\n• Contact the course administrator"
+GENERATION_ERROR = "• Error generating course information\n• Please try again later\n• Contact support if the problem persists"
+MISSING_POINT = "• Additional information not available"
+
+
+def select_course_text(course: dict) -> str:
+    """Use the course description unless it is missing, otherwise the summary."""
+    course_description = course.get("course_description", "")
+    if not course_description or course_description.strip() == "" or course_description == "Not entered":
+        return course.get("summary", "") or ""
+    return course_description
+
+
+def build_messages(text: str) -> List[dict]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": USER_PROMPT.format(text=text)},
+    ]
+
+
+def build_packed_messages(items: Sequence[Tuple[str, str]]) -> List[dict]:
+    """Messages asking for bullets for several (course code, text) pairs at once."""
+    courses = "\n\n".join(f"Course {code}:\n{text}" for code, text in items)
+    return [
+        {"role": "system", "content": PACKED_SYSTEM_PROMPT},
+        {"role": "user", "content": PACKED_USER_PROMPT.format(courses=courses)},
+    ]
+
+
+def parse_packed_response(content: str, codes: Sequence[str]) -> Dict[str, str]:
+    """
+    Split a packed JSON response into normalised bullets per course code.
+
+    Courses that are missing or whose value is not 3 non-empty strings are
+    left out, so the caller can retry them one at a time.
+    """
+    try:
+        data = json.loads(content)
+    except (TypeError, json.JSONDecodeError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    bullets = {}
+    for code in codes:
+        value = data.get(code)
+        if isinstance(value, str):
+            value = value.split('\n')
+        if not isinstance(value, list) or not all(isinstance(point, str) for point in value):
+            continue
+        points = [point.strip() for point in value if point.strip()]
+        if len(points) < 3:
+            continue
+        bullets[code] = format_bullet_points('\n'.join(points))
+    return bullets
+
+
+def format_bullet_points(content: str) -> str:
+    """Normalise a model response to exactly three "• " prefixed lines."""
+    points = [p.strip() for p in content.strip().split('\n') if p.strip()]
+    points = [p if p.startswith('•') else f"• {p}" for p in points]
+    while len(points) < 3:
+        points.append(MISSING_POINT)
+    return '\n'.join(points[:3])
+
+
+def is_placeholder(bullets: Optional[str]) -> bool:
+    """True for the texts stored when no real bullet points could be produced."""
+    return bullets in (NO_INFORMATION, GENERATION_ERROR)
+
+
+class LLMMetrics:
+    """Latency and token usage of every API call made through this module."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.failures = 0
+        self.fallbacks = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def record(self, latency: float, usage=None, failed: bool = False):
+        with self._lock:
+            self.latencies.append(latency)
+            if failed:
+                self.failures += 1
+            if usage is not None:
+                self.prompt_tokens += usage.prompt_tokens
+                self.completion_tokens += usage.completion_tokens
+
+    def record_fallback(self):
+        with self._lock:
+            self.fallbacks += 1
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            latencies = sorted(self.latencies)
+            calls = len(latencies)
+
+            def percentile(p):
+                return round(latencies[min(calls - 1, int(p * calls))], 3) if calls else 0.0
+
+            return {
+                "calls": calls,
+                "failures": self.failures,
+                "extractive_fallbacks": self.fallbacks,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "mean_latency": round(sum(latencies) / calls, 3) if calls else 0.0,
+                "p50_latency": percentile(0.5),
+                "p95_latency": percentile(0.95),
+            }
+
+    def report(self):
+        print("API calls:")
+        for key, value in self.summary().items():
+            print(f"  {key.replace('_', ' ')}: {value}")
+
+
+metrics = LLMMetrics()
+ledger = TokenLedger()
+
+
+def prepare_text(text: str) -> str:
+    """Fit course text to the input token budget, recording the saving in the ledger."""
+    return ledger.fit(text, MODEL)
+
+
+def budgeted_text(text: str) -> str:
+    """The text prepare_text() would send, without recording it; bullet cache keys hash this."""
+    return text if count_tokens(text, MODEL) <= ledger.budget else fit_to_budget(text, ledger.budget, MODEL)
+
+
+def record_run(script: str):
+    """Append this run's token budgeting and API usage to the token ledger."""
+    if ledger.texts or metrics.latencies:
+        ledger.write(script, metrics.summary())
+
+
+_client: Optional[OpenAI] = None
+_async_clients: Dict[tuple, AsyncOpenAI] = {}
+_client_lock = threading.Lock()
+
+
+def get_client() -> OpenAI:
+    """The process-wide synchronous client (created on first use)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+        return _client
+
+
+def get_async_client(base_url: Optional[str] = None, max_retries: int = 2) -> AsyncOpenAI:
+    """
+    An asynchronous client for the running event loop's lifetime.
+
+    Callers that retry themselves should pass max_retries=0 and close the
+    client with close_async_clients() before the loop ends.
+    """
+    key = (base_url, max_retries)
+    if key not in _async_clients:
+        _async_clients[key] = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"), base_url=base_url,
+                                          max_retries=max_retries)
+    return _async_clients[key]
+
+
+async def close_async_clients():
+    for client in _async_clients.values():
+        await client.close()
+    _async_clients.clear()
+
+
+def generate_bullet_points(text: str, fallback: bool = True) -> str:
+    """
+    Generate 3 bullet points about a course.
+
+    Args:
+        text (str): The course description or summary
+        fallback (bool): If the API call fails, extract bullets locally instead
+            of returning the GENERATION_ERROR placeholder
+
+    Returns:
+        str: Three "• " prefixed bullet points, one per line
+    """
+    if BACKEND == "extractive":
+        # Imported on the extractive paths only, so the API-only scripts do not need NumPy
+        from extractive_bullets import extractive_bullets
+        return extractive_bullets(text)
+    messages = build_messages(prepare_text(text))
+    started = time.perf_counter()
+    try:
+        response = get_client().chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=TEMPERATURE,
+            max_tokens=MAX_COMPLETION_TOKENS,
+        )
+    except Exception as e:
+        metrics.record(time.perf_counter() - started, failed=True)
+        print(f"Error calling OpenAI API: {e}")
+        if fallback:
+            from extractive_bullets import extractive_bullets
+            metrics.record_fallback()
+            return extractive_bullets(text)
+        return GENERATION_ERROR
+    metrics.record(time.perf_counter() - started, response.usage)
+    return format_bullet_points(response.choices[0].message.content or "")
+
+
+def bullet_cache_key(text: str) -> str:
+    """The bullet cache key (bullet_cache.py) of a course text sent with the single-course prompt."""
+    return cache_key(MODEL, SYSTEM_PROMPT, USER_PROMPT, budgeted_text(text))
+
+
+def cached_course_bullets(course: dict, existing: Optional[str], cache: BulletCache) -> Optional[str]:
+    """
+    Bullets a course can keep without calling the model, decided as in the
+    batch and async generators: cached bullets for its current text, or its
+    existing bullets unless they were extracted locally (lookup_course()).
+
+    Returns:
+        str: Bullets to use, or None if the course needs generating
+    """
+    text = select_course_text(course)
+    if not text.strip():
+        return existing or None
+    if is_placeholder(existing):
+        existing = None
+    return cache.lookup_course(course.get("code", ""), bullet_cache_key(text), existing, MODEL)
+
+
+def generate_recorded_bullets(text: str, code: str, cache: BulletCache) -> str:
+    """
+    Bullet points for a course, recorded in the bullet cache.
+
+    Bullets extracted locally (by the extractive backend, or after the API
+    call fails) are recorded with record_extracted(), so the next run sends
+    the course to the model again instead of keeping them.
+    """
+    bullets = generate_bullet_points(text, fallback=False)
+    if BACKEND == "openai" and bullets != GENERATION_ERROR:
+        cache.store_course(code, bullet_cache_key(text), bullets, MODEL)
+        return bullets
+    if bullets == GENERATION_ERROR:
+        from extractive_bullets import extractive_bullets
+        metrics.record_fallback()
+        bullets = extractive_bullets(text)
+    cache.record_extracted(code)
+    return bullets
+
+
+def generate_course_bullets(course: dict, cache: BulletCache) -> str:
+    """Bullet points for a course record, or the placeholder if it has no text."""
+    text = select_course_text(course)
+    if not text.strip():
+        return NO_INFORMATION
+    return generate_recorded_bullets(text, course.get("code", ""), cache)
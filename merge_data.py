@@ -1,4 +1,3 @@
-import json
 import pandas as pd
 import numpy as np
 import csv
@@ -7,6 +6,10 @@ import re
 from pathlib import Path
 from collections import defaultdict
 
+import json_codec
+from derive_course_data import load_course_tables
+from popularity_store import academic_year_from_url, append_year, has_year, write_trends
+
 def extract_quota(academic_year):
     if not academic_year or not isinstance(academic_year, str):
         return None
@@ -32,72 +35,36 @@ def calculate_weighted_popularity(cohort_size, quota):
     return round(cohort_size * (cohort_size / quota), 2)
 
 def merge_data():
-    # Read the CSV files with explicit encoding
-    encodings = ['utf-8', 'latin1', 'cp1252']
-    
-    # Read cohort data
-    csv_data = None
-    for encoding in encodings:
-        try:
-            csv_data = pd.read_csv('courseCohortData.csv', usecols=['courseCode', 'cohortSize'], encoding=encoding)
-            break
-        except UnicodeDecodeError:
-            continue
-        except Exception as e:
-            print(f"Error reading cohort CSV with {encoding} encoding:", str(e))
-            continue
-    else:
-        print("Failed to read cohort CSV file with any encoding")
-        return
-    
-    # Read location data
-    location_data = None
-    for encoding in encodings:
-        try:
-            location_data = pd.read_csv('courseLocationData copy.csv', usecols=['courseCode', 'Campus'], encoding=encoding)
-            break
-        except UnicodeDecodeError:
-            continue
-        except Exception as e:
-            print(f"Error reading location CSV with {encoding} encoding:", str(e))
-            continue
-    
-    # Process location data to get unique campuses per course
-    campus_dict = defaultdict(set)
-    if location_data is not None:
-        for _, row in location_data.iterrows():
-            campus = row['Campus'].strip()
-            if campus.startswith('*'):
-                campus = campus[1:]  # Remove the leading asterisk
-            campus_dict[row['courseCode']].add(campus)
+    # Derive cohort sizes and campuses straight from the raw exports (cached
+    # until the source files change) instead of reading intermediate CSVs
+    tables = load_course_tables()
+    cohort_sizes = tables['cohorts']
+    campus_dict = tables['campuses']
     
     # Create a dictionary to store merged data
     merged_data = {}
+    # Academic years seen in the course URLs, to file the popularity snapshot under
+    academic_years = defaultdict(int)
     
     # Read all JSON files in the courses directory
     scraped_dir = Path('scraped_data/courses')
     if scraped_dir.exists():
         for json_file in scraped_dir.glob('*.json'):
             print(f"Processing {json_file}")
-            with open(json_file, 'r') as f:
+            with open(json_file, 'rb') as f:
                 try:
-                    data = json.load(f)
+                    data = json_codec.load(f)
                     # Check if data is a list or dictionary and has the required fields
                     if isinstance(data, (list, dict)):
                         items = data if isinstance(data, list) else [data]
                         for item in items:
                             if 'code' in item:
                                 course_code = item['code']
+                                academic_years[academic_year_from_url(item.get('url'))] += 1
                                 quota = extract_quota(item.get('academic_year'))  # Extract quota from academic_year
-                                # Match with CSV data
-                                matching_rows = csv_data[csv_data['courseCode'] == course_code]
-                                if not matching_rows.empty:
-                                    cohort_size = matching_rows.iloc[0]['cohortSize']
-                                    # Handle NaN values
-                                    if pd.isna(cohort_size):
-                                        cohort_size = None
-                                    else:
-                                        cohort_size = int(cohort_size)
+                                # Match with cohort data
+                                if course_code in cohort_sizes:
+                                    cohort_size = cohort_sizes[course_code]
                                     
                                     # Calculate popularity metrics
                                     percent_full = calculate_popularity(cohort_size, quota)
@@ -114,14 +81,24 @@ def merge_data():
                                         'popularityScore': weighted_score,
                                         'campuses': campuses
                                     }
-                except json.JSONDecodeError:
+                except json_codec.DecodeError:
                     print(f"Error reading {json_file}")
                     continue
     
     # Write merged data to new JSON file
-    with open('merged_course_data.json', 'w') as f:
-        json.dump(merged_data, f, indent=2)
-        print(f"Successfully created merged_course_data.json with {len(merged_data)} entries")
+    json_codec.dump(merged_data, 'merged_course_data.json')
+    print(f"Successfully created merged_course_data.json with {len(merged_data)} entries")
+    
+    # Keep this year's snapshot in the append-only popularity history
+    academic_years.pop(None, None)
+    if academic_years and merged_data:
+        year = max(academic_years, key=academic_years.get)
+        if has_year(year):
+            print(f"Popularity for {year} is already in the history store, not appending")
+        else:
+            append_year(year, merged_data)
+            print(f"Appended popularity snapshot for {year} to the history store")
+        write_trends()
 
 if __name__ == "__main__":
     merge_data()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Minimal local stand-in for the OpenAI chat completions endpoint.
+
+Answers POST /v1/chat/completions with three canned bullet points and a usage
+block, after an optional artificial delay. Packed requests (JSON response
+format) get a JSON object with bullets for each "Course CODE:" in the
+prompt. It can also reject a fraction of requests with HTTP 429 so retry and
+rate-limit handling can be exercised without spending API credit.
+
+Usage:
+    python3 mock_openai_server.py [--port 8001] [--latency 0.5] [--rate-limit-fraction 0.05]
+
+Then point a generator at it:
+    python3 generate_bullet_points_async.py --base-url http://localhost:8001/v1
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockChatHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    rate_limit_fraction = 0.0
+    malformed_fraction = 0.0
+    requests_served = 0
+    _lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass  # Keep the console quiet; a summary is printed on shutdown
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        if random.random() < self.rate_limit_fraction:
+            self._send_json(429, {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit"}})
+            return
+
+        time.sleep(self.latency)
+        with self._lock:
+            MockChatHandler.requests_served += 1
+
+        prompt = " ".join(str(m.get("content", "")) for m in request.get("messages", []))
+        prompt_tokens = max(1, len(prompt) // 4)
+        bullets = ["• Introduces the core ideas of the course",
+                   "• Develops practical and analytical skills",
+                   "• Assessed through coursework and examination"]
+        if request.get("response_format", {}).get("type") == "json_object":
+            # Packed request: answer for every "Course CODE:" block, occasionally dropping one
+            codes = re.findall(r"^Course (\S+):$", prompt, re.MULTILINE)
+            if codes and random.random() < self.malformed_fraction:
+                codes.pop(random.randrange(len(codes)))
+            content = json.dumps({code: bullets for code in codes})
+        else:
+            content = "\n".join(bullets)
+        self._send_json(200, {
+            "id": f"chatcmpl-mock-{MockChatHandler.requests_served}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4,
+            },
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the OpenAI chat completions API")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds to wait before answering")
+    parser.add_argument("--rate-limit-fraction", type=float, default=0.0,
+                        help="Fraction of requests answered with HTTP 429")
+    parser.add_argument("--malformed-fraction", type=float, default=0.0,
+                        help="Fraction of packed (JSON) answers missing one course")
+    args = parser.parse_args()
+
+    MockChatHandler.latency = args.latency
+    MockChatHandler.rate_limit_fraction = args.rate_limit_fraction
+    MockChatHandler.malformed_fraction = args.malformed_fraction
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), MockChatHandler)
+    print(f"Mock OpenAI server listening on http://127.0.0.1:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\nServed {MockChatHandler.requests_served} completions")
+
+
+if __name__ == "__main__":
+    main()
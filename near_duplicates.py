@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate course texts, found with MinHash and locality-sensitive hashing.
+
+Many DRPS courses are variants of one course (SV1/SS1 offerings, Semester 1
+and 2 copies, dissertations sharing boilerplate), so their descriptions are
+almost identical. Exact duplicates already share one request through the
+bullet cache key, but near-duplicates were each generated separately. This
+module clusters them so the bullet pipeline generates once per cluster and
+fans the result out to the other members:
+
+- each text becomes a set of word 3-shingles, hashed to 32 bits
+- a MinHash signature of NUM_PERM permutations estimates the Jaccard
+  similarity of two shingle sets (the share of equal signature positions)
+- LSH splits signatures into bands; texts sharing any band become
+  candidates, with bands and rows chosen so few pairs above the
+  similarity threshold are missed
+- candidates whose estimated similarity reaches the threshold are joined
+  into clusters with union-find
+
+Usage:
+    python3 near_duplicates.py                    # Duplication report for the catalogue
+    python3 near_duplicates.py --threshold 0.8    # ... at another similarity threshold
+    python3 near_duplicates.py --report near_duplicates.json   # Also write the clusters as JSON
+"""
+
+import argparse
+import glob
+import os
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Hashable, List, Tuple
+
+import numpy as np
+
+import json_codec
+
+# Jaccard similarity above which two texts count as near-duplicates
+DEFAULT_THRESHOLD = 0.9
+
+NUM_PERM = 128
+SHINGLE_WORDS = 3
+
+# Largest prime below 2^32: with shingle hashes and coefficients below it,
+# a * hash + b stays below 2^64, so the universal hash is exact in uint64
+_PRIME = np.uint64(4294967291)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD = re.compile(r"\w+")
+
+# Fixed permutations, so signatures are comparable between runs
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, int(_PRIME), size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, int(_PRIME), size=NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> np.ndarray:
+    """32-bit hashes of the text's overlapping word n-grams."""
+    words = _WORD.findall((text or "").lower())
+    if len(words) < size:
+        grams = {' '.join(words)} if words else set()
+    else:
+        grams = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature of the text (all ones of _MAX_HASH for empty text)."""
+    hashes = shingles(text) % _PRIME
+    if not len(hashes):
+        return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+    return ((np.outer(hashes, _PERM_A) + _PERM_B) % _PRIME).min(axis=0)
+
+
+def lsh_parameters(threshold: float, num_perm: int = NUM_PERM) -> Tuple[int, int]:
+    """
+    Bands and rows per band for the threshold.
+
+    A pair with similarity s shares a band with probability 1 - (1 - s^r)^b.
+    The chosen (b, r) minimises the area under that curve below the
+    threshold (false candidates) plus the area above it that it misses,
+    weighting misses more: false candidates are checked against the full
+    signature anyway, while a missed pair costs an API request.
+    """
+    below = np.linspace(0.0, threshold, 200)
+    above = np.linspace(threshold, 1.0, 200)
+    best, best_error = (1, num_perm), float("inf")
+    for b in range(1, num_perm + 1):
+        for r in range(1, num_perm // b + 1):
+            false_positive = np.mean(1 - (1 - below ** r) ** b) * threshold
+            false_negative = np.mean((1 - above ** r) ** b) * (1.0 - threshold)
+            error = 0.2 * false_positive + 0.8 * false_negative
+            if error < best_error:
+                best, best_error = (b, r), error
+    return best
+
+
+def estimated_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+def cluster(texts: Dict[Hashable, str], threshold: float = DEFAULT_THRESHOLD) -> Dict[Hashable, Hashable]:
+    """
+    Group near-duplicate texts.
+
+    Args:
+        texts (dict): Item id -> text
+        threshold (float): Minimum estimated Jaccard similarity of a pair
+
+    Returns:
+        dict: Item id -> id of its cluster's representative (the first member
+              in input order); items without near-duplicates map to themselves
+    """
+    ids = [i for i, text in texts.items() if text and text.strip()]
+    if len(ids) < 2:
+        return {i: i for i in texts}
+    signatures = np.vstack([minhash(texts[i]) for i in ids])
+    bands, rows = lsh_parameters(threshold)
+
+    parent = list(range(len(ids)))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    checked = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        for index, row in enumerate(signatures[:, band * rows:(band + 1) * rows]):
+            buckets[row.tobytes()].append(index)
+        for members in buckets.values():
+            for other in members[1:]:
+                first = members[0]
+                pair = (first, other)
+                if pair in checked or find(first) == find(other):
+                    continue
+                checked.add(pair)
+                if estimated_similarity(signatures[first], signatures[other]) >= threshold:
+                    # The earlier item stays the representative
+                    low, high = sorted((find(first), find(other)))
+                    parent[high] = low
+
+    representatives = {i: i for i in texts}
+    for index, item in enumerate(ids):
+        representatives[item] = ids[find(index)]
+    return representatives
+
+
+def duplication_summary(representatives: Dict[Hashable, Hashable]) -> Dict[str, float]:
+    """Cluster counts and the share of items that need no generation of their own."""
+    clusters = defaultdict(int)
+    for representative in representatives.values():
+        clusters[representative] += 1
+    items = len(representatives)
+    fanned_out = items - len(clusters)
+    return {
+        "items": items,
+        "clusters": len(clusters),
+        "items_in_shared_clusters": sum(size for size in clusters.values() if size > 1),
+        "largest_cluster": max(clusters.values(), default=0),
+        "fanned_out": fanned_out,
+        "duplication_rate": round(fanned_out / items, 4) if items else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate course descriptions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--report", help="Write clusters of more than one course to this JSON file")
+    parser.add_argument("--courses", default=os.path.join("scraped_data", "courses"))
+    args = parser.parse_args()
+
+    from llm_client import select_course_text
+
+    # Only distinct texts matter: identical ones already share a request
+    courses_by_text: Dict[str, List[str]] = defaultdict(list)
+    for path in sorted(glob.glob(os.path.join(args.courses, "*.json"))):
+        for course in json_codec.iter_records(path):
+            text = select_course_text(course)
+            if course.get("period") != "Not delivered this year" and text.strip():
+                courses_by_text[text].append(course.get("code", ""))
+    texts = list(courses_by_text)
+    representatives = cluster(dict(enumerate(texts)), args.threshold)
+    summary = duplication_summary(representatives)
+    bands, rows = lsh_parameters(args.threshold)
+
+    courses = sum(len(codes) for codes in courses_by_text.values())
+    print(f"{courses} delivered courses with text, {len(texts)} distinct texts")
+    print(f"Threshold {args.threshold} ({bands} bands x {rows} rows): {summary['clusters']} clusters, "
+          f"{summary['items_in_shared_clusters']} texts in clusters of two or more "
+          f"(largest {summary['largest_cluster']})")
+    print(f"Requests: {courses} per course -> {len(texts)} per distinct text -> {summary['clusters']} per cluster "
+          f"({100.0 * (1 - summary['clusters'] / max(courses, 1)):.1f}% fewer than one per course)")
+
+    members = defaultdict(list)
+    for index, representative in representatives.items():
+        members[representative].append(index)
+    shared = sorted((m for m in members.values() if len(m) > 1), key=len, reverse=True)
+    for group in shared[:5]:
+        codes = [code for index in group for code in courses_by_text[texts[index]]]
+        print(f"  {len(group)} texts, e.g. {', '.join(codes[:6])}: {texts[group[0]][:80]!r}")
+
+    if args.report:
+        report = {"threshold": args.threshold, "summary": summary,
+                  "clusters": [[code for index in group for code in courses_by_text[texts[index]]]
+                               for group in shared]}
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json_codec.dump(report, f)
+        print(f"Wrote {len(shared)} clusters to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
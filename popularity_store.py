@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Append-only, year-partitioned store of course popularity snapshots.
+
+merge_data.py computes each course's quota, cohort size, percentFull and
+popularityScore for the current academic year and overwrites
+merged_course_data.json. This module keeps every year's snapshot so demand can
+be tracked over time:
+
+- Each academic year is one partition (popularity_store/year=24-25.npz) with
+  one column per metric. Partitions are written once and never modified.
+- Per-course trend statistics (year-over-year change, fill-rate percentile
+  within the year, fill-rate history) are precomputed into
+  popularity_trends.json so the frontend can show trends without touching
+  the history.
+
+Usage:
+    python3 popularity_store.py                                   # List stored years
+    python3 popularity_store.py --append 24-25 merged_course_data.json
+    python3 popularity_store.py --trends                          # Rebuild popularity_trends.json
+"""
+
+import os
+import re
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import json_codec
+
+# Directory holding one partition per academic year
+STORE_DIR = "popularity_store"
+
+# Precomputed per-course trend statistics for the frontend
+TRENDS_PATH = "popularity_trends.json"
+
+# Columns stored per partition; missing integers are stored as -1, missing floats as NaN
+INT_COLUMNS = ("quota", "cohortSize")
+FLOAT_COLUMNS = ("percentFull", "popularityScore")
+
+_YEAR_PATTERN = re.compile(r"^\d{2}-\d{2}$")
+_URL_YEAR_PATTERN = re.compile(r"/(\d{2}-\d{2})/")
+
+
+def academic_year_from_url(url: str) -> Optional[str]:
+    """Extract the academic year ("24-25") from a DRPS course URL."""
+    match = _URL_YEAR_PATTERN.search(url or "")
+    return match.group(1) if match else None
+
+
+def _partition_path(year: str, store_dir: str = STORE_DIR) -> str:
+    return os.path.join(store_dir, f"year={year}.npz")
+
+
+def stored_years(store_dir: str = STORE_DIR) -> List[str]:
+    """Academic years with a partition in the store, oldest first."""
+    if not os.path.isdir(store_dir):
+        return []
+    years = []
+    for filename in os.listdir(store_dir):
+        match = re.match(r"^year=(\d{2}-\d{2})\.npz$", filename)
+        if match:
+            years.append(match.group(1))
+    return sorted(years)
+
+
+def has_year(year: str, store_dir: str = STORE_DIR) -> bool:
+    return os.path.exists(_partition_path(year, store_dir))
+
+
+def append_year(year: str, records: Dict[str, dict], store_dir: str = STORE_DIR) -> str:
+    """
+    Write one academic year's snapshot as a new partition.
+
+    Args:
+        year (str): Academic year such as "24-25"
+        records (dict): Course code -> merged_course_data.json entry
+        store_dir (str): Store directory
+
+    Returns:
+        str: Path of the new partition
+
+    Raises:
+        ValueError: If the year is malformed or already stored (partitions are append-only)
+    """
+    if not _YEAR_PATTERN.match(year):
+        raise ValueError(f"Academic year must look like '24-25', got {year!r}")
+    path = _partition_path(year, store_dir)
+    if os.path.exists(path):
+        raise ValueError(f"Popularity for {year} is already stored in {path}")
+
+    codes = sorted(records)
+    columns = {"code": np.array(codes, dtype=str)}
+    for column in INT_COLUMNS:
+        values = [records[code].get(column) for code in codes]
+        columns[column] = np.array([-1 if v is None else int(v) for v in values], dtype=np.int32)
+    for column in FLOAT_COLUMNS:
+        values = [records[code].get(column) for code in codes]
+        columns[column] = np.array([np.nan if v is None else float(v) for v in values], dtype=np.float32)
+
+    # Write to a temporary file first so a partition is never seen half-written
+    os.makedirs(store_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=store_dir, suffix=".npz.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, **columns)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return path
+
+
+def load_year(year: str, store_dir: str = STORE_DIR) -> Dict[str, np.ndarray]:
+    """Load one partition as a dict of column arrays."""
+    with np.load(_partition_path(year, store_dir), allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+
+def _optional(value, digits: int = 2):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return int(round(value)) if digits == 0 else round(float(value), digits)
+
+
+def compute_trends(store_dir: str = STORE_DIR) -> Dict[str, dict]:
+    """
+    Per-course trend statistics across all stored years.
+
+    Returns:
+        dict: Course code -> {years, cohortSize, percentFull, cohortChange,
+              cohortChangePercent, percentFullChange, fillPercentile}
+    """
+    years = stored_years(store_dir)
+    if not years:
+        return {}
+    partitions = [load_year(year, store_dir) for year in years]
+
+    # Align every partition on the union of course codes: (year, course) matrices
+    codes = np.unique(np.concatenate([p["code"] for p in partitions]))
+    cohort = np.full((len(years), len(codes)), np.nan)
+    fill = np.full((len(years), len(codes)), np.nan)
+    for row, partition in enumerate(partitions):
+        columns = np.searchsorted(codes, partition["code"])
+        sizes = partition["cohortSize"].astype(np.float64)
+        cohort[row, columns] = np.where(sizes < 0, np.nan, sizes)
+        fill[row, columns] = partition["percentFull"]
+
+    # Percentile rank of each course's fill rate among all courses in that year
+    fill_percentile = np.full_like(fill, np.nan)
+    for row in range(len(years)):
+        valid = ~np.isnan(fill[row])
+        if valid.any():
+            ranks = fill[row, valid].argsort().argsort()
+            fill_percentile[row, valid] = 100.0 * ranks / max(valid.sum() - 1, 1)
+
+    # Year-over-year change between the two most recent years
+    if len(years) > 1:
+        cohort_change = cohort[-1] - cohort[-2]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cohort_change_percent = np.where(cohort[-2] > 0, 100.0 * cohort_change / cohort[-2], np.nan)
+        fill_change = fill[-1] - fill[-2]
+    else:
+        cohort_change = cohort_change_percent = fill_change = np.full(len(codes), np.nan)
+
+    trends = {}
+    for i, code in enumerate(codes):
+        trends[str(code)] = {
+            "years": years,
+            "cohortSize": [_optional(v, 0) for v in cohort[:, i]],
+            "percentFull": [_optional(v) for v in fill[:, i]],
+            "cohortChange": _optional(cohort_change[i], 0),
+            "cohortChangePercent": _optional(cohort_change_percent[i]),
+            "percentFullChange": _optional(fill_change[i]),
+            "fillPercentile": _optional(fill_percentile[-1, i], 1),
+        }
+    return trends
+
+
+def write_trends(trends_path: str = TRENDS_PATH, store_dir: str = STORE_DIR) -> int:
+    """Recompute trend statistics and write them for the frontend."""
+    trends = compute_trends(store_dir)
+    with open(trends_path, "w", encoding="utf-8") as f:
+        json_codec.dump(trends, f)
+    return len(trends)
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ["--append"]:
+        if len(args) < 3:
+            print("Usage: python3 popularity_store.py --append YEAR path/to/merged_course_data.json")
+            sys.exit(1)
+        year, merged_path = args[1], args[2]
+        with open(merged_path, "r", encoding="utf-8") as f:
+            records = json_codec.load(f)
+        try:
+            path = append_year(year, records)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"Stored {len(records)} courses for {year} in {path}")
+        count = write_trends()
+        print(f"Updated {TRENDS_PATH} with trends for {count} courses")
+    elif args[:1] == ["--trends"]:
+        count = write_trends()
+        print(f"Wrote {TRENDS_PATH} with trends for {count} courses")
+    else:
+        years = stored_years()
+        if not years:
+            print(f"No popularity snapshots stored in {STORE_DIR}")
+        for year in years:
+            partition = load_year(year)
+            print(f"{year}: {len(partition['code'])} courses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Local retrieval service for the chatbot: top-k courses for a query over HTTP.
+
+api/chatbot.ts used to read and parse every course file on each chat message
+before scoring them all. This service loads the catalogue once and keeps a
+BM25 index in memory. It is an inverted index built with the same NumPy
+layout as course_index.py, over the same weighted name, keywords, summary
+and description terms. Each query is answered in milliseconds:
+
+    GET /search?q=machine+learning&k=50
+    -> {"query": ..., "took_ms": 1.9, "results": [{"code": ..., "name": ..., "score": ...,
+        "snippet": ..., <course fields the chatbot uses>}, ...]}
+
+    GET /health
+    -> {"courses": 6665, "terms": 38122}
+
+The snippet is the description sentence that best matches the query, so
+prompts can include a small relevant context instead of whole descriptions.
+With --tfidf, queries are ranked by cosine similarity in the course_index.py
+vectors (build them first) instead of BM25.
+
+Usage:
+    python3 retrieval_service.py [--port 8765] [--tfidf]
+"""
+
+import argparse
+import os
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from course_index import CourseIndex, course_terms, load_catalogue, posting_positions
+import json_codec
+from token_budget import content_words, split_sentences
+
+DEFAULT_PORT = 8765
+
+# BM25 term frequency saturation and length normalisation
+K1 = 1.2
+B = 0.75
+
+MAX_RESULTS = 200
+SNIPPET_CHARS = 300
+
+# Course fields returned with each result, as used by the chatbot's filtering and prompt
+RESULT_FIELDS = ("code", "name", "period", "school_name", "credits", "credit_level", "level", "year",
+                 "keywords", "summary", "bulletpoints", "url")
+
+
+class BM25Index:
+    """In-memory BM25 over course terms, stored by term (inverted index)."""
+
+    def __init__(self, courses: List[dict]):
+        documents = [Counter(course_terms(course)) for course in courses]
+        vocabulary = sorted({term for counts in documents for term in counts})
+        self.term_ids = {term: i for i, term in enumerate(vocabulary)}
+        lengths = np.array([sum(counts.values()) for counts in documents], dtype=np.float64)
+        average_length = lengths.mean() if len(lengths) else 0.0
+
+        docs, terms, frequencies = [], [], []
+        for doc, counts in enumerate(documents):
+            for term, count in counts.items():
+                docs.append(doc)
+                terms.append(self.term_ids[term])
+                frequencies.append(count)
+        docs = np.array(docs, dtype=np.int32)
+        terms = np.array(terms, dtype=np.int32)
+        frequencies = np.array(frequencies, dtype=np.float64)
+
+        document_frequency = np.bincount(terms, minlength=len(vocabulary))
+        idf = np.log(1 + (len(documents) - document_frequency + 0.5) / (document_frequency + 0.5))
+        norm = K1 * (1 - B + B * lengths[docs] / max(average_length, 1e-9))
+        weights = idf[terms] * frequencies * (K1 + 1) / (frequencies + norm)
+
+        order = np.argsort(terms, kind="stable")
+        self.term_docs = docs[order]
+        self.term_weights = weights[order].astype(np.float32)
+        self.term_indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(document_frequency, out=self.term_indptr[1:])
+        self.size = len(documents)
+
+    def scores(self, query: str) -> np.ndarray:
+        counts = Counter(t for t in content_words(query) if t in self.term_ids)
+        if not counts:
+            return np.zeros(self.size)
+        ids = np.array([self.term_ids[t] for t in counts], dtype=np.int32)
+        positions, lengths = posting_positions(self.term_indptr, ids)
+        query_weights = np.repeat(np.array(list(counts.values()), dtype=np.float64), lengths)
+        return np.bincount(self.term_docs[positions], weights=self.term_weights[positions] * query_weights,
+                           minlength=self.size)
+
+
+def snippet(course: dict, query_terms: set, limit: int = SNIPPET_CHARS) -> str:
+    """The description or summary sentence sharing most terms with the query."""
+    text = course.get("course_description") or ""
+    if text in ("", "Not entered"):
+        text = course.get("summary") or ""
+    sentences = split_sentences(text)
+    if not sentences:
+        return ""
+    best = max(sentences, key=lambda s: len(query_terms.intersection(content_words(s))))
+    return best if len(best) <= limit else best[:limit].rsplit(' ', 1)[0] + "…"
+
+
+class Retriever:
+    """The catalogue and its index, shared by all request threads (read-only once built)."""
+
+    def __init__(self, courses_dir: str, tfidf: bool = False):
+        started = time.perf_counter()
+        self.courses = load_catalogue(courses_dir, enriched=True)
+        self.vectors: Optional[CourseIndex] = None
+        self.bm25: Optional[BM25Index] = None
+        if tfidf:
+            self.vectors = CourseIndex()
+            self.rows = [self.vectors.rows.get(c.get("code")) for c in self.courses]
+        else:
+            self.bm25 = BM25Index(self.courses)
+        self.load_seconds = time.perf_counter() - started
+
+    def search(self, query: str, k: int) -> List[Tuple[dict, float]]:
+        if self.bm25 is not None:
+            scores = self.bm25.scores(query)
+        else:
+            by_row = self.vectors.scores(*self.vectors.vectorize(query))
+            scores = np.array([by_row[row] if row is not None else 0.0 for row in self.rows])
+        k = min(k, len(scores))
+        if not k:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        best = best[np.lexsort((best, -scores[best]))]
+        return [(self.courses[i], float(scores[i])) for i in best if scores[i] > 0]
+
+    def result(self, course: dict, score: float, query_terms: set) -> dict:
+        entry = {field: course[field] for field in RESULT_FIELDS if course.get(field) not in (None, "")}
+        entry["score"] = round(score, 4)
+        entry["snippet"] = snippet(course, query_terms)
+        return entry
+
+
+class RetrievalHandler(BaseHTTPRequestHandler):
+    retriever: Retriever = None
+
+    def log_message(self, format, *args):
+        pass  # One line per search is printed instead
+
+    def _send_json(self, status: int, payload: dict):
+        body = json_codec.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path == "/health":
+            index = self.retriever.bm25 or self.retriever.vectors
+            terms = len(index.term_ids)
+            self._send_json(200, {"courses": len(self.retriever.courses), "terms": terms})
+            return
+        if url.path != "/search":
+            self._send_json(404, {"error": f"Unknown path {url.path}"})
+            return
+
+        query = params.get("q", [""])[0]
+        try:
+            k = max(1, min(int(params.get("k", ["20"])[0]), MAX_RESULTS))
+        except ValueError:
+            self._send_json(400, {"error": "k must be an integer"})
+            return
+        started = time.perf_counter()
+        terms = set(content_words(query))
+        results = [self.retriever.result(course, score, terms) for course, score in self.retriever.search(query, k)]
+        took = (time.perf_counter() - started) * 1000
+        print(f"{query!r}: {len(results)} results in {took:.1f}ms")
+        self._send_json(200, {"query": query, "took_ms": round(took, 2), "results": results})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Course retrieval service for the chatbot")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--tfidf", action="store_true", help="Rank with the course_index.py TF-IDF vectors")
+    parser.add_argument("--courses", default=os.path.join("scraped_data", "courses"))
+    args = parser.parse_args()
+
+    RetrievalHandler.retriever = Retriever(args.courses, args.tfidf)
+    print(f"Indexed {len(RetrievalHandler.retriever.courses)} courses in "
+          f"{RetrievalHandler.retriever.load_seconds:.1f}s")
+    server = ThreadingHTTPServer((args.host, args.port), RetrievalHandler)
+    print(f"Retrieval service listening on http://{args.host}:{args.port}/search?q=...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
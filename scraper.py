@@ -1,7 +1,6 @@
 import requests
 from bs4 import BeautifulSoup
 import logging
-import json
 from pathlib import Path
 import csv
 from typing import List, Dict, Tuple
@@ -10,6 +9,8 @@ import time
 import re
 from urllib.parse import urljoin
 
+import json_codec
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -910,8 +911,7 @@ class DRPSScraper:
     def save_to_json(self, data, filename: str):
         """Save the scraped data to a JSON file."""
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            json_codec.dump(data, filename)
             logger.info(f"Data saved to {filename}")
         except IOError as e:
             logger.error(f"Error saving data to {filename}: {str(e)}")
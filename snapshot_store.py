@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Previous versions of the course files, kept in a content-addressed store.
+
+Scripts used to copy each file to <file>.bak (or .broken) before rewriting
+it in place, which doubled the courses directory and still left a
+truncated file if a write was interrupted. Now:
+
+- writes go to a temporary file beside the target and are renamed over it
+  with os.replace, so readers see the old file or the new one, never half
+- before a file is replaced, its current content is stored once under its
+  SHA-256 in <dir>/.snapshots/objects (gzipped), and a line is appended to
+  <dir>/.snapshots/history.jsonl:
+
+      {"file": "courses_School_of_Law.json", "sha256": "9f2c...", "time": 1760000000.0, "size": 1370079}
+
+  Unchanged content adds no object, and a file rewritten with the same
+  content as its last snapshot adds no line.
+- only the newest KEEP_VERSIONS snapshots of each file are kept; pruning
+  deletes objects no longer referenced
+
+Usage:
+    python3 snapshot_store.py                           # Snapshot counts and store size per directory
+    python3 snapshot_store.py --list courses_School_of_Law.json
+    python3 snapshot_store.py --restore courses_School_of_Law.json [--version 2 | --sha 9f2c]
+    python3 snapshot_store.py --prune [--keep 5] [--days 30]
+    python3 snapshot_store.py --import-backups          # Move .bak/.broken copies into the store
+"""
+
+import argparse
+import contextlib
+import fcntl
+import gzip
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import json_codec
+
+SNAPSHOT_DIR = ".snapshots"
+
+# Snapshots kept per file
+KEEP_VERSIONS = 10
+
+# Suffixes of the old backup copies that --import-backups moves into the store
+BACKUP_SUFFIXES = (".bak", ".broken")
+
+
+def snapshot_dir_for(file_path: str) -> str:
+    """The snapshot store of the directory holding file_path."""
+    return os.path.join(os.path.dirname(os.path.abspath(file_path)), SNAPSHOT_DIR)
+
+
+def write_atomic(file_path: str, data: bytes, mode: int = 0o644):
+    """Write data to a temporary file beside file_path, fsync it and rename it into place."""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+class SnapshotStore:
+    """Content-addressed previous versions of the files in one directory."""
+
+    def __init__(self, root: str, keep: int = KEEP_VERSIONS):
+        self.root = root
+        self.keep = keep
+        self.history_path = os.path.join(root, "history.jsonl")
+
+    @contextlib.contextmanager
+    def _locked(self):
+        # Workers of catalogue_runner.py snapshot different files at the same time
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".lock"), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest[2:] + ".gz")
+
+    def history(self) -> List[dict]:
+        """Every snapshot, oldest first."""
+        if not os.path.exists(self.history_path):
+            return []
+        # Skipping a line cut short by a crash
+        return list(json_codec.iter_jsonl(self.history_path, skip_invalid=True))
+
+    def versions(self, name: str) -> List[dict]:
+        """Snapshots of one file, newest first."""
+        return [e for e in reversed(self.history()) if e["file"] == os.path.basename(name)]
+
+    def read(self, digest: str) -> bytes:
+        with gzip.open(self._object_path(digest), 'rb') as f:
+            return f.read()
+
+    def add(self, name: str, data: bytes, when: Optional[float] = None) -> str:
+        """
+        Record data as a version of the named file.
+
+        Returns:
+            str: The content's SHA-256
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        name = os.path.basename(name)
+        with self._locked():
+            object_path = self._object_path(digest)
+            if not os.path.exists(object_path):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                write_atomic(object_path, gzip.compress(data, compresslevel=6))
+            versions = [e for e in self.history() if e["file"] == name]
+            if versions and versions[-1]["sha256"] == digest:
+                return digest
+            entry = {"file": name, "sha256": digest, "time": when or time.time(), "size": len(data)}
+            with open(self.history_path, 'a', encoding='utf-8') as f:
+                f.write(json_codec.dumps(entry) + "\n")
+            if len(versions) + 1 > self.keep:
+                self._prune(self.keep, None)
+        return digest
+
+    def snapshot(self, file_path: str) -> Optional[str]:
+        """Store the file's current content; None if it does not exist."""
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path, 'rb') as f:
+            return self.add(file_path, f.read())
+
+    def resolve(self, name: str, version: int = 1, sha: Optional[str] = None) -> dict:
+        """The snapshot of a file by position (1 = newest) or SHA-256 prefix."""
+        versions = self.versions(name)
+        if sha:
+            matches = [e for e in versions if e["sha256"].startswith(sha)]
+            if not matches:
+                raise ValueError(f"No snapshot of {name} matching {sha}")
+            return matches[0]
+        if not 1 <= version <= len(versions):
+            raise ValueError(f"{name} has {len(versions)} snapshots, not {version}")
+        return versions[version - 1]
+
+    def restore(self, file_path: str, version: int = 1, sha: Optional[str] = None) -> str:
+        """
+        Put a snapshot back in place, snapshotting the current content first.
+
+        Returns:
+            str: SHA-256 of the restored content
+        """
+        entry = self.resolve(file_path, version, sha)
+        data = self.read(entry["sha256"])
+        self.snapshot(file_path)
+        write_atomic(file_path, data)
+        return entry["sha256"]
+
+    def prune(self, keep: Optional[int] = None, max_age_days: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Drop snapshots beyond the newest `keep` per file, or older than max_age_days
+        (the newest snapshot of each file is always kept).
+
+        Returns:
+            tuple: (snapshots dropped, objects deleted)
+        """
+        with self._locked():
+            return self._prune(keep or self.keep, max_age_days)
+
+    def _prune(self, keep: int, max_age_days: Optional[float]) -> Tuple[int, int]:
+        entries = self.history()
+        cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+        seen: Dict[str, int] = {}
+        kept = []
+        for entry in reversed(entries):
+            rank = seen.get(entry["file"], 0)
+            seen[entry["file"]] = rank + 1
+            if rank >= keep or (rank and cutoff is not None and entry["time"] < cutoff):
+                continue
+            kept.append(entry)
+        kept.reverse()
+        if len(kept) == len(entries):
+            return 0, 0
+        write_atomic(self.history_path, "".join(json_codec.dumps(e) + "\n" for e in kept).encode("utf-8"))
+
+        referenced = {e["sha256"] for e in kept}
+        deleted = 0
+        objects_dir = os.path.join(self.root, "objects")
+        for prefix in os.listdir(objects_dir):
+            for name in os.listdir(os.path.join(objects_dir, prefix)):
+                if prefix + name[:-len(".gz")] not in referenced:
+                    os.unlink(os.path.join(objects_dir, prefix, name))
+                    deleted += 1
+        return len(entries) - len(kept), deleted
+
+    def size(self) -> int:
+        """Bytes used by the stored objects."""
+        objects_dir = os.path.join(self.root, "objects")
+        return sum(entry.stat().st_size for prefix in os.scandir(objects_dir) if prefix.is_dir()
+                   for entry in os.scandir(prefix.path)) if os.path.isdir(objects_dir) else 0
+
+
+def save_json(file_path: str, data, snapshot: bool = True, pretty: bool = True):
+    """Snapshot the file's current content, then replace it atomically with data as JSON."""
+    if snapshot and os.path.exists(file_path):
+        SnapshotStore(snapshot_dir_for(file_path)).snapshot(file_path)
+    write_atomic(file_path, json_codec.encode(data, pretty))
+
+
+def import_backups(directory: str) -> Tuple[int, int]:
+    """
+    Move <file>.bak and <file>.broken copies into the directory's snapshot store.
+
+    Returns:
+        tuple: (copies imported, bytes freed)
+    """
+    store = SnapshotStore(os.path.join(directory, SNAPSHOT_DIR))
+    imported = freed = 0
+    for name in sorted(os.listdir(directory)):
+        suffix = next((s for s in BACKUP_SUFFIXES if name.endswith(s)), None)
+        if not suffix:
+            continue
+        path = os.path.join(directory, name)
+        with open(path, 'rb') as f:
+            store.add(name[:-len(suffix)], f.read(), when=os.path.getmtime(path))
+        freed += os.path.getsize(path)
+        os.unlink(path)
+        imported += 1
+    return imported, freed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshots of previous course file versions")
+    parser.add_argument("--list", metavar="FILE", help="List the snapshots of a file")
+    parser.add_argument("--restore", metavar="FILE", help="Restore a file from its snapshots")
+    parser.add_argument("--version", type=int, default=1, help="Snapshot to restore, 1 = newest (default)")
+    parser.add_argument("--sha", help="Restore the snapshot with this SHA-256 prefix")
+    parser.add_argument("--prune", action="store_true", help="Apply the retention limits")
+    parser.add_argument("--keep", type=int, default=KEEP_VERSIONS, help="Snapshots kept per file")
+    parser.add_argument("--days", type=float, help="Also drop snapshots older than this")
+    parser.add_argument("--import-backups", action="store_true", help="Move .bak/.broken copies into the store")
+    parser.add_argument("--dir", help="Directory of the files (default: the courses directory)")
+    args = parser.parse_args()
+
+    directory = args.dir
+    if not directory:
+        from generate_bullet_points_batch import find_courses_directory
+
+        directory = find_courses_directory()
+        if not directory:
+            sys.exit(1)
+    store = SnapshotStore(os.path.join(directory, SNAPSHOT_DIR), args.keep)
+
+    if args.import_backups:
+        imported, freed = import_backups(directory)
+        print(f"Imported {imported} backup copies, freed {freed / 1e6:.1f} MB "
+              f"(store now {store.size() / 1e6:.1f} MB)")
+    elif args.list:
+        for number, entry in enumerate(store.versions(args.list), 1):
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["time"]))
+            print(f"{number:>3}  {stamp}  {entry['sha256'][:12]}  {entry['size']:>10,} bytes")
+    elif args.restore:
+        try:
+            digest = store.restore(os.path.join(directory, os.path.basename(args.restore)), args.version, args.sha)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"Restored {args.restore} to {digest[:12]} (the replaced content is now snapshot 1)")
+    elif args.prune:
+        dropped, deleted = store.prune(args.keep, args.days)
+        print(f"Dropped {dropped} snapshots and {deleted} objects (store now {store.size() / 1e6:.1f} MB)")
+    else:
+        counts: Dict[str, int] = {}
+        for entry in store.history():
+            counts[entry["file"]] = counts.get(entry["file"], 0) + 1
+        for name, count in sorted(counts.items()):
+            print(f"{name:<70}{count} snapshots")
+        print(f"{len(counts)} files, {sum(counts.values())} snapshots, {store.size() / 1e6:.1f} MB in {store.root}")
+
+
+if __name__ == "__main__":
+    main()
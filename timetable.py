@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Load the Semester 1 timetable export into a compact in-memory structure.
+
+The timetable export ("42 TT Child Data - Sem1 23-24(Sem1 TT) copy.csv") has one
+row per scheduled activity. This module groups those rows by course code (the
+part of "Module ID" before the first underscore, e.g. MSBM08002_SS1_SEM1 ->
+MSBM08002) so a course's weekly slots, rooms and buildings can be looked up
+without re-reading the CSV.
+
+Parsing the CSV takes a noticeable fraction of a second, so the parsed
+timetable is cached in a binary file next to the CSV and reused until the CSV
+changes.
+
+Usage:
+    python3 timetable.py                 # Summary of the timetable
+    python3 timetable.py INFR08025       # Weekly slots for a single course
+"""
+
+import csv
+import os
+import pickle
+import re
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from timetable_weeks import contact_hours
+
+# Default location of the raw timetable export
+TT_CSV_PATH = "42 TT Child Data - Sem1 23-24(Sem1 TT) copy.csv"
+
+# Default location of the binary cache (stored next to the CSV)
+TT_CACHE_PATH = ".timetable_cache.pickle"
+
+# Bump whenever the cached structure changes shape
+CACHE_VERSION = 1
+
+DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+# Multi-room bookings are comma separated ("Vet School,Vet School"), but some
+# names contain ", " themselves ("Medical School, Teviot")
+_MULTI_VALUE_SPLIT = re.compile(r",(?! )")
+
+
+class Activity(NamedTuple):
+    """A single scheduled activity (one row of the timetable export)."""
+    activity_id: str
+    name: str
+    activity_type: str
+    day: int                     # Index into DAYS
+    start: int                   # Minutes since midnight
+    end: int                     # Minutes since midnight
+    weeks: str                   # Raw DRPS weeks expression
+    number_of_weeks: int
+    duration: int                # Length in 30 minute slots
+    size: int
+    real_size: int
+    rooms: Tuple[str, ...]
+    buildings: Tuple[str, ...]
+    campuses: Tuple[str, ...]
+
+    @property
+    def is_scheduled(self) -> bool:
+        """Activities without a real time slot are exported as 0:00-0:00."""
+        return self.end > self.start
+
+    @property
+    def contact_hours(self) -> float:
+        """Hours of teaching for this activity across all of its weeks."""
+        if not self.is_scheduled:
+            return 0.0
+        try:
+            return contact_hours(self.weeks, self.duration, self.number_of_weeks)
+        except ValueError:
+            return 0.0
+
+
+def course_code_from_module_id(module_id: str) -> Optional[str]:
+    """
+    Extract the course code from a timetable Module ID.
+
+    Args:
+        module_id (str): Module ID such as "MSBM08002_SS1_SEM1"
+
+    Returns:
+        str: The course code ("MSBM08002"), or None if the ID is empty
+    """
+    code = module_id.split("_", 1)[0].strip()
+    return code or None
+
+
+def parse_time(value: str) -> int:
+    """Convert a "H:MM" time string into minutes since midnight."""
+    hours, minutes = value.strip().split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def format_time(minutes: int) -> str:
+    """Convert minutes since midnight back into a "HH:MM" string."""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _to_int(value: str) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _split_values(value: str, strip_marker: bool = False) -> Tuple[str, ...]:
+    """Split a (possibly multi-valued) room/building/campus cell."""
+    values = []
+    for part in _MULTI_VALUE_SPLIT.split(value or ""):
+        part = part.strip()
+        if strip_marker and part.startswith("*"):
+            part = part[1:]  # Campus names carry a leading asterisk
+        # Unallocated activities use "0" for room, building and campus
+        if part and part != "0" and part not in values:
+            values.append(part)
+    return tuple(values)
+
+
+class Timetable:
+    """Timetable activities indexed by course code."""
+
+    def __init__(self, activities_by_course: Dict[str, List[Activity]], source: Optional[Tuple] = None):
+        self._activities = activities_by_course
+        # (path, size, mtime) of the CSV this timetable was built from
+        self.source = source
+
+    @classmethod
+    def from_csv(cls, csv_path: str = TT_CSV_PATH) -> "Timetable":
+        """
+        Parse the timetable export.
+
+        Args:
+            csv_path (str): Path to the timetable CSV
+
+        Returns:
+            Timetable: The parsed timetable
+        """
+        rows = _read_csv_rows(csv_path)
+
+        # Intern repeated strings so identical rooms, weeks expressions etc.
+        # share one object in memory (and in the pickled cache)
+        strings: Dict[str, str] = {}
+
+        def intern(value):
+            return strings.setdefault(value, value)
+
+        def intern_all(values):
+            return tuple(intern(v) for v in values)
+
+        activities = defaultdict(list)
+        for row in rows:
+            code = course_code_from_module_id(row.get("Module ID", ""))
+            if not code:
+                continue
+            try:
+                day = DAYS.index(row["Day"].strip())
+                start = parse_time(row["Start Time"])
+                end = parse_time(row["End Time"])
+            except (KeyError, ValueError):
+                continue
+
+            activities[intern(code)].append(Activity(
+                activity_id=row.get("Activity ID", "").strip(),
+                name=intern(row.get("Name", "").strip()),
+                activity_type=intern(row.get("Name of Type", "").strip().lstrip("*")),
+                day=day,
+                start=start,
+                end=end,
+                weeks=intern(row.get("Weeks", "").strip()),
+                number_of_weeks=_to_int(row.get("Number of weeks")),
+                duration=_to_int(row.get("Duration")),
+                size=_to_int(row.get("Size")),
+                real_size=_to_int(row.get("Real Size")),
+                rooms=intern_all(_split_values(row.get("Room", ""))),
+                buildings=intern_all(_split_values(row.get("Building", ""))),
+                campuses=intern_all(_split_values(row.get("Campus", ""), strip_marker=True)),
+            ))
+
+        for course_activities in activities.values():
+            course_activities.sort(key=lambda a: (a.day, a.start, a.end, a.activity_id))
+
+        return cls(dict(activities), source=_file_signature(csv_path))
+
+    # -- Persistence --------------------------------------------------------
+
+    def save(self, cache_path: str = TT_CACHE_PATH):
+        """Write the timetable to a binary cache file."""
+        # Store plain tuples so the cache does not depend on where Activity
+        # was imported from (e.g. __main__ when run as a script)
+        payload = {
+            "version": CACHE_VERSION,
+            "source": self.source,
+            "activities": {code: [tuple(a) for a in acts] for code, acts in self._activities.items()},
+        }
+        with open(cache_path, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, cache_path: str = TT_CACHE_PATH) -> "Timetable":
+        """Read a timetable previously written with save()."""
+        with open(cache_path, "rb") as f:
+            payload = pickle.load(f)
+        if payload.get("version") != CACHE_VERSION:
+            raise ValueError(f"Unsupported timetable cache version in {cache_path}")
+        activities = {code: [Activity._make(a) for a in acts] for code, acts in payload["activities"].items()}
+        return cls(activities, source=payload.get("source"))
+
+    # -- Lookups ------------------------------------------------------------
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._activities
+
+    def __len__(self) -> int:
+        return len(self._activities)
+
+    def course_codes(self) -> List[str]:
+        """All course codes with at least one timetabled activity."""
+        return sorted(self._activities)
+
+    def activities(self, code: str) -> List[Activity]:
+        """All activities for a course, ordered by day and start time."""
+        return self._activities.get(code, [])
+
+    def weekly_slots(self, code: str) -> List[Tuple[str, str, str]]:
+        """
+        Distinct weekly time slots for a course.
+
+        Returns:
+            list: (day, start, end) tuples such as ("Tue", "10:00", "13:00")
+        """
+        slots = sorted({(a.day, a.start, a.end) for a in self.activities(code) if a.is_scheduled})
+        return [(DAYS[day], format_time(start), format_time(end)) for day, start, end in slots]
+
+    def contact_hours(self, code: str) -> float:
+        """
+        Total scheduled hours for a course.
+
+        Alternative groups (e.g. several tutorial slots) are all counted, so this
+        is the teaching delivered rather than the hours a single student attends.
+        """
+        return sum(a.contact_hours for a in self.activities(code))
+
+    def rooms(self, code: str) -> List[str]:
+        """Distinct rooms used by a course."""
+        return _distinct(room for a in self.activities(code) for room in a.rooms)
+
+    def buildings(self, code: str) -> List[str]:
+        """Distinct buildings used by a course."""
+        return _distinct(building for a in self.activities(code) for building in a.buildings)
+
+    def campuses(self, code: str) -> List[str]:
+        """Distinct campuses used by a course (without the leading asterisk)."""
+        return _distinct(campus for a in self.activities(code) for campus in a.campuses)
+
+
+def _distinct(values: Iterable[str]) -> List[str]:
+    return sorted(set(values))
+
+
+def _read_csv_rows(csv_path: str) -> List[Dict[str, str]]:
+    """Read the CSV, trying the same encodings as merge_data.py."""
+    encodings = ['utf-8', 'latin1', 'cp1252']
+    for encoding in encodings:
+        try:
+            with open(csv_path, 'r', encoding=encoding, newline='') as f:
+                return list(csv.DictReader(f))
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Could not decode {csv_path} with any of {encodings}")
+
+
+def _file_signature(path: str) -> Tuple[str, int, int]:
+    stats = os.stat(path)
+    return (os.path.basename(path), stats.st_size, stats.st_mtime_ns)
+
+
+def load_timetable(csv_path: str = TT_CSV_PATH, cache_path: Optional[str] = TT_CACHE_PATH) -> Timetable:
+    """
+    Load the timetable, using the binary cache when it is up to date.
+
+    Args:
+        csv_path (str): Path to the timetable CSV
+        cache_path (str): Path to the binary cache, or None to disable caching
+
+    Returns:
+        Timetable: The loaded timetable
+    """
+    if cache_path and os.path.exists(cache_path):
+        try:
+            timetable = Timetable.load(cache_path)
+            if timetable.source == _file_signature(csv_path):
+                return timetable
+        except (OSError, ValueError, TypeError, AttributeError, pickle.UnpicklingError, EOFError):
+            pass  # Stale or unreadable cache, rebuild below
+
+    timetable = Timetable.from_csv(csv_path)
+    if cache_path:
+        try:
+            timetable.save(cache_path)
+        except OSError as e:
+            print(f"Warning: Could not write timetable cache {cache_path}: {e}")
+    return timetable
+
+
+def main():
+    timetable = load_timetable()
+
+    if len(sys.argv) > 1:
+        for code in sys.argv[1:]:
+            code = code.upper()
+            if code not in timetable:
+                print(f"{code}: no timetabled activities")
+                continue
+            print(f"{code}:")
+            for day, start, end in timetable.weekly_slots(code):
+                print(f"  {day} {start}-{end}")
+            print(f"  Rooms: {', '.join(timetable.rooms(code)) or 'None'}")
+            print(f"  Buildings: {', '.join(timetable.buildings(code)) or 'None'}")
+            print(f"  Campuses: {', '.join(timetable.campuses(code)) or 'None'}")
+            print(f"  Scheduled contact hours: {timetable.contact_hours(code):g}")
+        return
+
+    total_activities = sum(len(timetable.activities(code)) for code in timetable.course_codes())
+    print(f"Loaded {total_activities} activities for {len(timetable)} courses from {TT_CSV_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Detect timetable clashes between courses using bitmasks.
+
+Every activity in the timetable is encoded as a bitmask over
+(teaching week x weekday x 30 minute slot). A course's mask is the union of
+its activity masks, so checking whether two courses overlap is a single
+bitwise AND, and checking every candidate course against a basket is one AND
+per candidate.
+
+Courses often run the same tutorial or lab several times ("Tutorial/01",
+"Tutorial/02", ...) and a student only attends one of them. Those groups are
+kept as lists of alternative masks: a group only clashes when every one of
+its alternatives clashes.
+
+Usage:
+    python3 timetable_clashes.py INFR08025 MATH08057          # Clashes within a basket
+    python3 timetable_clashes.py INFR08025 MATH08057 --free   # Courses that fit the basket
+"""
+
+import re
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from timetable import DAYS, Activity, Timetable, format_time, load_timetable
+from timetable_weeks import week_label, week_numbers
+
+# Grid resolution
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+SLOTS_PER_WEEK = SLOTS_PER_DAY * len(DAYS)
+
+# "Tutorial/03 <10-11>" -> variant "Tutorial/03" -> group "Tutorial"
+_WEEK_NOTE_PATTERN = re.compile(r"\s*<[^>]*>\s*$")
+
+
+def activity_mask(activity: Activity) -> int:
+    """
+    Encode an activity as a bitmask over (week, weekday, 30 minute slot).
+
+    Args:
+        activity (Activity): A timetable activity
+
+    Returns:
+        int: The bitmask, or 0 if the activity has no usable time slot
+    """
+    if not activity.is_scheduled:
+        return 0
+    try:
+        weeks = week_numbers(activity.weeks)
+    except ValueError:
+        return 0
+
+    first_slot = activity.start // SLOT_MINUTES
+    last_slot = -(-activity.end // SLOT_MINUTES)  # Round partial slots up
+    day_mask = ((1 << (last_slot - first_slot)) - 1) << (activity.day * SLOTS_PER_DAY + first_slot)
+
+    mask = 0
+    for week in weeks:
+        mask |= day_mask << (week * SLOTS_PER_WEEK)
+    return mask
+
+
+def activity_group(activity: Activity) -> Tuple[str, str]:
+    """
+    Split an activity name into (group, variant).
+
+    Activities in the same group with different variants are alternatives,
+    e.g. "Maths - Tutorial/01" and "Maths - Tutorial/02".
+    """
+    variant = _WEEK_NOTE_PATTERN.sub("", activity.name)
+    group, _, label = variant.rpartition("/")
+    if not group:
+        return variant, ""
+    return group, label
+
+
+class CourseMask(NamedTuple):
+    """Bitmasks for one course."""
+    required: int                              # Activities every student attends
+    choices: Tuple[Tuple[int, ...], ...]       # Groups where a student picks one variant
+
+
+def build_course_mask(activities: Iterable[Activity]) -> CourseMask:
+    """Combine a course's activities into its required mask and choice groups."""
+    groups: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for activity in activities:
+        mask = activity_mask(activity)
+        if mask:
+            group, variant = activity_group(activity)
+            groups[group][variant] |= mask
+
+    required = 0
+    choices = []
+    for variants in groups.values():
+        if len(variants) == 1:
+            required |= next(iter(variants.values()))
+        else:
+            choices.append(tuple(variants.values()))
+    return CourseMask(required, tuple(choices))
+
+
+class ClashEngine:
+    """Bitmask clash checks over all timetabled courses."""
+
+    def __init__(self, masks: Dict[str, CourseMask]):
+        self._masks = masks
+
+    @classmethod
+    def from_timetable(cls, timetable: Timetable) -> "ClashEngine":
+        return cls({code: build_course_mask(timetable.activities(code)) for code in timetable.course_codes()})
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._masks
+
+    def course_mask(self, code: str) -> CourseMask:
+        return self._masks.get(code, CourseMask(0, ()))
+
+    def basket_mask(self, codes: Iterable[str]) -> int:
+        """Union of the required activities of every course in a basket."""
+        mask = 0
+        for code in codes:
+            mask |= self.course_mask(code).required
+        return mask
+
+    def overlap(self, code: str, occupied: int) -> int:
+        """
+        Slots where a course cannot avoid the already occupied slots.
+
+        Required activities clash directly. A choice group only contributes
+        when none of its alternatives is free.
+        """
+        course = self.course_mask(code)
+        overlap = course.required & occupied
+        for alternatives in course.choices:
+            clashes = [alternative & occupied for alternative in alternatives]
+            if all(clashes):
+                overlap |= min(clashes, key=lambda m: bin(m).count("1"))
+        return overlap
+
+    def clashes(self, codes: Iterable[str]) -> List[Tuple[str, str, int]]:
+        """
+        Find clashing pairs within a basket of courses.
+
+        Returns:
+            list: (course_a, course_b, overlap_mask) for each clashing pair
+        """
+        codes = list(dict.fromkeys(codes))
+        found = []
+        for i, first in enumerate(codes):
+            for second in codes[i + 1:]:
+                overlap = (self.overlap(first, self.course_mask(second).required)
+                           | self.overlap(second, self.course_mask(first).required))
+                if overlap:
+                    found.append((first, second, overlap))
+        return found
+
+    def check_candidates(self, basket: Iterable[str], candidates: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """
+        Check candidate courses against a basket.
+
+        Args:
+            basket (iterable): Course codes already chosen
+            candidates (iterable): Courses to test, defaults to every timetabled course
+
+        Returns:
+            dict: Course code -> True if the course clashes with the basket
+        """
+        basket = list(basket)
+        occupied = self.basket_mask(basket)
+        if candidates is None:
+            candidates = self._masks.keys()
+        chosen = set(basket)
+        return {code: bool(self.overlap(code, occupied)) for code in candidates if code not in chosen}
+
+
+def describe_mask(mask: int) -> List[Tuple[int, str, str, str]]:
+    """
+    Turn a mask back into readable (week index, day, start, end) ranges.
+    """
+    ranges = []
+    week = 0
+    while mask:
+        week_bits = mask & ((1 << SLOTS_PER_WEEK) - 1)
+        for day in range(len(DAYS)):
+            day_bits = (week_bits >> (day * SLOTS_PER_DAY)) & ((1 << SLOTS_PER_DAY) - 1)
+            slot = 0
+            while day_bits:
+                if day_bits & 1:
+                    start = slot
+                    while day_bits & 1:
+                        day_bits >>= 1
+                        slot += 1
+                    ranges.append((week, DAYS[day],
+                                   format_time(start * SLOT_MINUTES), format_time(slot * SLOT_MINUTES)))
+                else:
+                    day_bits >>= 1
+                    slot += 1
+        mask >>= SLOTS_PER_WEEK
+        week += 1
+    return ranges
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if not args:
+        print("Usage: python3 timetable_clashes.py COURSE_CODE [COURSE_CODE ...] [--free]")
+        sys.exit(1)
+
+    basket = [code.upper() for code in args]
+    engine = ClashEngine.from_timetable(load_timetable())
+
+    for code in basket:
+        if code not in engine:
+            print(f"Warning: {code} has no timetabled activities")
+
+    clashes = engine.clashes(basket)
+    if not clashes:
+        print("No clashes found")
+    for first, second, overlap in clashes:
+        slots = describe_mask(overlap)
+        days = sorted({(day, start, end) for _, day, start, end in slots}, key=lambda s: (DAYS.index(s[0]), s[1]))
+        weeks = sorted({week for week, _, _, _ in slots})
+        print(f"{first} clashes with {second} in {len(weeks)} week(s) ({', '.join(week_label(w) for w in weeks)}):")
+        for day, start, end in days:
+            print(f"  {day} {start}-{end}")
+
+    if "--free" in sys.argv:
+        results = engine.check_candidates(basket)
+        free = sorted(code for code, clash in results.items() if not clash)
+        print(f"\n{len(free)} of {len(results)} timetabled courses fit around this basket")
+
+
+if __name__ == "__main__":
+    main()
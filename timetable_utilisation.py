@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Precompute room and building utilisation from the timetable export.
+
+Every activity in the timetable CSV has a room, a booked time slot, the number
+of weeks it runs for, a capacity ("Size") and the number of students actually
+allocated ("Real Size"). This script aggregates those rows with NumPy/pandas
+into:
+
+- Occupancy cubes of shape (room, weekday, hour): the fraction of Semester 1
+  teaching weeks in which the room is booked during that hour. The same cube
+  is produced per building (the average over the building's rooms).
+- Fill ratios per room and per building: allocated seat-hours divided by
+  booked seat-hours (Real Size / Size, weighted by hours).
+
+The results are written to a compressed .npz artifact so capacity questions
+can be answered without re-scanning the CSV. The artifact is rebuilt
+automatically when the CSV changes.
+
+Usage:
+    python3 timetable_utilisation.py                       # Build (if needed) and summarise
+    python3 timetable_utilisation.py --room "JCMB_5328"    # Weekly heatmap for one room
+    python3 timetable_utilisation.py --building "JCMB"     # Weekly heatmap for one building
+"""
+
+import os
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from timetable import DAYS, TT_CSV_PATH, _MULTI_VALUE_SPLIT, _file_signature
+from timetable_weeks import parse_weeks
+
+# Default location of the precomputed artifact
+UTILISATION_PATH = "timetable_utilisation.npz"
+
+# Weeks a room could be booked in: the Semester 1 teaching weeks
+TEACHING_WEEKS_MASK = parse_weeks("Sem1 wk1-Sem1 wk11")
+TEACHING_WEEKS = bin(TEACHING_WEEKS_MASK).count("1")
+
+HOURS = 24
+
+
+def _read_timetable_frame(csv_path: str) -> pd.DataFrame:
+    """Read the columns needed for utilisation, trying several encodings."""
+    columns = ['Day', 'Start Time', 'End Time', 'Size', 'Real Size',
+               'Weeks', 'Room', 'Building', 'Campus']
+    encodings = ['utf-8', 'latin1', 'cp1252']
+    for encoding in encodings:
+        try:
+            return pd.read_csv(csv_path, usecols=columns, encoding=encoding, dtype=str, keep_default_na=False)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Could not decode {csv_path} with any of {encodings}")
+
+
+def _teaching_week_mask(expression: str) -> int:
+    """Bitmask of the Semester 1 teaching weeks an activity runs in."""
+    try:
+        return parse_weeks(expression) & TEACHING_WEEKS_MASK
+    except ValueError:
+        return 0
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """Number of set bits in each element of a uint64 array."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values).astype(np.int64)
+    bits = np.unpackbits(values.astype('<u8').view(np.uint8).reshape(-1, 8), axis=1)
+    return bits.sum(axis=1).astype(np.int64)
+
+
+def _explode_rooms(frame: pd.DataFrame) -> pd.DataFrame:
+    """One row per booked room; multi-room bookings list rooms comma separated."""
+    def split(series):
+        return series.map(lambda value: [part.strip().lstrip('*') for part in _MULTI_VALUE_SPLIT.split(value)])
+
+    rooms = split(frame['Room'])
+    buildings = split(frame['Building'])
+    campuses = split(frame['Campus'])
+
+    # Pad building/campus lists to the room count (repeating the last entry)
+    def align(values, count):
+        return (values + values[-1:] * count)[:count]
+
+    frame = frame.assign(
+        Room=rooms,
+        Building=[align(b, len(r)) for b, r in zip(buildings, rooms)],
+        Campus=[align(c, len(r)) for c, r in zip(campuses, rooms)],
+    )
+    frame = frame.explode(['Room', 'Building', 'Campus'], ignore_index=True)
+    return frame[(frame['Room'] != '') & (frame['Room'] != '0')]
+
+
+def build_utilisation(csv_path: str = TT_CSV_PATH) -> Dict[str, np.ndarray]:
+    """
+    Aggregate the timetable into occupancy cubes and fill ratios.
+
+    Args:
+        csv_path (str): Path to the timetable CSV
+
+    Returns:
+        dict: Arrays ready to be written with np.savez_compressed
+    """
+    frame = _explode_rooms(_read_timetable_frame(csv_path))
+
+    # Parse each distinct weeks expression once and map the result back
+    week_masks = {expression: _teaching_week_mask(expression) for expression in frame['Weeks'].unique()}
+    frame['week_mask'] = frame['Weeks'].map(week_masks).astype(np.uint64)
+
+    frame['day'] = frame['Day'].map({day: i for i, day in enumerate(DAYS)})
+    start = frame['Start Time'].str.split(':', expand=True).astype(int)
+    end = frame['End Time'].str.split(':', expand=True).astype(int)
+    frame['start'] = start[0] * 60 + start[1]
+    frame['end'] = end[0] * 60 + end[1]
+    frame = frame[frame['day'].notna() & (frame['end'] > frame['start']) & (frame['week_mask'] > 0)]
+
+    room_codes, rooms = pd.factorize(frame['Room'], sort=True)
+    room_info = frame.assign(room=room_codes).groupby('room')[['Building', 'Campus']].first()
+    building_codes, buildings = pd.factorize(room_info['Building'], sort=True)
+
+    # Expand every booking into its 30 minute slots
+    first_slot = (frame['start'].to_numpy() // 30).astype(np.int64)
+    last_slot = (-(-frame['end'].to_numpy() // 30)).astype(np.int64)
+    slot_counts = last_slot - first_slot
+    row_index = np.repeat(np.arange(len(frame)), slot_counts)
+    offsets = np.arange(slot_counts.sum()) - np.repeat(np.cumsum(slot_counts) - slot_counts, slot_counts)
+    slots = first_slot[row_index] + offsets
+
+    week_mask = frame['week_mask'].to_numpy(dtype=np.uint64)
+    weeks = _popcount(week_mask).astype(np.float64)
+    days = frame['day'].to_numpy(dtype=np.int64)
+
+    # OR together the week masks of bookings sharing a (room, day, slot), so
+    # concurrent bookings of one room (e.g. parallel subgroups) count once
+    keys = (room_codes[row_index] * len(DAYS) + days[row_index]) * (HOURS * 2) + slots
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    slot_weeks = _popcount(np.bitwise_or.reduceat(week_mask[row_index][order], starts))
+    cell_keys = keys[starts]
+
+    room_occupancy = np.zeros((len(rooms), len(DAYS), HOURS), dtype=np.float64)
+    cell_room, remainder = np.divmod(cell_keys, len(DAYS) * HOURS * 2)
+    cell_day, cell_slot = np.divmod(remainder, HOURS * 2)
+    np.add.at(room_occupancy, (cell_room, cell_day, cell_slot // 2), 0.5 * slot_weeks)
+    room_occupancy /= TEACHING_WEEKS
+
+    # Fill ratio in seat-hours: sum(Real Size * hours) / sum(Size * hours)
+    hours = (frame['end'] - frame['start']).to_numpy() / 60 * weeks
+    size = pd.to_numeric(frame['Size'], errors='coerce').fillna(0).to_numpy()
+    real_size = pd.to_numeric(frame['Real Size'], errors='coerce').fillna(0).to_numpy()
+    booked_seats = np.bincount(room_codes, weights=size * hours, minlength=len(rooms))
+    used_seats = np.bincount(room_codes, weights=real_size * hours, minlength=len(rooms))
+
+    building_rooms = np.bincount(building_codes, minlength=len(buildings))
+    building_occupancy = np.zeros((len(buildings), len(DAYS), HOURS), dtype=np.float64)
+    np.add.at(building_occupancy, building_codes, room_occupancy)
+    building_occupancy /= building_rooms[:, None, None]
+    building_booked = np.bincount(building_codes, weights=booked_seats, minlength=len(buildings))
+    building_used = np.bincount(building_codes, weights=used_seats, minlength=len(buildings))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        room_fill = np.where(booked_seats > 0, used_seats / booked_seats, np.nan)
+        building_fill = np.where(building_booked > 0, building_used / building_booked, np.nan)
+
+    name, size_bytes, mtime = _file_signature(csv_path)
+    return {
+        'rooms': np.asarray(rooms, dtype=str),
+        'room_building': room_info['Building'].to_numpy(dtype=str),
+        'room_campus': room_info['Campus'].to_numpy(dtype=str),
+        'room_occupancy': room_occupancy.astype(np.float32),
+        'room_fill': room_fill.astype(np.float32),
+        'buildings': np.asarray(buildings, dtype=str),
+        'building_rooms': building_rooms.astype(np.int32),
+        'building_occupancy': building_occupancy.astype(np.float32),
+        'building_fill': building_fill.astype(np.float32),
+        'source': np.asarray([name, str(size_bytes), str(mtime)]),
+    }
+
+
+class Utilisation:
+    """Query interface over the precomputed utilisation artifact."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        self._rooms = {name: i for i, name in enumerate(arrays['rooms'])}
+        self._buildings = {name: i for i, name in enumerate(arrays['buildings'])}
+
+    @classmethod
+    def load(cls, path: str = UTILISATION_PATH) -> "Utilisation":
+        with np.load(path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def save(self, path: str = UTILISATION_PATH):
+        np.savez_compressed(path, **self.arrays)
+
+    @property
+    def source(self):
+        name, size_bytes, mtime = self.arrays['source']
+        return (str(name), int(size_bytes), int(mtime))
+
+    def room_occupancy(self, room: str) -> Optional[np.ndarray]:
+        """(weekday, hour) occupancy for a room, or None if it is not timetabled."""
+        index = self._rooms.get(room)
+        return None if index is None else self.arrays['room_occupancy'][index]
+
+    def building_occupancy(self, building: str) -> Optional[np.ndarray]:
+        """(weekday, hour) average occupancy over a building's rooms."""
+        index = self._buildings.get(building)
+        return None if index is None else self.arrays['building_occupancy'][index]
+
+    def room_fill(self, room: str) -> Optional[float]:
+        index = self._rooms.get(room)
+        return None if index is None else float(self.arrays['room_fill'][index])
+
+    def building_fill(self, building: str) -> Optional[float]:
+        index = self._buildings.get(building)
+        return None if index is None else float(self.arrays['building_fill'][index])
+
+    def free_rooms(self, building: str, day: str, hour: int, threshold: float = 0.0) -> List[str]:
+        """Rooms in a building booked in at most `threshold` of teaching weeks at a given time."""
+        in_building = self.arrays['room_building'] == building
+        occupancy = self.arrays['room_occupancy'][:, DAYS.index(day), hour]
+        return sorted(self.arrays['rooms'][in_building & (occupancy <= threshold)].tolist())
+
+    def busiest_buildings(self, count: int = 10) -> List[tuple]:
+        """Buildings with the highest average weekday daytime (9:00-18:00) occupancy."""
+        daytime = self.arrays['building_occupancy'][:, :5, 9:18].mean(axis=(1, 2))
+        order = np.argsort(-daytime)[:count]
+        return [(str(self.arrays['buildings'][i]), float(daytime[i]), int(self.arrays['building_rooms'][i]))
+                for i in order]
+
+
+def load_utilisation(csv_path: str = TT_CSV_PATH, path: str = UTILISATION_PATH) -> Utilisation:
+    """Load the artifact, rebuilding it first if the CSV has changed."""
+    if os.path.exists(path):
+        try:
+            utilisation = Utilisation.load(path)
+            if utilisation.source == _file_signature(csv_path):
+                return utilisation
+        except (OSError, ValueError, KeyError):
+            pass  # Unreadable or incomplete artifact, rebuild below
+
+    print(f"Building utilisation artifact from {csv_path}...")
+    utilisation = Utilisation(build_utilisation(csv_path))
+    utilisation.save(path)
+    print(f"Saved {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+    return utilisation
+
+
+def print_heatmap(label: str, occupancy: np.ndarray, fill: Optional[float]):
+    print(f"{label} (fill ratio: {'n/a' if fill is None or np.isnan(fill) else f'{fill:.0%}'})")
+    print("       " + " ".join(f"{hour:>3}" for hour in range(8, 20)))
+    for day_index, day in enumerate(DAYS[:5]):
+        cells = " ".join(f"{occupancy[day_index, hour] * 100:>3.0f}" for hour in range(8, 20))
+        print(f"  {day}  {cells}")
+
+
+def main():
+    utilisation = load_utilisation()
+
+    if len(sys.argv) > 2 and sys.argv[1] in ("--room", "--building"):
+        name = sys.argv[2]
+        if sys.argv[1] == "--room":
+            occupancy, fill = utilisation.room_occupancy(name), utilisation.room_fill(name)
+        else:
+            occupancy, fill = utilisation.building_occupancy(name), utilisation.building_fill(name)
+        if occupancy is None:
+            print(f"Error: {name} not found in the timetable")
+            sys.exit(1)
+        print_heatmap(name, occupancy, fill)
+        return
+
+    arrays = utilisation.arrays
+    print(f"Rooms: {len(arrays['rooms'])}, buildings: {len(arrays['buildings'])}")
+    print(f"Overall fill ratio (rooms): {np.nanmean(arrays['room_fill']):.0%}")
+    print("Busiest buildings (weekday 9:00-18:00 occupancy):")
+    for building, occupancy, rooms in utilisation.busiest_buildings():
+        print(f"  {building}: {occupancy:.0%} across {rooms} room(s)")
+
+
+if __name__ == "__main__":
+    main()
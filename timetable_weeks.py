@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Parse DRPS "Weeks" expressions from the timetable export.
+
+The "Weeks" column holds expressions such as
+"Sem1 wk1-Sem1 wk8, Sem1 wk10-Sem1 wk11". Only a few hundred distinct
+expressions are shared by thousands of rows, so every parse is memoised on the
+raw string and the cost is paid once per distinct expression.
+
+Weeks are numbered across the whole academic year (summer vacation, welcome
+week, Semester 1, exams, winter vacation, ...) so ranges that cross a term
+boundary ("Sem1 wk11-Vac1 wk1") expand correctly. A parsed expression is a
+bitmask with bit N set when week N is included.
+
+Usage:
+    python3 timetable_weeks.py "Sem1 wk1-Sem1 wk5, Sem1 wk7-Sem1 wk11"
+    python3 timetable_weeks.py          # Cache statistics for the whole timetable
+"""
+
+import re
+import sys
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# Teaching periods in calendar order with the number of weeks in each
+TERM_LAYOUT = (
+    ("Vac3", 15),
+    ("Welcome", 1),
+    ("Sem1", 11),
+    ("Exam1", 2),
+    ("Vac1", 3),
+    ("Welcome 2", 1),
+    ("Sem2", 11),
+    ("Exam2", 4),
+)
+
+TERM_OFFSETS = {}
+TOTAL_WEEKS = 0
+for _term, _length in TERM_LAYOUT:
+    TERM_OFFSETS[_term] = TOTAL_WEEKS
+    TOTAL_WEEKS += _length
+
+_WEEK_PATTERN = re.compile(r"^\s*(.+?)\s+wk(\d+)\s*$")
+
+# Half-hour slots per hour, the unit of the "Duration" column
+SLOTS_PER_HOUR = 2
+
+
+def week_index(label: str) -> int:
+    """
+    Convert a single week label into a week number for the academic year.
+
+    Args:
+        label (str): Label such as "Sem1 wk3"
+
+    Returns:
+        int: Zero-based week number
+
+    Raises:
+        ValueError: If the label is not recognised
+    """
+    match = _WEEK_PATTERN.match(label)
+    if not match or match.group(1) not in TERM_OFFSETS:
+        raise ValueError(f"Unrecognised week label: {label!r}")
+    term = match.group(1)
+    week = int(match.group(2))
+    if not 1 <= week <= dict(TERM_LAYOUT)[term]:
+        raise ValueError(f"Week out of range for {term}: {label!r}")
+    return TERM_OFFSETS[term] + week - 1
+
+
+def week_label(index: int) -> str:
+    """Convert a week number back into a label such as "Sem1 wk3"."""
+    for term, length in TERM_LAYOUT:
+        offset = TERM_OFFSETS[term]
+        if offset <= index < offset + length:
+            return f"{term} wk{index - offset + 1}"
+    raise ValueError(f"Week number out of range: {index}")
+
+
+@lru_cache(maxsize=4096)
+def parse_weeks(expression: str) -> int:
+    """
+    Parse a weeks expression into a bitmask of week numbers.
+
+    Args:
+        expression (str): Expression such as "Sem1 wk1-Sem1 wk5, Sem1 wk7"
+
+    Returns:
+        int: Bitmask with bit N set when week N is included
+
+    Raises:
+        ValueError: If any part of the expression is not recognised
+    """
+    mask = 0
+    for part in expression.split(","):
+        if not part.strip():
+            continue
+        first, _, last = part.partition("-")
+        start = week_index(first)
+        end = week_index(last) if last.strip() else start
+        if end < start:
+            raise ValueError(f"Week range runs backwards: {part.strip()!r}")
+        mask |= ((1 << (end - start + 1)) - 1) << start
+    return mask
+
+
+@lru_cache(maxsize=4096)
+def week_numbers(expression: str) -> Tuple[int, ...]:
+    """Parse a weeks expression into a sorted tuple of week numbers."""
+    mask = parse_weeks(expression)
+    return tuple(week for week in range(mask.bit_length()) if mask >> week & 1)
+
+
+def week_count(expression: str, number_of_weeks: Optional[int] = None) -> int:
+    """
+    Count the weeks covered by an expression.
+
+    Falls back to the export's "Number of weeks" column when the expression
+    cannot be parsed.
+    """
+    try:
+        return bin(parse_weeks(expression)).count("1")
+    except ValueError:
+        if number_of_weeks is None:
+            raise
+        return number_of_weeks
+
+
+def contact_hours(expression: str, duration: int, number_of_weeks: Optional[int] = None) -> float:
+    """
+    Total contact hours for one activity across the year.
+
+    Args:
+        expression (str): The activity's weeks expression
+        duration (int): The "Duration" column, in 30 minute slots
+        number_of_weeks (int): The "Number of weeks" column, used as a fallback
+
+    Returns:
+        float: Hours of teaching for the activity
+    """
+    return week_count(expression, number_of_weeks) * duration / SLOTS_PER_HOUR
+
+
+def cache_info():
+    """Hit/miss statistics for the memoised parsers."""
+    return {"parse_weeks": parse_weeks.cache_info(), "week_numbers": week_numbers.cache_info()}
+
+
+def main():
+    if len(sys.argv) > 1:
+        expression = " ".join(sys.argv[1:])
+        try:
+            weeks = week_numbers(expression)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"{len(weeks)} week(s): {', '.join(week_label(w) for w in weeks)}")
+        return
+
+    from timetable import load_timetable
+
+    timetable = load_timetable()
+    failures = set()
+    total_hours = 0.0
+    rows = 0
+    for code in timetable.course_codes():
+        for activity in timetable.activities(code):
+            rows += 1
+            try:
+                total_hours += contact_hours(activity.weeks, activity.duration, activity.number_of_weeks)
+                parse_weeks(activity.weeks)
+            except ValueError:
+                failures.add(activity.weeks)
+
+    info = parse_weeks.cache_info()
+    print(f"Parsed weeks for {rows} activities: {info.misses} distinct expressions, {info.hits} cache hits")
+    print(f"Total scheduled contact hours: {total_hours:.0f}")
+    if failures:
+        print(f"Unrecognised expressions ({len(failures)}):")
+        for expression in sorted(failures):
+            print(f"  {expression}")
+
+
+if __name__ == "__main__":
+    main()
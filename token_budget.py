@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Token budgeting for bullet point prompts.
+
+Course descriptions range from a sentence to several pages, but three bullet
+points never need more than a few hundred tokens of input. This module:
+
+- counts tokens with tiktoken when it is installed, otherwise with a
+  character/word heuristic that slightly over-estimates
+- fits a course text to a token budget by keeping its most informative
+  sentences (in their original order) rather than cutting it off mid-way
+- keeps a ledger of input tokens before and after trimming and of the API
+  usage for each run, appended to token_ledger.jsonl
+
+Usage:
+    python3 token_budget.py                  # Effect of the default budget on the catalogue
+    python3 token_budget.py --budget 250     # ... of another budget
+    python3 token_budget.py --ledger         # Token spend of previous runs
+"""
+
+import argparse
+import glob
+import math
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import json_codec
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Default token budget for one course's text in a prompt
+DEFAULT_INPUT_BUDGET = 400
+
+# One JSON line per generator run
+LEDGER_PATH = "token_ledger.jsonl"
+
+# Sentence ends, including the scraped "practice.The next" joins without a space
+_SENTENCE_SPLIT = re.compile(r'(?<=[a-z0-9)][.!?])\s*(?=[A-Z("\'])|(?<=[.!?])\s+(?=[A-Z0-9("\'])|\n+')
+_WORD = re.compile(r"[a-z][a-z'-]+")
+
+# Words that say nothing about what a course covers
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been before being between both but by can
+course courses could did do does during each either for from further had has have having he her
+here his how i if in into is it its itself may might more most must no nor not of on once only or
+other our out over own same she should so some students student such than that the their them
+then there these they this those through to too under until up very was we were what when where
+which while who whom why will with would you your well within without include includes
+including taught teaching week weeks year years
+""".split())
+
+_encodings: Dict[str, object] = {}
+
+
+def _encoding(model: str):
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding("o200k_base")
+    return _encodings[model]
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Number of tokens in text (exact with tiktoken, estimated without)."""
+    if not text:
+        return 0
+    if tiktoken is not None:
+        return len(_encoding(model).encode(text))
+    # About 4 characters per token for English prose, more for long technical words
+    return max(math.ceil(len(text) / 4), math.ceil(len(text.split()) * 1.3))
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text) if s and s.strip()]
+
+
+def _truncate_tokens(text: str, budget: int, model: str) -> str:
+    """Cut a single over-long sentence to the budget at a word boundary."""
+    if tiktoken is not None:
+        encoding = _encoding(model)
+        return encoding.decode(encoding.encode(text)[:budget]).rsplit(' ', 1)[0]
+    words, kept = text.split(), []
+    for word in words:
+        if count_tokens(' '.join(kept + [word]), model) > budget:
+            break
+        kept.append(word)
+    return ' '.join(kept)
+
+
+def content_words(text: str) -> List[str]:
+    return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+
+def keyword_coverage(original: str, fitted: str, top: int = 10) -> float:
+    """Share of the original text's most frequent content words that survive trimming."""
+    keywords = [w for w, _ in Counter(content_words(original)).most_common(top)]
+    if not keywords:
+        return 1.0
+    kept = set(content_words(fitted))
+    return sum(w in kept for w in keywords) / len(keywords)
+
+
+def fit_to_budget(text: str, budget: int = DEFAULT_INPUT_BUDGET, model: str = "gpt-4o-mini") -> str:
+    """
+    Reduce text to at most `budget` tokens, keeping its most informative sentences.
+
+    Sentences are scored by how many of the text's frequent content words they
+    contain (normalised by length, with a bonus for the opening sentences,
+    which usually state what the course is about). The best sentences that fit
+    are kept in their original order.
+    """
+    if count_tokens(text, model) <= budget:
+        return text
+    sentences = split_sentences(text)
+    if len(sentences) <= 1:
+        return _truncate_tokens(text, budget, model)
+
+    words = [content_words(s) for s in sentences]
+    frequency = Counter(w for sentence_words in words for w in set(sentence_words))
+    scores = []
+    for position, sentence_words in enumerate(words):
+        if not sentence_words:
+            scores.append(0.0)
+            continue
+        score = sum(frequency[w] for w in set(sentence_words)) / math.sqrt(len(sentence_words))
+        scores.append(score * (1.5 if position < 2 else 1.0))
+
+    chosen, used = [], 0
+    for index in sorted(range(len(sentences)), key=lambda i: -scores[i]):
+        cost = count_tokens(sentences[index], model) + 1
+        if used + cost <= budget:
+            chosen.append(index)
+            used += cost
+    if not chosen:
+        return _truncate_tokens(sentences[0], budget, model)
+    return ' '.join(sentences[i] for i in sorted(chosen))
+
+
+class TokenLedger:
+    """Input tokens before and after budgeting for one run, written to the ledger file."""
+
+    def __init__(self, budget: int = DEFAULT_INPUT_BUDGET):
+        self.budget = budget
+        self.texts = 0
+        self.trimmed = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    def fit(self, text: str, model: str = "gpt-4o-mini") -> str:
+        """fit_to_budget() that records the saving."""
+        before = count_tokens(text, model)
+        fitted = text if before <= self.budget else fit_to_budget(text, self.budget, model)
+        after = before if fitted is text else count_tokens(fitted, model)
+        self.texts += 1
+        self.trimmed += fitted is not text
+        self.tokens_before += before
+        self.tokens_after += after
+        return fitted
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "input_budget": self.budget,
+            "texts": self.texts,
+            "texts_trimmed": self.trimmed,
+            "input_tokens_before": self.tokens_before,
+            "input_tokens_after": self.tokens_after,
+        }
+
+    def write(self, script: str, usage: Optional[dict] = None, path: str = LEDGER_PATH):
+        """Append this run's budgeting and API usage to the ledger."""
+        entry = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "script": script,
+                 "tokenizer": "tiktoken" if tiktoken is not None else "heuristic"}
+        entry.update(self.summary())
+        entry.update(usage or {})
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json_codec.dumps(entry) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token budgeting for bullet point prompts")
+    parser.add_argument("--budget", type=int, default=DEFAULT_INPUT_BUDGET)
+    parser.add_argument("--ledger", action="store_true", help="Show the token spend of previous runs")
+    parser.add_argument("--courses", default=os.path.join("scraped_data", "courses"))
+    args = parser.parse_args()
+
+    if args.ledger:
+        if not os.path.exists(LEDGER_PATH):
+            print(f"No runs recorded in {LEDGER_PATH}")
+            return
+        for entry in json_codec.iter_jsonl(LEDGER_PATH, skip_invalid=True):
+            print(f"{entry['time']} {entry['script']}: {entry['texts']} texts, "
+                  f"{entry['input_tokens_before']} -> {entry['input_tokens_after']} input tokens, "
+                  f"{entry.get('prompt_tokens', 0)} prompt / {entry.get('completion_tokens', 0)} completion tokens "
+                  f"in {entry.get('calls', 0)} calls")
+        return
+
+    from llm_client import select_course_text
+
+    ledger = TokenLedger(args.budget)
+    coverage = []
+    for path in sorted(glob.glob(os.path.join(args.courses, "*.json"))):
+        for course in json_codec.iter_records(path):
+            text = select_course_text(course)
+            if course.get("period") != "Not delivered this year" and text.strip():
+                fitted = ledger.fit(text)
+                if fitted is not text:
+                    coverage.append(keyword_coverage(text, fitted))
+    summary = ledger.summary()
+    saved = summary["input_tokens_before"] - summary["input_tokens_after"]
+    print(f"Tokenizer: {'tiktoken' if tiktoken is not None else 'heuristic (tiktoken not installed)'}")
+    print(f"{summary['texts']} course texts, {summary['texts_trimmed']} over the {args.budget} token budget")
+    print(f"Input tokens: {summary['input_tokens_before']} -> {summary['input_tokens_after']} "
+          f"({100.0 * saved / max(summary['input_tokens_before'], 1):.1f}% saved)")
+    if coverage:
+        print(f"Top-10 keywords kept in trimmed texts: {100.0 * sum(coverage) / len(coverage):.1f}% on average")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Validate every course in the catalogue against the course schema.
+
+The verify_* scripts load a file and print the first five courses. This
+checks every record of every file, reading the courses one at a time
+(json_codec.iter_records), and counts problems by error class:
+
+    missing_field            a required key is absent or empty
+    wrong_type               a field has the wrong JSON type
+    bad_code                 the code is not four letters and five digits
+    credits_not_numeric      credits (or scqf_credits) is not a whole number
+    bulletpoints_format      not 3-5 lines each starting with "• "
+    bulletpoints_placeholder the no-information or generation-error text
+    legacy_field             the old "bullet_points" field is still present
+    not_delivered            a course filter_unavailable would remove
+    assessment_percent       a percentage outside 0-100
+    assessment_unparsed      every assessment percentage is 0
+    assessment_sum           percentages that do not add up to 100
+    invalid_json             a file (or the rest of it) could not be decoded
+    unreadable_file          a file could not be opened
+
+Files are checked in parallel (catalogue_runner.py). The report is JSON:
+totals, counts per error class, per-file counts and a few examples of each
+class.
+
+Usage:
+    python3 validate_catalogue.py                                 # Summary table
+    python3 validate_catalogue.py --report validation_report.json # Also write the report
+    python3 validate_catalogue.py --strict                        # Exit 1 if any record fails
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from catalogue_runner import run_files
+import json_codec
+
+# Field -> (JSON type, required)
+COURSE_SCHEMA = {
+    "code": (str, True),
+    "name": (str, True),
+    "url": (str, True),
+    "period": (str, True),
+    "credits": (str, True),
+    "school_name": (str, True),
+    "bulletpoints": (str, True),
+    "credit_level": (str, False),
+    "scqf_credits": (str, False),
+    "summary": (str, False),
+    "course_description": (str, False),
+    "keywords": (str, False),
+    "learning_activities": (str, False),
+    "assessment": (dict, False),
+}
+
+CODE_PATTERN = re.compile(r'^[A-Z]{4}\d{5}$')
+NUMERIC_FIELDS = ("credits", "scqf_credits")
+BULLET_PREFIX = "• "
+BULLET_LINES = (3, 5)
+# First lines of llm_client.NO_INFORMATION and GENERATION_ERROR (importing
+# llm_client would load the OpenAI client in every worker)
+PLACEHOLDERS = ("• No information available", "• Error generating course information")
+
+# Examples of each error class kept per file
+EXAMPLES = 3
+
+def check_course(course) -> List[Tuple[str, str]]:
+    """(error class, detail) for every problem with one course."""
+    if not isinstance(course, dict):
+        return [("wrong_type", f"course is {type(course).__name__}")]
+    errors = []
+    for field, (kind, required) in COURSE_SCHEMA.items():
+        value = course.get(field)
+        if value is None or value == "":
+            if required:
+                errors.append(("missing_field", field))
+        elif not isinstance(value, kind):
+            errors.append(("wrong_type", f"{field} is {type(value).__name__}"))
+
+    code = course.get("code")
+    if isinstance(code, str) and code and not CODE_PATTERN.match(code):
+        errors.append(("bad_code", code))
+    for field in NUMERIC_FIELDS:
+        value = course.get(field)
+        if isinstance(value, str) and value and not value.strip().isdigit():
+            errors.append(("credits_not_numeric", f"{field}={value!r}"))
+
+    bullets = course.get("bulletpoints")
+    if isinstance(bullets, str) and bullets:
+        lines = bullets.split("\n")
+        if lines[0] in PLACEHOLDERS:
+            errors.append(("bulletpoints_placeholder", lines[0]))
+        elif not BULLET_LINES[0] <= len(lines) <= BULLET_LINES[1] or \
+                not all(line.startswith(BULLET_PREFIX) and len(line) > len(BULLET_PREFIX) for line in lines):
+            errors.append(("bulletpoints_format", bullets[:80]))
+    if "bullet_points" in course:
+        errors.append(("legacy_field", "bullet_points"))
+    if course.get("period") == "Not delivered this year":
+        errors.append(("not_delivered", course.get("period")))
+
+    assessment = course.get("assessment")
+    if isinstance(assessment, dict):
+        percents = {k: v for k, v in assessment.items() if k.endswith("_percent")}
+        bad = {k: v for k, v in percents.items()
+               if isinstance(v, bool) or not isinstance(v, (int, float)) or not 0 <= v <= 100}
+        if bad:
+            errors.append(("assessment_percent", ", ".join(f"{k}={v!r}" for k, v in bad.items())))
+        elif percents:
+            total = sum(percents.values())
+            if total == 0:
+                errors.append(("assessment_unparsed", "all percentages 0"))
+            elif abs(total - 100) > 0.5:
+                errors.append(("assessment_sum", f"sum {total}"))
+    return errors
+
+
+def validate_file(file_path: str) -> Dict:
+    """
+    Check every course in a file.
+
+    Returns:
+        dict: records, invalid_records, errors (class -> count) and examples
+              (class -> [{code, detail}])
+    """
+    result = {"records": 0, "invalid_records": 0, "errors": Counter(), "examples": {}}
+    try:
+        for course in json_codec.iter_records(file_path):
+            result["records"] += 1
+            errors = check_course(course)
+            if errors:
+                result["invalid_records"] += 1
+            for error_class, detail in errors:
+                result["errors"][error_class] += 1
+                examples = result["examples"].setdefault(error_class, [])
+                if len(examples) < EXAMPLES:
+                    code = course.get("code", "") if isinstance(course, dict) else ""
+                    examples.append({"code": code, "detail": detail})
+    except json_codec.DecodeError as e:
+        # Records before the malformed one were still checked
+        result["errors"]["invalid_json"] += 1
+        result["examples"]["invalid_json"] = [{"code": "", "detail": str(e)}]
+    result["errors"] = dict(result["errors"])
+    return result
+
+
+def validate(file_paths: List[str], workers: int = None) -> Dict:
+    """Validate the files in parallel and build the report."""
+    started = time.perf_counter()
+    results = run_files(validate_file, file_paths, workers, echo=False)
+    report = {"files": len(file_paths), "records": 0, "invalid_records": 0, "errors": Counter(), "per_file": {},
+              "examples": {}}
+    for result in results:
+        name = os.path.basename(result.file_path)
+        if result.error:
+            report["errors"]["unreadable_file"] += 1
+            report["per_file"][name] = {"error": result.error}
+            continue
+        file_result = result.result
+        report["records"] += file_result["records"]
+        report["invalid_records"] += file_result["invalid_records"]
+        report["errors"].update(file_result["errors"])
+        report["per_file"][name] = {"records": file_result["records"], "invalid_records": file_result["invalid_records"],
+                                    "errors": file_result["errors"]}
+        for error_class, examples in file_result["examples"].items():
+            kept = report["examples"].setdefault(error_class, [])
+            kept.extend({"file": name, **e} for e in examples[:EXAMPLES - len(kept)])
+    report["errors"] = dict(report["errors"].most_common())
+    report["took_seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate the course catalogue against the course schema")
+    parser.add_argument("files", nargs="*", help="Course files (default: every file in the courses directory)")
+    parser.add_argument("--report", help="Write the JSON report to this file ('-' for stdout)")
+    parser.add_argument("--strict", action="store_true", help="Exit with status 1 if any record fails")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CATALOGUE_WORKERS or one per core)")
+    args = parser.parse_args()
+
+    file_paths = args.files
+    if not file_paths:
+        from generate_bullet_points_batch import find_courses_directory
+
+        courses_dir = find_courses_directory()
+        if not courses_dir:
+            sys.exit(1)
+        file_paths = [os.path.join(courses_dir, f) for f in sorted(os.listdir(courses_dir)) if f.endswith('.json')]
+
+    report = validate(file_paths, args.workers)
+    if args.report == "-":
+        print(json_codec.dumps(report, pretty=True))
+    else:
+        print(f"{report['records']} courses in {report['files']} files, {report['invalid_records']} with problems "
+              f"({report['took_seconds']:.2f}s)")
+        for error_class, count in report["errors"].items():
+            example = report["examples"].get(error_class, [{}])[0]
+            print(f"  {error_class:<26}{count:>6}   e.g. {example.get('code', '')} {example.get('detail', '')!r:.70}")
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                json_codec.dump(report, f)
+            print(f"Report written to {args.report}")
+    if args.strict and report["invalid_records"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
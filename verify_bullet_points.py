@@ -7,10 +7,11 @@ Usage:
     python verify_bullet_points.py [path/to/file.json]
 """
 
-import json
 import os
 import sys
 
+import json_codec
+
 def check_bullet_points(file_path, num_courses=5):
     """
     Check if courses in the file have bullet points.
@@ -28,8 +29,8 @@ def check_bullet_points(file_path, num_courses=5):
         # Read the JSON file
         with open(file_path, 'r', encoding='utf-8') as file:
             try:
-                courses = json.load(file)
-            except json.JSONDecodeError as e:
+                courses = json_codec.load(file)
+            except json_codec.DecodeError as e:
                 print(f"Error: Invalid JSON format in {file_path} - {e}")
                 return
         
@@ -1,12 +1,14 @@
-import json
 import os
 import glob
 
+from catalogue_runner import combine, run_files
+import json_codec
+
 def verify_file(file_path):
     """Verify that all courses in the file have bullet points."""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+            data = json_codec.load(f)
         
         total_courses = len(data)
         courses_with_bulletpoints = 0
@@ -50,20 +52,22 @@ def verify_file(file_path):
 
 def main():
     # Get all course JSON files
-    files = glob.glob("scraped_data/courses/courses_*.json")
+    files = sorted(glob.glob("scraped_data/courses/courses_*.json"))
     
     print(f"Found {len(files)} course files to verify")
     
-    results = []
-    for file_path in files:
-        result = verify_file(file_path)
-        results.append(result)
+    # Files are verified in parallel; results keep the file order
+    runs = run_files(verify_file, files)
+    results = [run.result for run in runs]
+    totals = combine(runs)
     
     # Print summary
     print("\n=== Overall Summary ===")
     total_files = len(results)
     successful_files = sum(1 for r in results if r.get("success", False))
     print(f"Total files: {total_files}")
+    print(f"Total courses: {totals.get('total', 0)} ({totals.get('missing', 0)} missing bullet points, "
+          f"{totals.get('with_bullet_points', 0)} under 'bullet_points')")
     print(f"Files with all courses having bullet points: {successful_files}")
     print(f"Files with issues: {total_files - successful_files}")
     